@@ -174,7 +174,7 @@ for num, name_uz, name_ar in allah_names:
              description_uz, description_ru, description_ar, description_en, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (num, name_uz, name_ru, name_ar, name_en,
-              desc_uz, desc_ru, desc_ar, desc_en, datetime.now()))
+              desc_uz, desc_ru, desc_ar, desc_en, int(datetime.now().timestamp())))
         
         conn.commit()
         print(f"✅ {num}. {name_uz} - {name_ar}")
@@ -3,16 +3,15 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from database import Database
+from bootstrap import get_database, get_translator
 from keyboards import get_admin_keyboard, get_main_menu_keyboard
 import logging
-from googletrans import Translator
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 router = Router()
-db = Database()
-translator = Translator()
+# main.py bilan bitta baza (alohida ulanishlar hovuzi ochilmaydi)
+db = get_database()
 
 # Admin ID larni saqlash uchun global o'zgaruvchi
 admin_ids = []
@@ -153,7 +152,7 @@ async def process_correct(message: Message, state: FSMContext):
     await message.answer(preview, reply_markup=keyboard)
     await state.set_state(AddQuestion.waiting_for_confirmation)
 
-@dp.callback_query(F.data == "admin_confirm_save")
+@router.callback_query(F.data == "admin_confirm_save")
 async def confirm_save(callback: CallbackQuery, state: FSMContext):
     if not is_admin(callback.from_user.id):
         await callback.answer("Siz admin emassiz!")
@@ -177,8 +176,7 @@ async def confirm_save(callback: CallbackQuery, state: FSMContext):
         print(f"📝 Asl matn (O'zbek): {question_uz}")
         
         # Tarjima qilish (sinxron)
-        from googletrans import Translator
-        translator = Translator()
+        translator = get_translator()
         
         # Rus tiliga tarjima
         question_ru = translator.translate(question_uz, dest='ru').text
@@ -204,9 +202,6 @@ async def confirm_save(callback: CallbackQuery, state: FSMContext):
         print(f"🇬🇧 Inglizcha tarjima: {question_en}")
         
         # Database ga saqlash
-        from database import Database
-        db = Database()
-        
         question_data = (
             question_uz, question_ru, question_ar, question_en,
             option1_uz, option1_ru, option1_ar, option1_en,
@@ -218,19 +213,7 @@ async def confirm_save(callback: CallbackQuery, state: FSMContext):
         print("✅ Ma'lumotlar bazaga saqlanmoqda...")
         
         # add_question metodini chaqirish
-        cursor = db.conn.cursor()
-        query = '''
-            INSERT INTO questions (
-                question_uz, question_ru, question_ar, question_en,
-                option1_uz, option1_ru, option1_ar, option1_en,
-                option2_uz, option2_ru, option2_ar, option2_en,
-                option3_uz, option3_ru, option3_ar, option3_en,
-                correct_option, created_at, created_by, is_active
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
-        '''
-        cursor.execute(query, question_data)
-        db.conn.commit()
-        question_id = cursor.lastrowid
+        question_id = await db.add_question(question_data)
         
         if question_id:
             # Tarjimalarni ko'rsatish
@@ -275,12 +258,10 @@ async def cancel_save(callback: CallbackQuery, state: FSMContext):
 # STATISTIKA
 async def show_stats(message: Message):
     try:
-        total_users = db.get_total_users()
-        today_users = db.get_today_users()
-        total_questions = db.get_question_count()
-        
-        db.cursor.execute('SELECT COUNT(*) FROM prophets')
-        total_prophets = db.cursor.fetchone()[0]
+        total_users = await db.get_total_users()
+        today_users = await db.get_today_users()
+        total_questions = await db.get_question_count()
+        total_prophets = await db.get_prophets_count()
         
         stats_text = (
             f"📊 BOT STATISTIKASI\n\n"
@@ -336,12 +317,13 @@ async def process_prophet_audio(message: Message, state: FSMContext):
     
     try:
         # Tarjima qilish
-        name_ru = (await translator.translate(data['name_uz'], dest='ru')).text
-        name_ar = (await translator.translate(data['name_uz'], dest='ar')).text
-        name_en = (await translator.translate(data['name_uz'], dest='en')).text
+        translator = get_translator()
+        name_ru = translator.translate(data['name_uz'], dest='ru').text
+        name_ar = translator.translate(data['name_uz'], dest='ar').text
+        name_en = translator.translate(data['name_uz'], dest='en').text
         
         # Database ga saqlash
-        db.add_prophet(data['name_uz'], name_ru, name_ar, name_en, message.audio.file_id)
+        await db.add_prophet(data['name_uz'], name_ru, name_ar, name_en, message.audio.file_id)
         
         await message.answer(f"✅ Payg'ambar muvaffaqiyatli qo'shildi!")
         await message.answer(
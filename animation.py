@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramBadRequest
+
+from outbound import send_priority, PRIORITY_ANIMATION
+
+
+class Frame:
+    """Animatsiya kadri; ``keyframe`` kadrlar yuklama ostida ham tashlab ketilmaydi"""
+
+    __slots__ = ('text', 'duration', 'keyframe')
+
+    def __init__(self, text, duration=1.0, keyframe=False):
+        self.text = text
+        self.duration = duration
+        self.keyframe = keyframe
+
+
+def compress(frames, max_frames):
+    """Kadrlar sonini ``max_frames`` gacha kamaytirish (kalit kadrlar qoladi)"""
+    if len(frames) <= max_frames:
+        return list(frames)
+    keyframes = sum(1 for frame in frames if frame.keyframe)
+    others = [index for index, frame in enumerate(frames) if not frame.keyframe]
+    keep = max(0, max_frames - keyframes)
+    # Oddiy kadrlardan teng oraliqda tanlash
+    chosen = {others[int(i * len(others) / keep)] for i in range(keep)} if keep else set()
+    return [frame for index, frame in enumerate(frames) if frame.keyframe or index in chosen]
+
+
+class Animator:
+    """Bitta xabarni tahrirlab o'ynaladigan animatsiyalar.
+
+    Birinchi kadr yangi xabar sifatida yuboriladi, keyingilari shu xabarni
+    tahrirlaydi - kadrlar orasidagi oraliq chat limitidan (``min_interval``)
+    kam bo'lmaydi. Animatsiya handlerdan alohida task da ishlaydi; bot band
+    bo'lsa (chiquvchi navbat uzun) yoki jadvaldan orqada qolsa, oddiy kadrlar
+    tashlab ketiladi. Bekor qilinganda oxirgi kadr darhol ko'rsatiladi.
+    """
+
+    def __init__(self, bot, outbound=None, min_interval=1.0, max_frames=30, busy_threshold=200):
+        self.bot = bot
+        self.outbound = outbound
+        self.min_interval = min_interval
+        self.max_frames = max_frames
+        self.busy_threshold = busy_threshold
+        self._tasks = {}
+
+    def busy(self):
+        return self.outbound is not None and self.outbound.pending() > self.busy_threshold
+
+    def play(self, chat_id, frames, reply_markup=None):
+        """Animatsiyani boshlash (shu chatdagi oldingisi bekor qilinadi); task qaytaradi"""
+        self.cancel(chat_id)
+        with send_priority(PRIORITY_ANIMATION):
+            task = asyncio.create_task(self._run(chat_id, compress(frames, self.max_frames), reply_markup))
+        self._tasks[chat_id] = task
+        task.add_done_callback(lambda done: self._finished(chat_id, done))
+        return task
+
+    def cancel(self, chat_id):
+        task = self._tasks.pop(chat_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+            return True
+        return False
+
+    def _finished(self, chat_id, task):
+        if self._tasks.get(chat_id) is task:
+            del self._tasks[chat_id]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error playing animation in {chat_id}: {task.exception()}")
+
+    async def _run(self, chat_id, frames, reply_markup):
+        if not frames:
+            return
+        last = len(frames) - 1
+        message = await self.bot.send_message(chat_id, frames[0].text,
+                                              reply_markup=reply_markup if last == 0 else None)
+        shown = frames[0].text
+        deadline = time.monotonic() + max(frames[0].duration, self.min_interval)
+        try:
+            for index in range(1, len(frames)):
+                frame = frames[index]
+                now = time.monotonic()
+                # Orqada qolgan yoki bot band - oddiy kadr tashlab ketiladi
+                if index != last and not frame.keyframe and (now > deadline or self.busy()):
+                    continue
+                if now < deadline:
+                    await asyncio.sleep(deadline - now)
+                if frame.text != shown:
+                    if not await self._edit(message, frame.text, reply_markup if index == last else None):
+                        return
+                    shown = frame.text
+                deadline = max(time.monotonic(), deadline) + max(frame.duration, self.min_interval)
+        except asyncio.CancelledError:
+            # Oxirgi kadr (masalan, keyingi qadam haqidagi matn) ko'rinib qolishi kerak
+            if frames[last].text != shown:
+                await self._edit(message, frames[last].text, reply_markup)
+            raise
+
+    async def _edit(self, message, text, reply_markup):
+        try:
+            await message.edit_text(text, reply_markup=reply_markup)
+            return True
+        except TelegramBadRequest as e:
+            # Bir xil matn - xatolik emas; xabar o'chirilgan bo'lsa animatsiya to'xtaydi
+            return 'not modified' in str(e)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
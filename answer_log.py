@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+
+# Qatorning o'ziga bog'liq xatoliklar - qayta urinish foyda bermaydi
+_ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError,
+               ValueError, TypeError, OverflowError)
+
+# Yagona javoblar jurnali: sessiyadagi javoblarda session_id to'ldiriladi
+ANSWER_INSERT = '''
+    INSERT INTO user_answers (user_id, question_id, session_id, selected_option, is_correct, answered_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+class AnswerLog:
+    """Javoblar jurnali uchun write-behind navbat (group commit).
+
+    Yozuvlar xotiradagi navbatga qo'shiladi va har ``flush_ms`` millisekundda
+    yoki ``max_rows`` ta yig'ilganda bitta tranzaksiyada ``executemany``
+    bilan yoziladi. Jurnal jadvallarini o'qishdan oldin flush() chaqiriladi.
+    Guruh ``max_attempts`` marta yozilmasa, qatorma-qator yoziladi va buzuq
+    qatorlar tashlab yuboriladi. Navbat ``max_pending`` dan oshsa, eng eski
+    yozuvlar tashlanadi. ``on_done(operations)`` - navbatdan chiqqan (yozilgan
+    yoki tashlangan) yozuvlar uchun.
+    """
+
+    def __init__(self, pool, flush_ms=200, max_rows=500, max_pending=100000, max_attempts=3,
+                 on_done=None):
+        self.pool = pool
+        self.on_done = on_done
+        self.flush_ms = flush_ms
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.dropped = 0
+        self._failures = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='answer-log', daemon=True)
+        self._thread.start()
+
+    def add(self, operations):
+        """(sql, params) juftliklarini navbatga qo'shish"""
+        with self._lock:
+            self._pending.extend(operations)
+            dropped = self._trim()
+            full = len(self._pending) >= self.max_rows
+        self._done(dropped)
+        if full:
+            # Yozuvchi qulfini ushlab turgan oqimda flush qilinmaydi - fon oqimi uyg'otiladi
+            self._wake.set()
+
+    def _trim(self):
+        """Navbat chegarasi (lock ostida chaqiriladi); tashlangan yozuvlarni qaytaradi"""
+        overflow = len(self._pending) - self.max_pending
+        if overflow <= 0:
+            return []
+        dropped = self._pending[:overflow]
+        del self._pending[:overflow]
+        self.dropped += overflow
+        print(f"Error: answer log queue full, {overflow} oldest rows dropped")
+        return dropped
+
+    def _done(self, operations):
+        if operations and self.on_done is not None:
+            self.on_done(operations)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Navbatdagi barcha yozuvlarni bitta tranzaksiyada yozish"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            try:
+                if self._failures >= self.max_attempts:
+                    # Bitta buzuq qator butun navbatni to'sib qo'ymasin
+                    written = self._write_rows(batch)
+                else:
+                    written = self._write_batch(batch)
+            except Exception as e:
+                self._failures += 1
+                print(f"Error flushing answer log (attempt {self._failures}): {e}")
+                with self._lock:
+                    self._pending = batch + self._pending
+                    dropped = self._trim()
+                self._done(dropped)
+                return 0
+            self._failures = 0
+            self._done(batch)
+            return written
+
+    def _write_batch(self, batch):
+        # Bir xil so'rovlarni guruhlash (tartib saqlanadi)
+        groups = {}
+        for sql, params in batch:
+            groups.setdefault(sql, []).append(params)
+        with self.pool.write() as cursor:
+            for sql, rows in groups.items():
+                cursor.executemany(sql, rows)
+        return len(batch)
+
+    def _write_rows(self, batch):
+        """Har bir yozuv alohida; qatorga bog'liq xatolikdagilar tashlanadi"""
+        written = 0
+        with self.pool.write() as cursor:
+            for sql, params in batch:
+                try:
+                    cursor.execute(sql, params)
+                    written += 1
+                except _ROW_ERRORS as e:
+                    self.dropped += 1
+                    print(f"Error: dropping answer log row {params!r}: {e}")
+        return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_ms / 1000)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Fon oqimini to'xtatib, qolgan yozuvlarni yozish"""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
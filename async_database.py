@@ -0,0 +1,50 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from database import Database
+
+
+class AsyncDatabase:
+    """Database ustidan asinxron qobiq.
+
+    Barcha SQL chaqiruvlari alohida DB oqimida bajariladi, handlerlar esa
+    ularni ``await`` qiladi - sekin commit event loop ni to'xtatib qo'ymaydi.
+    """
+
+    def __init__(self, database=None, workers=None):
+        self._db = database if database is not None else Database()
+        if workers is None:
+            # Har bir ulanish uchun bittadan oqim
+            pool = getattr(self._db, 'pool', None)
+            workers = pool.size if pool is not None else 1
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db')
+        self._methods = {}
+
+    @property
+    def sync(self):
+        """Asl (sinxron) Database obyekti"""
+        return self._db
+
+    async def run(self, func, *args, **kwargs):
+        """Ixtiyoriy funksiyani DB oqimida bajarish"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            return attr
+
+        method = self._methods.get(name)
+        if method is None:
+            @functools.wraps(attr)
+            async def method(*args, **kwargs):
+                return await self.run(attr, *args, **kwargs)
+            self._methods[name] = method
+        return method
+
+    async def close(self):
+        """Navbatdagi so'rovlarni tugatib, bazani yopish"""
+        await self.run(self._db.close)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from database import Database
+from async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# Jarayon boshlangan vaqt (main.py birinchi bo'lib shu modulni import qiladi)
+BOOT_STARTED = time.perf_counter()
+
+_database = None
+_translator = None
+_lock = threading.Lock()
+
+
+def get_database():
+    """Jarayondagi yagona AsyncDatabase (main.py va admin.py uchun umumiy)"""
+    global _database
+    if _database is None:
+        with _lock:
+            if _database is None:
+                # ANSWER_WRITE_BEHIND=1 - javoblar jurnali guruhlab yoziladi (group commit)
+                _database = AsyncDatabase(Database(
+                    write_behind=os.getenv('ANSWER_WRITE_BEHIND', '0') == '1',
+                    flush_ms=int(os.getenv('ANSWER_FLUSH_MS', '200')),
+                    flush_rows=int(os.getenv('ANSWER_FLUSH_ROWS', '500')),
+                    # QUESTION_PACK=/dev/shm/islamic_bot_questions.pack - bir hostdagi jarayonlar uchun bitta nusxa
+                    question_pack=os.getenv('QUESTION_PACK') or None,
+                ))
+    return _database
+
+
+def get_translator():
+    """googletrans faqat birinchi tarjimada import qilinadi"""
+    global _translator
+    if _translator is None:
+        with _lock:
+            if _translator is None:
+                from googletrans import Translator
+                _translator = Translator()
+    return _translator
+
+
+def on_stop_signal(callback):
+    """SIGTERM (docker stop, Render) va SIGINT kelganda callback() - ishlayotgan event loop da"""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, callback)
+        except (NotImplementedError, RuntimeError):
+            # Windows: faqat Ctrl+C (KeyboardInterrupt)
+            pass
+
+
+class StartupTimer:
+    """Ishga tushish bosqichlari vaqtini yig'ish va logga chiqarish"""
+
+    def __init__(self):
+        self.phases = []
+        self._last_mark = BOOT_STARTED
+
+    def mark(self, name):
+        """Oldingi belgidan (yoki jarayon boshidan) beri o'tgan vaqt"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    async def gather(self, **calls):
+        """Mustaqil chaqiruvlarni parallel bajarish; har biri alohida o'lchanadi"""
+        async def timed(name, coro):
+            with self.phase(name):
+                return await coro
+
+        names = list(calls)
+        results = await asyncio.gather(*(timed(name, calls[name]) for name in names),
+                                       return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Startup phase {name} failed: {result}")
+        return dict(zip(names, results))
+
+    def report(self, budget=None):
+        total = time.perf_counter() - BOOT_STARTED
+        lines = [f"  {name:<24} {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        logger.info("Startup timing (since process start: %.1f ms):\n%s", total * 1000, '\n'.join(lines))
+        if budget is not None and total > budget:
+            logger.warning(f"Startup took {total:.2f} s, budget is {budget:.2f} s")
+        return total
@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+
+
+class CacheBus:
+    """Xotiradagi keshlarni bekor qilish shinasi.
+
+    Kontent jadvallaridagi triggerlar cache_generations dagi namespace
+    generatsiyasini oshiradi. ``poll()`` avval ``PRAGMA data_version`` ni
+    tekshiradi - u faqat boshqa ulanish (shu jarayondagi yozuvchi ham,
+    boshqa jarayon ham) commit qilganda o'zgaradi, shuning uchun o'zgarish
+    bo'lmasa so'rov juda arzon. Generatsiyasi o'zgargan namespace
+    obunachilari chaqiriladi.
+    """
+
+    def __init__(self, path):
+        # data_version ulanishga bog'liq - bus o'z ulanishini ishlatadi
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA query_only=1')
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._generations = {}
+        self._data_version = None
+
+    def subscribe(self, namespace, callback):
+        """callback(generation) - namespace dagi kontent o'zgarganda"""
+        self._subscribers.setdefault(namespace, []).append(callback)
+
+    def prime(self):
+        """Joriy generatsiyalarni eslab qolish (keshlar hali bo'sh)"""
+        with self._lock:
+            self._data_version = self._read_data_version()
+            self._generations = self._read_generations()
+
+    def _read_data_version(self):
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _read_generations(self):
+        return dict(self._conn.execute('SELECT namespace, generation FROM cache_generations'))
+
+    def poll(self):
+        """O'zgargan namespace lar ro'yxati (obunachilar chaqirilgandan keyin)"""
+        # Boshqa oqim tekshirayotgan bo'lsa, kutish shart emas
+        if not self._lock.acquire(blocking=False):
+            return []
+        try:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+
+            generations = self._read_generations()
+            changed = [namespace for namespace, generation in generations.items()
+                       if self._generations.get(namespace) != generation]
+            self._generations = generations
+        finally:
+            self._lock.release()
+
+        for namespace in changed:
+            for callback in self._subscribers.get(namespace, ()):
+                try:
+                    callback(generations[namespace])
+                except Exception as e:
+                    print(f"Error invalidating {namespace} cache: {e}")
+        return changed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ContentCache:
+    """Bitta namespace uchun keshlangan so'rov natijalari (masalan, til bo'yicha).
+
+    TTL yo'q - faqat CacheBus xabar berganda tozalanadi.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        value = self._values.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            generation = self._generation
+        value = load()
+        with self._lock:
+            # Yuklash paytida bekor qilingan bo'lsa, eski natija saqlanmaydi
+            if generation == self._generation:
+                self._values[key] = value
+        return value
+
+    def clear(self, generation=None):
+        with self._lock:
+            self._generation += 1
+            self._values = {}
+
+    def __len__(self):
+        return len(self._values)
@@ -0,0 +1,58 @@
+import threading
+
+from schema_codes import SESSION_ACTIVE
+
+# Keshda "aktiv sessiya yo'q" belgisi
+NO_CHALLENGE = ()
+
+
+class ActiveChallenges:
+    """Foydalanuvchilarning aktiv 20 ta savol sessiyalari (xotirada).
+
+    Har bir foydalanuvchi uchun ``(session_id, correct_count, start_date)``
+    yoki NO_CHALLENGE. Birinchi murojaatda bazadan o'qiladi, keyin
+    sessiyani o'zgartiradigan metodlar keshni commitdan keyin yangilaydi.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, cursor_factory):
+        """Aktiv sessiya kortezi yoki None"""
+        with self._lock:
+            cached = self._cache.get(user_id)
+        if cached is None:
+            with cursor_factory() as cursor:
+                cursor.execute('''
+                    SELECT id, correct_count, start_date FROM user_20_questions
+                    WHERE user_id = ? AND status = ?
+                    ORDER BY id DESC LIMIT 1
+                ''', (user_id, SESSION_ACTIVE))
+                row = cursor.fetchone()
+            with self._lock:
+                cached = self._cache.setdefault(user_id, tuple(row) if row else NO_CHALLENGE)
+        return cached or None
+
+    def set(self, user_id, session_id, correct_count, start_date):
+        with self._lock:
+            self._cache[user_id] = (session_id, correct_count, start_date)
+
+    def close(self, user_id, session_id=None):
+        """Sessiya yakunlandi - aktiv sessiya yo'q (boshqa sessiya keshda bo'lsa tegilmaydi)"""
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if session_id is None or (cached and cached[0] == session_id):
+                self._cache[user_id] = NO_CHALLENGE
+
+    def forget(self, user_id=None):
+        """Keshdan o'chirish - keyingi murojaatda bazadan o'qiladi"""
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for value in self._cache.values() if value)
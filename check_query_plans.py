@@ -0,0 +1,194 @@
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+from database import Database
+from quiz_engine import QuizEngine
+
+# ============================================
+# SO'ROV REJALARINI TEKSHIRISH (EXPLAIN QUERY PLAN)
+# ============================================
+# Database metodlari vaqtinchalik bazada chaqiriladi, bajarilgan har bir
+# SQL ushlab olinadi va uning rejasi tekshiriladi. Katta jadvallarni
+# indekssiz to'liq o'qish (SCAN) topilsa, skript 1 kodi bilan tugaydi.
+# Xuddi shu tekshiruv tests/test_query_plans.py da ham ishlaydi.
+
+# Foydalanuvchi soni bilan o'sadigan jadvallar - bularni SCAN qilish mumkin emas
+HOT_TABLES = {
+    'user_answers',
+    'user_20_questions',
+    'user_wait_times',
+    'user_cards',
+    'user_question_bitmaps',
+    'users',
+    'rewards',
+}
+
+USER_ID = 1001
+ADMIN_ID = 1
+
+
+def sample_calls(db):
+    """Tekshiriladigan metodlar va ularning argumentlari"""
+    question = ('Savol?', 'Вопрос?', 'سؤال؟', 'Question?',
+                'A', 'А', 'أ', 'A',
+                'B', 'Б', 'ب', 'B',
+                'C', 'В', 'ج', 'C',
+                1, None, ADMIN_ID)
+    return [
+        ('add_user', (USER_ID, 'test', 'Test')),
+        ('get_user_language', (USER_ID,)),
+        ('set_user_language', (USER_ID, 'UZ')),
+        ('update_user_name', (USER_ID, 'Test')),
+        ('add_question', (question,)),
+        ('get_random_question', ('UZ',)),
+        ('get_random_question_excluding', ('UZ', [1, 2])),
+        ('add_prophet', ('Odam', 'Адам', 'آدم', 'Adam', 'file')),
+        ('get_prophet_audio', (1,)),
+        ('save_answer', (USER_ID, 1, 1, True)),
+        ('start_20_questions_session', (USER_ID,)),
+        ('get_active_session', (USER_ID,)),
+        ('save_question_answer', (USER_ID, 1, 1, 1, True)),
+        ('create_reward', (USER_ID, 1)),
+        ('get_pending_rewards', ()),
+        ('get_reward_detail', (1,)),
+        ('get_reward_user_id', (1,)),
+        ('get_user_rewards', (USER_ID,)),
+        ('save_card_info', (USER_ID, '8600000000000000', 'TEST')),
+        ('mark_reward_paid', (1, ADMIN_ID, None)),
+        ('cancel_reward', (1,)),
+        ('complete_session', (1, USER_ID, True)),
+        ('sweep_stale_challenges', (0,)),
+        ('update_user_stats', (USER_ID, True)),
+        ('get_user_info', (USER_ID,)),
+        ('get_user_first_name', (USER_ID,)),
+        ('get_user_stats', (USER_ID,)),
+        ('get_last_answers', (USER_ID, 5)),
+        ('get_answer_detail', (1,)),
+        ('get_user_answers', (USER_ID, 20)),
+        ('get_user_answers', (None, 20)),
+        ('get_allah_name_by_number', (1, 'UZ')),
+        ('get_questions_by_admin', (ADMIN_ID,)),
+        ('set_user_wait', (USER_ID, 15)),
+        ('check_user_wait', (USER_ID,)),
+        ('save_wrong_question', (USER_ID, 1)),
+        ('get_excluded_questions', (USER_ID,)),
+        ('get_random_unseen_question', (USER_ID, 'UZ')),
+        ('get_total_users', ()),
+        ('get_today_users', ()),
+        ('get_question_count', ()),
+        ('get_questions_detailed_stats', ()),
+        ('get_remaining_questions_count', (USER_ID, 'UZ')),
+    ]
+
+
+def engine_calls(db):
+    """QuizEngine javob yozish yo'llari: (nom, funksiya, argumentlar)"""
+    quiz = QuizEngine(db)
+    return [
+        ('record_answer (to\'g\'ri)', quiz.record_answer, (USER_ID, 1, 1)),
+        ('record_answer (xato)', quiz.record_answer, (USER_ID, 1, 2)),
+        ('start_20_questions_session', db.start_20_questions_session, (USER_ID,)),
+        ('record_answer (sessiyada)', quiz.record_answer, (USER_ID, 1, 1)),
+        ('record_answer (sessiyada xato)', quiz.record_answer, (USER_ID, 1, 2)),
+        ('get_random_unseen_question (sovuq)', cold_pick, (db, USER_ID + 1, 'UZ')),
+    ]
+
+
+def cold_pick(db, user_id, lang):
+    """Savol tanlash keshlarsiz - bitmap va hovuz bazadan o'qiladi"""
+    db.seen.forget(user_id)
+    db.questions.invalidate()
+    return db.get_random_unseen_question(user_id, lang)
+
+
+def all_calls(db):
+    calls = [(name, getattr(db, name), args) for name, args in sample_calls(db)]
+    return calls + engine_calls(db)
+
+
+def table_aliases(sql):
+    """SQL dagi FROM/JOIN/UPDATE jadvallari va ularning taxalluslari"""
+    names = {}
+    for table, alias in re.findall(r'(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.I):
+        names[table] = table
+        if alias and alias.upper() not in ('WHERE', 'SET', 'JOIN', 'LEFT', 'ON', 'ORDER', 'GROUP', 'LIMIT', 'VALUES'):
+            names[alias] = table
+    return names
+
+
+def full_scans(conn, sql):
+    """Rejadagi issiq jadvallar bo'yicha indekssiz SCAN qatorlari"""
+    aliases = table_aliases(sql)
+    problems = []
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'):
+        detail = row[3]
+        match = re.match(r'SCAN (\w+)', detail)
+        if not match or 'USING' in detail:
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if table in HOT_TABLES:
+            problems.append(detail)
+    return problems
+
+
+def check_plans(db_path):
+    """Barcha chaqiruvlarni bajarib, [(nom, muammolar, sql)] qaytarish"""
+    db = Database(db_path, readers=1)
+
+    statements = []
+    connections = [db.pool.writer] + db.pool._all_readers
+    for conn in connections:
+        conn.set_trace_callback(statements.append)
+
+    results = []
+    checker = sqlite3.connect(db_path)
+    try:
+        for name, func, args in all_calls(db):
+            statements.clear()
+            func(*args)
+
+            found = ([], None)
+            for sql in statements:
+                if not re.match(r'\s*(SELECT|UPDATE|DELETE)\b', sql, re.I):
+                    continue
+                problems = full_scans(checker, sql)
+                if problems:
+                    found = (problems, sql)
+                    break
+            results.append((name,) + found)
+    finally:
+        for conn in connections:
+            conn.set_trace_callback(None)
+        checker.close()
+        db.close()
+    return results
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp()
+
+    print("=" * 70)
+    print("🔍 SO'ROV REJALARINI TEKSHIRISH")
+    print("=" * 70)
+
+    failed = 0
+    for name, problems, sql in check_plans(os.path.join(tmp_dir, 'plans.db')):
+        if problems:
+            failed += 1
+            print(f"❌ {name}: {'; '.join(problems)}")
+            print(f"   {' '.join(sql.split())[:120]}")
+        else:
+            print(f"✅ {name}")
+
+    print("=" * 70)
+    if failed:
+        print(f"❌ {failed} ta metodda to'liq SCAN topildi")
+        sys.exit(1)
+    print("✅ Barcha so'rovlar indeksdan foydalanadi")
+
+
+if __name__ == '__main__':
+    main()
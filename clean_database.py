@@ -14,10 +14,11 @@ print("\n📊 Jadvallar tozalanmoqda...")
 
 # O'chirish ketma-ketligi (foreign key lar uchun)
 tables_to_clear = [
-    'user_question_sessions',
     'rewards',
     'user_cards',
     'user_20_questions',
+    'user_question_bitmaps',
+    'bot_sessions',
     'user_answers',
     'user_stats',
     'questions',
@@ -0,0 +1,96 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """SQLite ulanishlar hovuzi: bitta yozuvchi va N ta o'quvchi ulanish.
+
+    Baza WAL rejimida ishlaydi, shuning uchun o'quvchilar yozuvchini
+    kutmaydi. Har bir amal uchun yangi cursor ochiladi.
+    """
+
+    def __init__(self, path='bot_database.db', readers=4,
+                 cache_size_kib=16384, mmap_size=256 * 1024 * 1024, busy_timeout=30.0):
+        self.path = path
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+
+        self.writer = self._connect()
+        self.writer.execute('PRAGMA journal_mode=WAL')
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._write_owner = None
+
+        self._readers = queue.LifoQueue()
+        self._all_readers = []
+        for _ in range(readers):
+            conn = self._connect()
+            conn.execute('PRAGMA query_only=1')
+            self._all_readers.append(conn)
+            self._readers.put(conn)
+
+    @property
+    def size(self):
+        """Jami ulanishlar soni (yozuvchi + o'quvchilar)"""
+        return 1 + len(self._all_readers)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kib)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Yozuvchi ulanishdan cursor; blok muvaffaqiyatli tugasa commit qilinadi.
+
+        Ichma-ich chaqirilsa, faqat eng tashqi blok commit qiladi.
+        """
+        with self._write_lock:
+            cursor = self.writer.cursor()
+            self._write_depth += 1
+            self._write_owner = threading.get_ident()
+            try:
+                yield cursor
+                if self._write_depth == 1:
+                    self.writer.commit()
+            except BaseException:
+                if self._write_depth == 1:
+                    self.writer.rollback()
+                raise
+            finally:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._write_owner = None
+                cursor.close()
+
+    @contextmanager
+    def read(self):
+        """Bo'sh o'quvchi ulanishdan cursor olish"""
+        if self._write_owner == threading.get_ident():
+            # Yozish bloki ichida o'z o'zgarishlarimizni ko'rish uchun
+            cursor = self.writer.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+            return
+
+        conn = self._readers.get()
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            self._readers.put(conn)
+
+    def close(self):
+        with self._write_lock:
+            self.writer.close()
+        for conn in self._all_readers:
+            conn.close()
@@ -0,0 +1,142 @@
+import threading
+import time
+
+
+class TimingWheel:
+    """Ierarxik vaqt g'ildiragi (hashed hierarchical timing wheel).
+
+    0-daraja: 60 ta 1 soniyalik slot, 1-daraja: 60 ta 1 daqiqalik,
+    2-daraja: 24 ta 1 soatlik. Undan uzoq muddatlar ``overflow`` da
+    turadi. Har bir soniyada faqat bitta slot bo'shatiladi, yuqori darajalar
+    esa o'z vaqti kelganda pastki darajalarga tushiriladi.
+    """
+
+    LEVELS = ((1, 60), (60, 60), (3600, 24))
+
+    def __init__(self, now=None):
+        self.current = int(now if now is not None else time.time())
+        self._slots = [[set() for _ in range(count)] for _, count in self.LEVELS]
+        self._overflow = {}
+
+    def add(self, key, deadline):
+        deadline = int(deadline)
+        # O'tib ketgan muddat keyingi soniyada chiqadi
+        due = max(deadline, self.current + 1)
+        delta = due - self.current
+        for level, (size, count) in enumerate(self.LEVELS):
+            if delta < size * count:
+                self._slots[level][(due // size) % count].add((key, deadline))
+                return
+        self._overflow[(key, deadline)] = deadline
+
+    def advance(self, now=None):
+        """Vaqtni oldinga surish; muddati o'tgan (key, deadline) lar ro'yxati"""
+        now = int(now if now is not None else time.time())
+        expired = []
+        if now - self.current > self.LEVELS[-1][0] * self.LEVELS[-1][1]:
+            # Uzoq uzilishdan keyin - barcha yozuvlarni qaytadan joylash
+            pending = self._drain_all()
+            self.current = now
+            for key, deadline in pending:
+                if deadline <= now:
+                    expired.append((key, deadline))
+                else:
+                    self.add(key, deadline)
+            return expired
+
+        while self.current < now:
+            self.current += 1
+            tick = self.current
+            # Yuqori darajalarni pastga tushirish (katta darajadan boshlab)
+            for level in range(len(self.LEVELS) - 1, 0, -1):
+                size, count = self.LEVELS[level]
+                if tick % size == 0:
+                    slot = self._slots[level][(tick // size) % count]
+                    entries = list(slot)
+                    slot.clear()
+                    for key, deadline in entries:
+                        if deadline <= tick:
+                            expired.append((key, deadline))
+                        else:
+                            self.add(key, deadline)
+            if tick % self.LEVELS[-1][0] == 0 and self._overflow:
+                for entry, deadline in list(self._overflow.items()):
+                    if deadline - tick < self.LEVELS[-1][0] * self.LEVELS[-1][1]:
+                        del self._overflow[entry]
+                        self.add(*entry)
+
+            slot = self._slots[0][tick % self.LEVELS[0][1]]
+            expired.extend(slot)
+            slot.clear()
+        return expired
+
+    def _drain_all(self):
+        entries = []
+        for level in self._slots:
+            for slot in level:
+                entries.extend(slot)
+                slot.clear()
+        entries.extend(self._overflow)
+        self._overflow.clear()
+        return entries
+
+
+class CooldownRegistry:
+    """Foydalanuvchilar kutish vaqtlari (xotirada).
+
+    Tekshirish - oddiy dict qidiruvi, hech qanday I/O yo'q. Muddati o'tganlar
+    vaqt g'ildiragi orqali aniqlanib, sweep() da guruhlab o'chiriladi.
+    Bazadagi user_wait_times faqat qayta ishga tushganda tiklash uchun.
+    """
+
+    def __init__(self):
+        self._deadlines = {}
+        self._wheel = TimingWheel()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def load(self, rows):
+        """(user_id, wait_until) qatorlaridan tiklash"""
+        for user_id, wait_until in rows:
+            self.set_deadline(user_id, wait_until)
+
+    def set_deadline(self, user_id, wait_until):
+        if wait_until is None:
+            return
+        with self._lock:
+            self._deadlines[user_id] = int(wait_until)
+            self._wheel.add(user_id, wait_until)
+
+    def clear(self, user_id):
+        with self._lock:
+            self._deadlines.pop(user_id, None)
+
+    def check(self, user_id, now=None):
+        """(kutyaptimi, qolgan_daqiqa) - check_user_wait bilan bir xil shakl"""
+        deadline = self._deadlines.get(user_id)
+        if deadline is None:
+            return False, 0
+        left = deadline - int(now if now is not None else time.time())
+        if left > 0:
+            return True, left // 60
+        return False, 0
+
+    def deadlines(self):
+        with self._lock:
+            return dict(self._deadlines)
+
+    def sweep(self, now=None):
+        """Muddati o'tgan foydalanuvchilarni xotiradan olib tashlash.
+
+        Bazadan o'chirish uchun (user_id, wait_until) ro'yxatini qaytaradi.
+        """
+        removed = []
+        with self._lock:
+            for user_id, deadline in self._wheel.advance(now):
+                # Keyinroq yangilangan muddatlar o'chirilmaydi
+                if self._deadlines.get(user_id) == deadline:
+                    del self._deadlines[user_id]
+                    removed.append((user_id, deadline))
+        return removed
@@ -1,281 +1,125 @@
-import sqlite3
 from datetime import datetime
 
+from schema_codes import (LANGUAGE_CODES, SESSION_ACTIVE, SESSION_COMPLETED, SESSION_FAILED,
+                          REWARD_STATUS_CODES, REWARD_PENDING, REWARD_PAID, REWARD_CANCELLED,
+                          now_epoch, to_epoch, language_code, language_name, case_sql, time_sql)
+
+from connection_pool import ConnectionPool
+from migrations import migrate
+from question_pool import QuestionPool
+from seen_bitmaps import SeenBitmaps, ids_from_bitmap, register_bitmap_functions
+from answer_log import AnswerLog, ANSWER_INSERT
+from cooldowns import CooldownRegistry
+from challenges import ActiveChallenges
+from cache_bus import CacheBus, ContentCache
+
+# Kodlarni tashqariga matn ko'rinishida qaytarish uchun SQL ifodalar
+LANGUAGE_SQL = case_sql('u.language', LANGUAGE_CODES)
+REWARD_STATUS_SQL = case_sql('r.status', REWARD_STATUS_CODES)
+
+
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect('bot_database.db', check_same_thread=False)
-        self.cursor = self.conn.cursor()
+    def __init__(self, db_path='bot_database.db', readers=4,
+                 write_behind=False, flush_ms=200, flush_rows=500, question_pack=None):
+        # Bitta yozuvchi + bir nechta o'quvchi ulanish (WAL rejimi)
+        self.pool = ConnectionPool(db_path, readers=readers)
+        register_bitmap_functions(self.pool.writer)
+        # question_pack - jarayonlar uchun umumiy savollar fayli (masalan /dev/shm/...)
+        self.questions = QuestionPool(pack_path=question_pack)
+        self.seen = SeenBitmaps()
+        self.cooldowns = CooldownRegistry()
+        self.challenges = ActiveChallenges()
+        self.allah_names = ContentCache()
+        self.prophets = ContentCache()
         self.create_tables()
-    
-    def create_tables(self):
-        # Users table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                language TEXT DEFAULT 'UZ',
-                registered_at TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # Questions table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                question_uz TEXT,
-                question_ru TEXT,
-                question_ar TEXT,
-                question_en TEXT,
-                option1_uz TEXT,
-                option1_ru TEXT,
-                option1_ar TEXT,
-                option1_en TEXT,
-                option2_uz TEXT,
-                option2_ru TEXT,
-                option2_ar TEXT,
-                option2_en TEXT,
-                option3_uz TEXT,
-                option3_ru TEXT,
-                option3_ar TEXT,
-                option3_en TEXT,
-                correct_option INTEGER CHECK(correct_option IN (1,2,3)),
-                created_at TIMESTAMP,
-                created_by INTEGER,
-                is_active BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # Prophets stories table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS prophets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name_uz TEXT,
-                name_ru TEXT,
-                name_ar TEXT,
-                name_en TEXT,
-                audio_file_id TEXT,
-                created_at TIMESTAMP
-            )
-        ''')
-        
-        # User answers tracking
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_answers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                question_id INTEGER,
-                selected_option INTEGER,
-                is_correct BOOLEAN,
-                answered_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (question_id) REFERENCES questions(id)
-            )
-        ''')
-        
-        # Allohning 99 ismi jadvali
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS allah_names (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                number INTEGER UNIQUE,
-                name_uz TEXT,
-                name_ru TEXT,
-                name_ar TEXT,
-                name_en TEXT,
-                description_uz TEXT,
-                description_ru TEXT,
-                description_ar TEXT,
-                description_en TEXT,
-                created_at TIMESTAMP
-            )
-        ''')
-        
-        # Foydalanuvchi statistikasi
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_stats (
-                user_id INTEGER PRIMARY KEY,
-                correct_count INTEGER DEFAULT 0,
-                wrong_count INTEGER DEFAULT 0,
-                total_questions INTEGER DEFAULT 0,
-                current_streak INTEGER DEFAULT 0,
-                best_streak INTEGER DEFAULT 0,
-                last_question_date DATE,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        # 20 ta savol rekordi
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_20_questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                start_date TIMESTAMP,
-                end_date TIMESTAMP,
-                correct_count INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'active',
-                reward_paid BOOLEAN DEFAULT 0,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        # Foydalanuvchi savollari (20 talik uchun)
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_question_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                session_id INTEGER,
-                question_id INTEGER,
-                selected_option INTEGER,
-                is_correct BOOLEAN,
-                answered_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (question_id) REFERENCES questions(id)
-            )
-        ''')
-        
-        # Karta raqamlari
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_cards (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE,
-                card_number TEXT,
-                card_name TEXT,
-                submitted_at TIMESTAMP,
-                verified BOOLEAN DEFAULT 0,
-                verified_by INTEGER,
-                verified_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        # Mukofotlar
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rewards (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                session_id INTEGER,
-                amount INTEGER DEFAULT 200000,
-                status TEXT DEFAULT 'pending',
-                paid_by INTEGER,
-                paid_at TIMESTAMP,
-                check_photo_id TEXT,
-                created_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-          # User wait time jadvali
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_wait_times (
-                user_id INTEGER PRIMARY KEY,
-                wait_until TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        # Foydalanuvchi kutish vaqtlari jadvali
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_wait_times (
-                user_id INTEGER PRIMARY KEY,
-                wait_until TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-
-        # Noto'g'ri javob berilgan savollar jadvali
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_wrong_questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                question_id INTEGER,
-                answered_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (question_id) REFERENCES questions(id)
-            )
-        ''')
-        
-        self.conn.commit()
-        print("✅ Database tables created successfully")
-        
-    def set_user_wait(self, user_id, minutes=30):
-        """Foydalanuvchi uchun kutish vaqti o'rnatish"""
-        try:
-            from datetime import datetime, timedelta
-            wait_until = datetime.now() + timedelta(minutes=minutes)
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO user_wait_times (user_id, wait_until)
-                VALUES (?, ?)
-            ''', (user_id, wait_until))
-            self.conn.commit()
-            return True
+        self.load_user_waits()
+        # Kontent boshqa ulanish/jarayondan o'zgarsa, faqat o'sha kesh yangilanadi
+        self.cache_bus = CacheBus(db_path)
+        self.cache_bus.subscribe('questions', self._on_questions_changed)
+        self.cache_bus.subscribe('allah_names', self.allah_names.clear)
+        self.cache_bus.subscribe('prophets', self.prophets.clear)
+        self.cache_bus.prime()
+        # Javoblar jurnali uchun ixtiyoriy write-behind navbat
+        self.answer_log = (AnswerLog(self.pool, flush_ms, flush_rows, on_done=self.seen.flushed)
+                           if write_behind else None)
+
+    def write_log(self, operations, cursor=None):
+        """Jurnal yozuvlarini navbatga qo'shish yoki darhol yozish"""
+        if self.answer_log is not None:
+            # Keshdan chiqarilgan foydalanuvchi qayta o'qilganda navbatdagi bitlar yo'qolmasin
+            self.seen.queued(operations)
+            self.answer_log.add(operations)
+        elif cursor is not None:
+            for sql, params in operations:
+                cursor.execute(sql, params)
+        else:
+            with self.pool.write() as cursor:
+                for sql, params in operations:
+                    cursor.execute(sql, params)
+
+    def flush_answers(self):
+        """Navbatdagi javoblarni bazaga yozish"""
+        if self.answer_log is not None:
+            return self.answer_log.flush()
+        return 0
+
+    def _on_questions_changed(self, generation):
+        if self.questions.loaded:
+            self.reload_questions()
+
+    def poll_cache_changes(self):
+        """Kontent jadvallari o'zgarganini tekshirish; o'zgargan namespace lar"""
+        try:
+            return self.cache_bus.poll()
         except Exception as e:
-            print(f"Error setting wait time: {e}")
-            return False
+            print(f"Error polling cache bus: {e}")
+            return []
+
+    def create_tables(self):
+        """Sxemani migratsiyalar orqali joriy versiyaga keltirish"""
+        with self.pool.write() as cursor:
+            version = migrate(cursor)
+        print(f"✅ Database tables created successfully (schema v{version})")
 
-    def check_user_wait(self, user_id):
-        """Foydalanuvchi kutish vaqtida yoki yo'qligini tekshirish"""
-        try:
-            from datetime import datetime
-            self.cursor.execute('''
-                SELECT wait_until FROM user_wait_times WHERE user_id = ?
-            ''', (user_id,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                wait_until = datetime.fromisoformat(result[0])
-                if datetime.now() < wait_until:
-                    # Hali kutish vaqti
-                    remaining = (wait_until - datetime.now()).seconds // 60
-                    return True, remaining
-                else:
-                    # Kutish vaqti tugagan
-                    self.cursor.execute('DELETE FROM user_wait_times WHERE user_id = ?', (user_id,))
-                    self.conn.commit()
-                    return False, 0
-            return False, 0
-        except Exception as e:
-            print(f"Error checking wait time: {e}")
-            return False, 0    
-    
     # User methods
     def add_user(self, user_id, username, first_name):
         try:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO users (user_id, username, first_name, registered_at)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, username, first_name, datetime.now()))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO users (user_id, username, first_name, registered_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (user_id, username, first_name, now_epoch()))
+                return cursor.rowcount > 0
         except Exception as e:
             print(f"Error adding user: {e}")
             return False
-    
+
     def get_user_language(self, user_id):
         try:
-            self.cursor.execute('SELECT language FROM users WHERE user_id = ?', (user_id,))
-            result = self.cursor.fetchone()
-            return result[0] if result else 'UZ'
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT language FROM users WHERE user_id = ?', (user_id,))
+                result = cursor.fetchone()
+            return language_name(result[0]) if result else 'UZ'
         except Exception as e:
             print(f"Error getting user language: {e}")
             return 'UZ'
-    
+
     def set_user_language(self, user_id, language):
         try:
-            self.cursor.execute('UPDATE users SET language = ? WHERE user_id = ?', (language, user_id))
-            self.conn.commit()
+            with self.pool.write() as cursor:
+                cursor.execute('UPDATE users SET language = ? WHERE user_id = ?', (language_code(language), user_id))
         except Exception as e:
             print(f"Error setting user language: {e}")
-    
+
     def update_user_name(self, user_id, name):
         try:
-            self.cursor.execute('''
-                UPDATE users SET first_name = ? WHERE user_id = ?
-            ''', (name, user_id))
-            self.conn.commit()
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    UPDATE users SET first_name = ? WHERE user_id = ?
+                ''', (name, user_id))
         except Exception as e:
             print(f"Error updating user name: {e}")
-    
+
     # Questions methods
     def add_question(self, question_data):
         try:
@@ -288,452 +132,629 @@ class Database:
                     correct_option, created_at, created_by
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             '''
-            self.cursor.execute(query, question_data)
-            self.conn.commit()
-            question_id = self.cursor.lastrowid
-            self.cursor.execute('UPDATE questions SET is_active = 1 WHERE id = ?', (question_id,))
-            self.conn.commit()
+            # created_at (18-maydon) epoch ko'rinishida saqlanadi
+            question_data = list(question_data)
+            question_data[17] = to_epoch(question_data[17])
+            with self.pool.write() as cursor:
+                cursor.execute(query, question_data)
+                question_id = cursor.lastrowid
+                cursor.execute('UPDATE questions SET is_active = 1 WHERE id = ?', (question_id,))
+            # Hovuz darhol yangilanadi (generatsiya ham eslab qolinadi)
+            self.poll_cache_changes()
             return question_id
         except Exception as e:
             print(f"Error adding question: {e}")
             return None
-    
+
     def get_random_question(self, lang='UZ'):
         try:
             if lang not in ['UZ', 'RU', 'AR', 'EN']:
                 lang = 'UZ'
-            
-            query = f'''
-                SELECT id, question_{lang}, option1_{lang}, option2_{lang}, option3_{lang}, correct_option 
-                FROM questions 
-                WHERE is_active = 1 
-                ORDER BY RANDOM() 
-                LIMIT 1
-            '''
-            self.cursor.execute(query)
-            return self.cursor.fetchone()
+            self.questions.ensure_loaded(self.pool.read)
+            return self.questions.random_question(lang)
         except Exception as e:
             print(f"Error getting random question: {e}")
             return None
-    
+
     def get_random_question_excluding(self, lang='UZ', excluded_ids=None):
         try:
-            if excluded_ids is None:
-                excluded_ids = []
-            
             if lang not in ['UZ', 'RU', 'AR', 'EN']:
                 lang = 'UZ'
-            
-            print(f"🔍 get_random_question_excluding: lang={lang}, excluded_ids={excluded_ids}")
-            
-            if excluded_ids and len(excluded_ids) > 0:
-                placeholders = ','.join(['?'] * len(excluded_ids))
-                query = f'''
-                    SELECT id, question_{lang}, option1_{lang}, option2_{lang}, option3_{lang}, correct_option 
-                    FROM questions 
-                    WHERE is_active = 1 
-                      AND question_{lang} IS NOT NULL 
-                      AND question_{lang} != ''
-                      AND id NOT IN ({placeholders})
-                    ORDER BY RANDOM() 
-                    LIMIT 1
-                '''
-                self.cursor.execute(query, excluded_ids)
-            else:
-                query = f'''
-                    SELECT id, question_{lang}, option1_{lang}, option2_{lang}, option3_{lang}, correct_option 
-                    FROM questions 
-                    WHERE is_active = 1 
-                      AND question_{lang} IS NOT NULL 
-                      AND question_{lang} != ''
-                    ORDER BY RANDOM() 
-                    LIMIT 1
-                '''
-                self.cursor.execute(query)
-            
-            result = self.cursor.fetchone()
-            
-            if result:
-                print(f"✅ Topildi: ID={result[0]}, savol={result[1][:30]}...")
-            else:
-                print(f"❌ {lang} tilida savol topilmadi, UZ ga o'tiladi")
-                # Agar tanlangan tilda savol bo'lmasa, o'zbekchasini olish
-                if lang != 'UZ':
-                    return self.get_random_question_excluding('UZ', excluded_ids)
-            
+
+            self.questions.ensure_loaded(self.pool.read)
+            excluded = set(excluded_ids) if excluded_ids else None
+            # Tanlangan tilda savol bo'lmasa, hovuz o'zi UZ dan oladi
+            result = self.questions.random_question(lang, excluded)
+
+            if not result:
+                print(f"❌ {lang} tilida yangi savol topilmadi")
             return result
-            
+
         except Exception as e:
             print(f"❌ Error getting random question excluding: {e}")
             return None
-    
+
+    def get_pooled_question(self, question_id, lang='UZ'):
+        """Hovuzdan id bo'yicha savol (I/O siz, faqat birinchi marta yuklanadi)"""
+        try:
+            self.questions.ensure_loaded(self.pool.read)
+            return self.questions.get(question_id, lang)
+        except Exception as e:
+            print(f"Error getting pooled question: {e}")
+            return None
+
+    def reload_questions(self):
+        """Savollar hovuzini bazadan qayta yuklash"""
+        try:
+            with self.pool.read() as cursor:
+                return self.questions.load(cursor)
+        except Exception as e:
+            print(f"Error reloading questions: {e}")
+            self.questions.invalidate()
+            return 0
+
     def get_all_questions(self):
         try:
-            self.cursor.execute('SELECT id, question_uz, is_active FROM questions')
-            return self.cursor.fetchall()
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT id, question_uz, is_active FROM questions')
+                return cursor.fetchall()
         except Exception as e:
             print(f"Error getting all questions: {e}")
             return []
-    
+
+    def get_questions_for_export(self):
+        """CSV eksport uchun barcha savollar"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT id, question_uz, question_ru, question_ar, question_en,
+                           correct_option, {time_sql('created_at')}, is_active
+                    FROM questions
+                    ORDER BY id DESC
+                ''')
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting questions for export: {e}")
+            return []
+
     # Prophet methods
     def add_prophet(self, name_uz, name_ru, name_ar, name_en, audio_file_id):
         try:
-            self.cursor.execute('''
-                INSERT INTO prophets (name_uz, name_ru, name_ar, name_en, audio_file_id, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (name_uz, name_ru, name_ar, name_en, audio_file_id, datetime.now()))
-            self.conn.commit()
-            return self.cursor.lastrowid
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    INSERT INTO prophets (name_uz, name_ru, name_ar, name_en, audio_file_id, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (name_uz, name_ru, name_ar, name_en, audio_file_id, now_epoch()))
+                prophet_id = cursor.lastrowid
+            self.poll_cache_changes()
+            return prophet_id
         except Exception as e:
             print(f"Error adding prophet: {e}")
             return None
-    
+
     def get_prophets(self, lang='UZ'):
         try:
             if lang not in ['UZ', 'RU', 'AR', 'EN']:
                 lang = 'UZ'
-            self.cursor.execute(f'SELECT id, name_{lang}, audio_file_id FROM prophets')
-            return self.cursor.fetchall()
+            return self.prophets.get(lang, lambda: self._load_prophets(lang))
         except Exception as e:
             print(f"Error getting prophets: {e}")
             return []
-    
+
+    def _load_prophets(self, lang):
+        with self.pool.read() as cursor:
+            cursor.execute(f'SELECT id, name_{lang}, audio_file_id FROM prophets')
+            return cursor.fetchall()
+
+    def get_prophets_count(self):
+        """Payg'ambarlar soni"""
+        try:
+            return self.get_counters(['prophets_total'])['prophets_total']
+        except Exception as e:
+            print(f"Error getting prophets count: {e}")
+            return 0
+
     def get_prophet_audio(self, prophet_id):
         try:
-            self.cursor.execute('SELECT audio_file_id FROM prophets WHERE id = ?', (prophet_id,))
-            result = self.cursor.fetchone()
-            return result[0] if result else None
+            audio = self.prophets.get('audio', lambda: {
+                prophet_id: audio_file_id for prophet_id, _, audio_file_id in self._load_prophets('UZ')
+            })
+            return audio.get(prophet_id)
         except Exception as e:
             print(f"Error getting prophet audio: {e}")
             return None
-    
+
     # Answer tracking
-    def save_answer(self, user_id, question_id, selected_option, is_correct):
+    def save_answer(self, user_id, question_id, selected_option, is_correct, session_id=None):
         try:
-            self.cursor.execute('''
-                INSERT INTO user_answers (user_id, question_id, selected_option, is_correct, answered_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, question_id, selected_option, is_correct, datetime.now()))
-            self.conn.commit()
+            self.write_log([
+                (ANSWER_INSERT, (user_id, question_id, session_id, selected_option, is_correct, now_epoch())),
+                self.seen.mark(user_id, question_id, self.pool.read),
+            ])
+            self.seen.apply(user_id, question_id)
         except Exception as e:
             print(f"Error saving answer: {e}")
-    
+
     # Statistics
+    def get_counters(self, names):
+        """stats_counters dan bir nechta hisoblagich (yo'qlari 0)"""
+        counters = dict.fromkeys(names, 0)
+        placeholders = ','.join(['?'] * len(names))
+        with self.pool.read() as cursor:
+            cursor.execute(f'''
+                SELECT name, value FROM stats_counters WHERE name IN ({placeholders})
+            ''', list(names))
+            counters.update(cursor.fetchall())
+        return counters
+
     def get_total_users(self):
         try:
-            self.cursor.execute('SELECT COUNT(*) FROM users')
-            return self.cursor.fetchone()[0]
+            return self.get_counters(['users_total'])['users_total']
         except Exception as e:
             print(f"Error getting total users: {e}")
             return 0
-    
+
     def get_today_users(self):
         try:
-            self.cursor.execute('''
-                SELECT COUNT(*) FROM users 
-                WHERE date(registered_at) = date('now')
-            ''')
-            return self.cursor.fetchone()[0]
+            name = f"users_day:{datetime.now().strftime('%Y-%m-%d')}"
+            return self.get_counters([name])[name]
         except Exception as e:
             print(f"Error getting today users: {e}")
             return 0
-    
+
+    def get_question_count(self):
+        """Jami savollar soni"""
+        try:
+            return self.get_counters(['questions_total'])['questions_total']
+        except Exception as e:
+            print(f"Error getting question count: {e}")
+            return 0
+
     def get_questions_stats(self):
         stats = {'UZ': 0, 'RU': 0, 'AR': 0, 'EN': 0}
         try:
-            for lang in ['UZ', 'RU', 'AR', 'EN']:
-                self.cursor.execute(f'SELECT COUNT(*) FROM questions WHERE question_{lang} IS NOT NULL AND is_active = 1')
-                stats[lang] = self.cursor.fetchone()[0]
+            counters = self.get_counters([f'questions_active_{lang}' for lang in stats])
+            for lang in stats:
+                stats[lang] = counters[f'questions_active_{lang}']
             return stats
         except Exception as e:
             print(f"Error getting questions stats: {e}")
             return stats
-    
+
     # ============================================
     # 20 TA SAVOL SESSIYASI UCHUN METODLAR
     # ============================================
-    
+
     def start_20_questions_session(self, user_id):
         """20 ta savol uchun yangi sessiya boshlash"""
         try:
-            self.cursor.execute('''
-                SELECT id FROM user_20_questions 
-                WHERE user_id = ? AND status = 'active'
-            ''', (user_id,))
-            
-            if self.cursor.fetchone():
+            if self.challenges.get(user_id, self.pool.read):
                 return None
-            
-            self.cursor.execute('''
-                INSERT INTO user_20_questions (user_id, start_date, correct_count, status)
-                VALUES (?, ?, 0, 'active')
-            ''', (user_id, datetime.now()))
-            self.conn.commit()
-            return self.cursor.lastrowid
+
+            start_date = now_epoch()
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    INSERT INTO user_20_questions (user_id, start_date, correct_count, status)
+                    VALUES (?, ?, 0, ?)
+                ''', (user_id, start_date, SESSION_ACTIVE))
+                session_id = cursor.lastrowid
+            self.challenges.set(user_id, session_id, 0, start_date)
+            return session_id
         except Exception as e:
             print(f"Error starting session: {e}")
             return None
-    
+
     def get_active_session(self, user_id):
-        """Foydalanuvchining aktiv sessiyasini olish"""
-        try:
-            self.cursor.execute('''
-                SELECT id, correct_count FROM user_20_questions 
-                WHERE user_id = ? AND status = 'active'
-            ''', (user_id,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                print(f"✅ Aktiv sessiya topildi: ID={result[0]}, correct={result[1]}")
-                return result
-            else:
-                print(f"ℹ️ Aktiv sessiya yo'q (user_id={user_id})")
-                return None
+        """Foydalanuvchining aktiv sessiyasi: (id, correct_count) yoki None (xotiradan)"""
+        try:
+            active = self.challenges.get(user_id, self.pool.read)
+            return active[:2] if active else None
         except Exception as e:
             print(f"Error getting active session: {e}")
             return None
-    
+
     def save_question_answer(self, user_id, session_id, question_id, selected_option, is_correct):
-        """Savol javobini saqlash"""
-        try:
-            self.cursor.execute('''
-                INSERT INTO user_question_sessions 
-                (user_id, session_id, question_id, selected_option, is_correct, answered_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, session_id, question_id, selected_option, is_correct, datetime.now()))
-            
+        """Sessiyadagi savol javobini saqlash (javoblar jurnaliga session_id bilan)"""
+        try:
+            self.write_log([
+                (ANSWER_INSERT, (user_id, question_id, session_id, selected_option, is_correct, now_epoch())),
+                self.seen.mark(user_id, question_id, self.pool.read),
+            ])
+            self.seen.apply(user_id, question_id)
+
+            # Sessiya hisobi darhol yoziladi va keshga ham tushadi
             if is_correct:
-                self.cursor.execute('''
-                    UPDATE user_20_questions 
-                    SET correct_count = correct_count + 1 
-                    WHERE id = ? AND user_id = ?
-                ''', (session_id, user_id))
-            
-            self.conn.commit()
+                with self.pool.write() as cursor:
+                    cursor.execute('''
+                        UPDATE user_20_questions
+                        SET correct_count = correct_count + 1
+                        WHERE id = ? AND user_id = ? AND status = ?
+                        RETURNING correct_count, start_date
+                    ''', (session_id, user_id, SESSION_ACTIVE))
+                    row = cursor.fetchone()
+                if row:
+                    self.challenges.set(user_id, session_id, row[0], row[1])
             return True
         except Exception as e:
             print(f"Error saving answer: {e}")
+            self.challenges.forget(user_id)
             return False
-    
+
     def complete_session(self, session_id, user_id, success=True):
         """Sessiyani yakunlash"""
         try:
-            status = 'completed' if success else 'failed'
-            self.cursor.execute('''
-                UPDATE user_20_questions 
-                SET status = ?, end_date = ? 
-                WHERE id = ? AND user_id = ?
-            ''', (status, datetime.now(), session_id, user_id))
-            self.conn.commit()
+            status = SESSION_COMPLETED if success else SESSION_FAILED
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    UPDATE user_20_questions
+                    SET status = ?, end_date = ?
+                    WHERE id = ? AND user_id = ?
+                ''', (status, now_epoch(), session_id, user_id))
+            self.challenges.close(user_id, session_id)
             return True
         except Exception as e:
             print(f"Error completing session: {e}")
+            self.challenges.forget(user_id)
             return False
-    
+
+    def sweep_stale_challenges(self, max_age_seconds=24 * 3600):
+        """Uzoq vaqt yakunlanmagan aktiv sessiyalarni bitta UPDATE bilan yopish"""
+        try:
+            now = now_epoch()
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    UPDATE user_20_questions
+                    SET status = ?, end_date = ?
+                    WHERE status = ? AND start_date < ?
+                    RETURNING user_id, id
+                ''', (SESSION_FAILED, now, SESSION_ACTIVE, now - max_age_seconds))
+                closed = cursor.fetchall()
+            for user_id, session_id in closed:
+                self.challenges.close(user_id, session_id)
+            return len(closed)
+        except Exception as e:
+            print(f"Error sweeping stale sessions: {e}")
+            return 0
+
     def create_reward(self, user_id, session_id):
         """Mukofot yaratish"""
         try:
-            self.cursor.execute('''
-                INSERT INTO rewards (user_id, session_id, amount, status, created_at)
-                VALUES (?, ?, 200000, 'pending', ?)
-            ''', (user_id, session_id, datetime.now()))
-            self.conn.commit()
-            return self.cursor.lastrowid
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    INSERT INTO rewards (user_id, session_id, amount, status, created_at)
+                    VALUES (?, ?, 200000, ?, ?)
+                ''', (user_id, session_id, REWARD_PENDING, now_epoch()))
+                return cursor.lastrowid
         except Exception as e:
             print(f"Error creating reward: {e}")
             return None
-    
+
     def save_card_info(self, user_id, card_number, card_name):
         """Karta ma'lumotlarini saqlash"""
         try:
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO user_cards (user_id, card_number, card_name, submitted_at)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, card_number, card_name, datetime.now()))
-            self.conn.commit()
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO user_cards (user_id, card_number, card_name, submitted_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (user_id, card_number, card_name, now_epoch()))
             return True
         except Exception as e:
             print(f"Error saving card info: {e}")
             return False
-    
+
     def mark_reward_paid(self, reward_id, admin_id, check_photo_id=None):
         """Mukofotni to'langan deb belgilash"""
         try:
-            self.cursor.execute('''
-                UPDATE rewards 
-                SET status = 'paid', paid_by = ?, paid_at = ?, check_photo_id = ?
-                WHERE id = ?
-            ''', (admin_id, datetime.now(), check_photo_id, reward_id))
-            self.conn.commit()
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    UPDATE rewards
+                    SET status = ?, paid_by = ?, paid_at = ?, check_photo_id = ?
+                    WHERE id = ?
+                ''', (REWARD_PAID, admin_id, now_epoch(), check_photo_id, reward_id))
             return True
         except Exception as e:
             print(f"Error marking reward paid: {e}")
             return False
-    
+
     def get_pending_rewards(self):
         """Kutilayotgan mukofotlarni olish"""
         try:
-            self.cursor.execute('''
-                SELECT r.id, r.user_id, u.first_name, u.username, r.amount, r.created_at
-                FROM rewards r
-                JOIN users u ON r.user_id = u.user_id
-                WHERE r.status = 'pending'
-                ORDER BY r.created_at DESC
-            ''')
-            return self.cursor.fetchall()
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT r.id, r.user_id, u.first_name, u.username, r.amount, {time_sql('r.created_at')}
+                    FROM rewards r
+                    JOIN users u ON r.user_id = u.user_id
+                    WHERE r.status = {REWARD_PENDING}
+                    ORDER BY r.created_at DESC
+                ''')
+                return cursor.fetchall()
         except Exception as e:
             print(f"Error getting pending rewards: {e}")
             return []
-    
+
+    def get_reward_detail(self, reward_id):
+        """Mukofot haqida batafsil (karta ma'lumotlari bilan)"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT r.id, r.user_id, r.session_id, r.amount, {REWARD_STATUS_SQL}, r.paid_by,
+                           {time_sql('r.paid_at')},
+                           r.check_photo_id, u.first_name, u.username, u.user_id, uc.card_number, uc.card_name
+                    FROM rewards r
+                    JOIN users u ON r.user_id = u.user_id
+                    LEFT JOIN user_cards uc ON r.user_id = uc.user_id
+                    WHERE r.id = ?
+                ''', (reward_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            print(f"Error getting reward detail: {e}")
+            return None
+
+    def get_reward_user_id(self, reward_id):
+        """Mukofot egasining ID sini olish"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT user_id FROM rewards WHERE id = ?', (reward_id,))
+                result = cursor.fetchone()
+            return result[0] if result else None
+        except Exception as e:
+            print(f"Error getting reward user: {e}")
+            return None
+
+    def get_user_rewards(self, user_id):
+        """Foydalanuvchining barcha mukofotlari"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT id, amount, {case_sql('status', REWARD_STATUS_CODES)}, {time_sql('paid_at')}
+                    FROM rewards WHERE user_id = ? ORDER BY id DESC
+                ''', (user_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting user rewards: {e}")
+            return []
+
+    def cancel_reward(self, reward_id):
+        """Mukofotni bekor qilish"""
+        try:
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    UPDATE rewards SET status = ? WHERE id = ?
+                ''', (REWARD_CANCELLED, reward_id))
+            return True
+        except Exception as e:
+            print(f"Error cancelling reward: {e}")
+            return False
+
     def update_user_stats(self, user_id, is_correct):
         """Foydalanuvchi statistikasini yangilash"""
         try:
-            self.cursor.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,))
-            if not self.cursor.fetchone():
-                self.cursor.execute('''
-                    INSERT INTO user_stats (user_id, correct_count, wrong_count, total_questions)
-                    VALUES (?, 0, 0, 0)
-                ''', (user_id,))
-            
-            if is_correct:
-                self.cursor.execute('''
-                    UPDATE user_stats 
-                    SET correct_count = correct_count + 1,
-                        total_questions = total_questions + 1,
-                        current_streak = current_streak + 1,
-                        best_streak = MAX(best_streak, current_streak + 1)
-                    WHERE user_id = ?
-                ''', (user_id,))
-            else:
-                self.cursor.execute('''
-                    UPDATE user_stats 
-                    SET wrong_count = wrong_count + 1,
-                        total_questions = total_questions + 1,
-                        current_streak = 0
-                    WHERE user_id = ?
-                ''', (user_id,))
-            
-            self.conn.commit()
+            with self.pool.write() as cursor:
+                cursor.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,))
+                if not cursor.fetchone():
+                    cursor.execute('''
+                        INSERT INTO user_stats (user_id, correct_count, wrong_count, total_questions)
+                        VALUES (?, 0, 0, 0)
+                    ''', (user_id,))
+
+                if is_correct:
+                    cursor.execute('''
+                        UPDATE user_stats
+                        SET correct_count = correct_count + 1,
+                            total_questions = total_questions + 1,
+                            current_streak = current_streak + 1,
+                            best_streak = MAX(best_streak, current_streak + 1)
+                        WHERE user_id = ?
+                    ''', (user_id,))
+                else:
+                    cursor.execute('''
+                        UPDATE user_stats
+                        SET wrong_count = wrong_count + 1,
+                            total_questions = total_questions + 1,
+                            current_streak = 0
+                        WHERE user_id = ?
+                    ''', (user_id,))
             return True
         except Exception as e:
             print(f"Error updating user stats: {e}")
             return False
-    
+
     def get_all_users_stats(self):
         """Barcha foydalanuvchilar statistikasini olish"""
         try:
-            self.cursor.execute('''
-                SELECT u.user_id, u.first_name, u.username, u.language,
-                       COALESCE(us.correct_count, 0) as correct,
-                       COALESCE(us.wrong_count, 0) as wrong,
-                       COALESCE(us.total_questions, 0) as total,
-                       COALESCE(us.best_streak, 0) as best_streak
-                FROM users u
-                LEFT JOIN user_stats us ON u.user_id = us.user_id
-                ORDER BY us.correct_count DESC
-            ''')
-            return self.cursor.fetchall()
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT u.user_id, u.first_name, u.username, {LANGUAGE_SQL},
+                           COALESCE(us.correct_count, 0) as correct,
+                           COALESCE(us.wrong_count, 0) as wrong,
+                           COALESCE(us.total_questions, 0) as total,
+                           COALESCE(us.best_streak, 0) as best_streak
+                    FROM users u
+                    LEFT JOIN user_stats us ON u.user_id = us.user_id
+                    ORDER BY us.correct_count DESC
+                ''')
+                return cursor.fetchall()
         except Exception as e:
             print(f"Error getting users stats: {e}")
             return []
-    
-    def get_user_answers(self, user_id=None, limit=100):
-        """Foydalanuvchi javoblarini olish"""
+
+    def get_user_info(self, user_id):
+        """Foydalanuvchi ma'lumotlarini olish (admin uchun)"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT u.first_name, u.username, {LANGUAGE_SQL}, {time_sql('u.registered_at')}
+                    FROM users u WHERE u.user_id = ?
+                ''', (user_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            print(f"Error getting user info: {e}")
+            return None
+
+    def get_user_first_name(self, user_id):
+        """Foydalanuvchi ismini olish"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT first_name FROM users WHERE user_id = ?', (user_id,))
+                result = cursor.fetchone()
+            return result[0] if result else None
+        except Exception as e:
+            print(f"Error getting user first name: {e}")
+            return None
+
+    def get_user_stats(self, user_id):
+        """Bitta foydalanuvchi statistikasini olish"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('''
+                    SELECT correct_count, wrong_count, total_questions, best_streak
+                    FROM user_stats WHERE user_id = ?
+                ''', (user_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            print(f"Error getting user stats: {e}")
+            return None
+
+    def get_last_answers(self, user_id, limit=5):
+        """Foydalanuvchining oxirgi javoblari (savol matni bilan)"""
+        self.flush_answers()
         try:
-            if user_id:
-                self.cursor.execute('''
-                    SELECT ua.*, u.first_name, u.username, q.question_uz
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT q.question_uz, ua.selected_option, ua.is_correct, {time_sql('ua.answered_at')}
                     FROM user_answers ua
-                    JOIN users u ON ua.user_id = u.user_id
                     JOIN questions q ON ua.question_id = q.id
                     WHERE ua.user_id = ?
-                    ORDER BY ua.answered_at DESC
-                    LIMIT ?
+                    ORDER BY ua.answered_at DESC LIMIT ?
                 ''', (user_id, limit))
-            else:
-                self.cursor.execute('''
-                    SELECT ua.*, u.first_name, u.username, q.question_uz
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting last answers: {e}")
+            return []
+
+    def get_answer_detail(self, answer_id):
+        """Bitta javob haqida batafsil ma'lumot"""
+        self.flush_answers()
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT ua.id, ua.user_id, ua.question_id, ua.selected_option, ua.is_correct,
+                           {time_sql('ua.answered_at')},
+                           u.first_name, u.username, u.user_id, q.question_uz, q.correct_option,
+                           q.option1_uz, q.option2_uz, q.option3_uz
                     FROM user_answers ua
                     JOIN users u ON ua.user_id = u.user_id
                     JOIN questions q ON ua.question_id = q.id
-                    ORDER BY ua.answered_at DESC
-                    LIMIT ?
-                ''', (limit,))
-            return self.cursor.fetchall()
+                    WHERE ua.id = ?
+                ''', (answer_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            print(f"Error getting answer detail: {e}")
+            return None
+
+    def get_user_answers(self, user_id=None, limit=100):
+        """Foydalanuvchi javoblarini olish"""
+        self.flush_answers()
+        try:
+            with self.pool.read() as cursor:
+                if user_id:
+                    cursor.execute(f'''
+                        SELECT ua.id, ua.user_id, ua.question_id, ua.selected_option, ua.is_correct,
+                               {time_sql('ua.answered_at')},
+                               u.first_name, u.username, q.question_uz
+                        FROM user_answers ua
+                        JOIN users u ON ua.user_id = u.user_id
+                        JOIN questions q ON ua.question_id = q.id
+                        WHERE ua.user_id = ?
+                        ORDER BY ua.answered_at DESC
+                        LIMIT ?
+                    ''', (user_id, limit))
+                else:
+                    cursor.execute(f'''
+                        SELECT ua.id, ua.user_id, ua.question_id, ua.selected_option, ua.is_correct,
+                               {time_sql('ua.answered_at')},
+                               u.first_name, u.username, q.question_uz
+                        FROM user_answers ua
+                        JOIN users u ON ua.user_id = u.user_id
+                        JOIN questions q ON ua.question_id = q.id
+                        ORDER BY ua.answered_at DESC
+                        LIMIT ?
+                    ''', (limit,))
+                return cursor.fetchall()
         except Exception as e:
             print(f"Error getting user answers: {e}")
             return []
-    
+
     # Alloh names methods
     def get_allah_names(self, lang='UZ'):
         try:
             if lang not in ['UZ', 'RU', 'AR', 'EN']:
                 lang = 'UZ'
-            self.cursor.execute(f'SELECT number, name_{lang}, description_{lang} FROM allah_names ORDER BY number')
-            return self.cursor.fetchall()
+            return self.allah_names.get(lang, lambda: self._load_allah_names(lang))
         except Exception as e:
             print(f"Error getting allah names: {e}")
             return []
-    
+
+    def _load_allah_names(self, lang):
+        with self.pool.read() as cursor:
+            cursor.execute(f'SELECT number, name_{lang}, description_{lang} FROM allah_names ORDER BY number')
+            return cursor.fetchall()
+
     def get_allah_name_by_number(self, number, lang='UZ'):
         try:
             if lang not in ['UZ', 'RU', 'AR', 'EN']:
                 lang = 'UZ'
-            self.cursor.execute(f'SELECT number, name_{lang}, description_{lang} FROM allah_names WHERE number = ?', (number,))
-            return self.cursor.fetchone()
+            by_number = self.allah_names.get(('by_number', lang), lambda: {
+                row[0]: row for row in self.allah_names.get(lang, lambda: self._load_allah_names(lang))
+            })
+            return by_number.get(number)
         except Exception as e:
             print(f"Error getting allah name: {e}")
             return None
-    
+
     def close(self):
         try:
-            self.conn.close()
+            if self.answer_log is not None:
+                self.answer_log.close()
+            self.cache_bus.close()
+            self.pool.close()
         except Exception as e:
             print(f"Error closing database: {e}")
-            
+
     def get_questions_detailed_stats(self):
         """Savollar haqida batafsil statistika olish"""
         try:
-            stats = {}
-            
-            # Jami savollar
-            self.cursor.execute('SELECT COUNT(*) FROM questions')
-            stats['total'] = self.cursor.fetchone()[0]
-            
-            # Faol savollar
-            self.cursor.execute('SELECT COUNT(*) FROM questions WHERE is_active = 1')
-            stats['active'] = self.cursor.fetchone()[0]
-            
-            # Har bir tildagi savollar
-            for lang in ['UZ', 'RU', 'AR', 'EN']:
-                self.cursor.execute(f'''
-                    SELECT COUNT(*) FROM questions 
-                    WHERE question_{lang} IS NOT NULL 
-                    AND question_{lang} != ''
-                    AND is_active = 1
+            languages = ['UZ', 'RU', 'AR', 'EN']
+            counters = self.get_counters(['questions_total', 'questions_active'] +
+                                         [f'questions_active_{lang}' for lang in languages])
+            stats = {
+                'total': counters['questions_total'],
+                'active': counters['questions_active'],
+            }
+            for lang in languages:
+                stats[f'lang_{lang}'] = counters[f'questions_active_{lang}']
+
+            with self.pool.read() as cursor:
+                # Oxirgi 10 ta savol (created_at indeksi bo'yicha)
+                cursor.execute(f'''
+                    SELECT id, question_uz, {time_sql('created_at')}, is_active
+                    FROM questions
+                    ORDER BY created_at DESC
+                    LIMIT 10
                 ''')
-                stats[f'lang_{lang}'] = self.cursor.fetchone()[0]
-            
-            # Oxirgi 10 ta savol
-            self.cursor.execute('''
-                SELECT id, question_uz, created_at, is_active 
-                FROM questions 
-                ORDER BY created_at DESC 
-                LIMIT 10
-            ''')
-            stats['recent'] = self.cursor.fetchall()
-            
-            # Har oyda qo'shilgan savollar (oxirgi 6 oy)
-            self.cursor.execute('''
-                SELECT strftime('%Y-%m', created_at) as month, COUNT(*) as count
-                FROM questions
-                WHERE created_at IS NOT NULL
-                GROUP BY month
-                ORDER BY month DESC
-                LIMIT 6
-            ''')
-            stats['monthly'] = self.cursor.fetchall()
-            
+                stats['recent'] = cursor.fetchall()
+
+                # Har oyda qo'shilgan savollar (oxirgi 6 oy) - hisoblagichlardan
+                cursor.execute('''
+                    SELECT substr(name, 17) AS month, value
+                    FROM stats_counters
+                    WHERE name > 'questions_month:' AND name < 'questions_month;'
+                      AND name != 'questions_month:-' AND value > 0
+                    ORDER BY name DESC
+                    LIMIT 6
+                ''')
+                stats['monthly'] = cursor.fetchall()
+
             return stats
         except Exception as e:
             print(f"Error getting questions stats: {e}")
@@ -742,11 +763,12 @@ class Database:
     def get_questions_by_admin(self, admin_id):
         """Admin tomonidan qo'shilgan savollar"""
         try:
-            self.cursor.execute('''
-                SELECT COUNT(*) FROM questions 
-                WHERE created_by = ?
-            ''', (admin_id,))
-            return self.cursor.fetchone()[0]
+            with self.pool.read() as cursor:
+                cursor.execute('''
+                    SELECT COUNT(*) FROM questions
+                    WHERE created_by = ?
+                ''', (admin_id,))
+                return cursor.fetchone()[0]
         except Exception as e:
             print(f"Error getting questions by admin: {e}")
             return 0
@@ -754,59 +776,220 @@ class Database:
     def get_inactive_questions_count(self):
         """Faol bo'lmagan savollar soni"""
         try:
-            self.cursor.execute('SELECT COUNT(*) FROM questions WHERE is_active = 0')
-            return self.cursor.fetchone()[0]
+            counters = self.get_counters(['questions_total', 'questions_active'])
+            return counters['questions_total'] - counters['questions_active']
         except Exception as e:
             print(f"Error getting inactive questions: {e}")
-            return 0       
+            return 0
 
 
     def set_user_wait(self, user_id, minutes=15):
-        """Foydalanuvchi uchun kutish vaqti o'rnatish"""
-        try:
-            from datetime import datetime, timedelta
-            wait_until = datetime.now() + timedelta(minutes=minutes)
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO user_wait_times (user_id, wait_until)
-                VALUES (?, ?)
-            ''', (user_id, wait_until))
-            self.conn.commit()
+        """Foydalanuvchi uchun kutish vaqti o'rnatish (xotira + baza)"""
+        try:
+            wait_until = now_epoch() + minutes * 60
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO user_wait_times (user_id, wait_until)
+                    VALUES (?, ?)
+                ''', (user_id, wait_until))
+            self.cooldowns.set_deadline(user_id, wait_until)
             return True
         except Exception as e:
             print(f"Error setting wait time: {e}")
             return False
 
     def check_user_wait(self, user_id):
-        """Foydalanuvchi kutish vaqtida yoki yo'qligini tekshirish"""
-        try:
-            from datetime import datetime
-            self.cursor.execute('''
-                SELECT wait_until FROM user_wait_times WHERE user_id = ?
-            ''', (user_id,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                wait_until = datetime.fromisoformat(result[0])
-                if datetime.now() < wait_until:
-                    remaining = (wait_until - datetime.now()).seconds // 60
-                    return True, remaining
+        """Foydalanuvchi kutish vaqtida yoki yo'qligini tekshirish (faqat xotiradan)"""
+        return self.cooldowns.check(user_id)
+
+    def load_user_waits(self):
+        """Ishga tushganda faol kutish vaqtlarini xotiraga yuklash"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT user_id, wait_until FROM user_wait_times')
+                rows = cursor.fetchall()
+            self.cooldowns.load(rows)
+            # Muddati o'tib ketganlar darhol tozalanadi
+            self.sweep_user_waits()
+            return len(self.cooldowns)
+        except Exception as e:
+            print(f"Error loading wait times: {e}")
+            return 0
+
+    def sweep_user_waits(self):
+        """Muddati o'tgan kutish vaqtlarini guruhlab o'chirish"""
+        expired = self.cooldowns.sweep()
+        if not expired:
+            return 0
+        try:
+            with self.pool.write() as cursor:
+                # Shu orada yangilangan muddat o'chirilmasligi uchun wait_until ham solishtiriladi
+                cursor.executemany('''
+                    DELETE FROM user_wait_times WHERE user_id = ? AND wait_until <= ?
+                ''', expired)
+            return len(expired)
+        except Exception as e:
+            print(f"Error sweeping wait times: {e}")
+            return 0
+
+    # Bot sessions
+    def load_bot_session(self, user_id, min_updated_at=0):
+        """(name, til, question_id, source, salawat, updated_at) yoki None"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('''
+                    SELECT name, language, question_id, source, salawat, updated_at
+                    FROM bot_sessions WHERE user_id = ? AND updated_at >= ?
+                ''', (user_id, min_updated_at))
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            return (row[0], language_name(row[1])) + tuple(row[2:])
+        except Exception as e:
+            print(f"Error loading session: {e}")
+            return None
+
+    def save_bot_sessions(self, rows):
+        """(user_id, name, til, question_id, source, salawat, updated_at) qatorlarini yozish"""
+        if not rows:
+            return 0
+        try:
+            with self.pool.write() as cursor:
+                cursor.executemany('''
+                    INSERT INTO bot_sessions (user_id, name, language, question_id, source, salawat, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        name = excluded.name, language = excluded.language,
+                        question_id = excluded.question_id, source = excluded.source,
+                        salawat = excluded.salawat, updated_at = excluded.updated_at
+                ''', [(user_id, name, language_code(lang), question_id, source, salawat, updated_at)
+                      for user_id, name, lang, question_id, source, salawat, updated_at in rows])
+            return len(rows)
+        except Exception as e:
+            print(f"Error saving sessions: {e}")
+            return 0
+
+    def get_bot_sessions_updated_since(self, since):
+        """since dan keyin yozilgan sessiyalar user_id lari"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT user_id FROM bot_sessions WHERE updated_at >= ?', (since,))
+                return {row[0] for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error getting updated sessions: {e}")
+            return None
+
+    def delete_expired_bot_sessions(self, before):
+        """updated_at < before bo'lgan sessiyalarni o'chirish"""
+        try:
+            with self.pool.write() as cursor:
+                cursor.execute('DELETE FROM bot_sessions WHERE updated_at < ?', (before,))
+                return cursor.rowcount
+        except Exception as e:
+            print(f"Error deleting expired sessions: {e}")
+            return 0
+
+    # FSM states
+    def get_fsm_record(self, storage_key, min_updated_at=0):
+        """(state, data_json) yoki None"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('''
+                    SELECT state, data FROM fsm_states
+                    WHERE storage_key = ? AND updated_at >= ?
+                ''', (storage_key, min_updated_at))
+                return cursor.fetchone()
+        except Exception as e:
+            print(f"Error getting FSM record: {e}")
+            return None
+
+    def save_fsm_records(self, upserts):
+        """FSM yozuvlarini bitta tranzaksiyada yozish"""
+        try:
+            with self.pool.write() as cursor:
+                cursor.executemany('''
+                    INSERT INTO fsm_states (storage_key, state, data, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(storage_key) DO UPDATE SET
+                        state = excluded.state, data = excluded.data,
+                        updated_at = excluded.updated_at
+                ''', upserts)
+            return True
+        except Exception as e:
+            print(f"Error saving FSM records: {e}")
+            return False
+
+    def get_fsm_keys_updated_since(self, since):
+        """since dan keyin yozilgan FSM kalitlari (snapshot tekshiruvi uchun)"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT storage_key FROM fsm_states WHERE updated_at >= ?', (since,))
+                return {row[0] for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error getting updated FSM keys: {e}")
+            return None
+
+    def delete_expired_fsm_records(self, before):
+        try:
+            with self.pool.write() as cursor:
+                cursor.execute('DELETE FROM fsm_states WHERE updated_at < ?', (before,))
+                return cursor.rowcount
+        except Exception as e:
+            print(f"Error deleting expired FSM records: {e}")
+            return 0
+
+    # Scheduled jobs
+    def save_scheduled_job(self, job_key, kind, run_at, payload, token=0):
+        """Vazifani saqlash (bir xil kalit - eski vazifa almashtiriladi)"""
+        try:
+            with self.pool.write() as cursor:
+                cursor.execute('''
+                    INSERT INTO scheduled_jobs (job_key, kind, run_at, payload, token)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(job_key) DO UPDATE SET
+                        kind = excluded.kind, run_at = excluded.run_at, payload = excluded.payload,
+                        token = excluded.token
+                ''', (job_key, kind, run_at, payload, token))
+            return True
+        except Exception as e:
+            print(f"Error saving scheduled job: {e}")
+            return False
+
+    def delete_scheduled_job(self, job_key, token=None):
+        """Vazifani o'chirish; token berilsa faqat o'sha rejalashtirishdagisi"""
+        try:
+            with self.pool.write() as cursor:
+                if token is None:
+                    cursor.execute('DELETE FROM scheduled_jobs WHERE job_key = ?', (job_key,))
                 else:
-                    self.cursor.execute('DELETE FROM user_wait_times WHERE user_id = ?', (user_id,))
-                    self.conn.commit()
-                    return False, 0
-            return False, 0
+                    cursor.execute('''
+                        DELETE FROM scheduled_jobs WHERE job_key = ? AND token = ?
+                    ''', (job_key, token))
+                return cursor.rowcount > 0
         except Exception as e:
-            print(f"Error checking wait time: {e}")
-            return False, 0
+            print(f"Error deleting scheduled job: {e}")
+            return False
+
+    def get_scheduled_jobs(self):
+        """Barcha kutilayotgan vazifalar: (job_key, kind, run_at, payload, token)"""
+        try:
+            with self.pool.read() as cursor:
+                cursor.execute('SELECT job_key, kind, run_at, payload, token FROM scheduled_jobs')
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting scheduled jobs: {e}")
+            return []
 
     def save_wrong_question(self, user_id, question_id):
-        """Noto'g'ri javob berilgan savolni saqlash (qayta chiqmasligi uchun)"""
+        """Noto'g'ri javob berilgan savolni belgilash (qayta chiqmasligi uchun).
+
+        Javobning o'zi user_answers da (is_correct = 0), bu yerda faqat bitmap yangilanadi.
+        """
         try:
-            self.cursor.execute('''
-                INSERT INTO user_wrong_questions (user_id, question_id, answered_at)
-                VALUES (?, ?, ?)
-            ''', (user_id, question_id, datetime.now()))
-            self.conn.commit()
+            self.write_log([
+                self.seen.mark(user_id, question_id, self.pool.read, wrong=True),
+            ])
+            self.seen.apply(user_id, question_id, wrong=True)
             return True
         except Exception as e:
             print(f"Error saving wrong question: {e}")
@@ -815,22 +998,31 @@ class Database:
     def get_excluded_questions(self, user_id):
         """Foydalanuvchi ko'rgan va noto'g'ri javob bergan savollar ID larini olish"""
         try:
-            # Ko'rilgan savollar
-            self.cursor.execute('''
-                SELECT question_id FROM user_answers WHERE user_id = ?
-            ''', (user_id,))
-            seen = [row[0] for row in self.cursor.fetchall()]
-            
-            # Noto'g'ri javob berilgan savollar
-            self.cursor.execute('''
-                SELECT question_id FROM user_wrong_questions WHERE user_id = ?
-            ''', (user_id,))
-            wrong = [row[0] for row in self.cursor.fetchall()]
-            
-            # Barchasini birlashtirish
-            excluded = list(set(seen + wrong))
-            return excluded
+            return ids_from_bitmap(self.seen.excluded(user_id, self.pool.read))
         except Exception as e:
             print(f"Error getting excluded questions: {e}")
-            return []        
-            
\ No newline at end of file
+            return []
+
+    def get_random_unseen_question(self, user_id, lang='UZ'):
+        """Foydalanuvchi hali ko'rmagan va xato qilmagan tasodifiy savol"""
+        try:
+            if lang not in ['UZ', 'RU', 'AR', 'EN']:
+                lang = 'UZ'
+            self.questions.ensure_loaded(self.pool.read)
+            excluded = self.seen.excluded(user_id, self.pool.read)
+            return self.questions.random_unseen(lang, excluded)
+        except Exception as e:
+            print(f"Error getting unseen question: {e}")
+            return None
+
+    def get_remaining_questions_count(self, user_id, lang='UZ'):
+        """Foydalanuvchi uchun qolgan savollar soni"""
+        try:
+            if lang not in ['UZ', 'RU', 'AR', 'EN']:
+                lang = 'UZ'
+            self.questions.ensure_loaded(self.pool.read)
+            excluded = self.seen.excluded(user_id, self.pool.read)
+            return self.questions.remaining(lang, excluded)
+        except Exception as e:
+            print(f"Error getting remaining questions count: {e}")
+            return 0
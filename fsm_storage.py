@@ -0,0 +1,172 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+
+def storage_key_name(key: StorageKey) -> str:
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or 0}:{key.destiny}"
+
+
+class _Record:
+    __slots__ = ('state', 'data', 'touched')
+
+    def __init__(self, state=None, data=None, touched=None):
+        self.state = state
+        self.data = data or {}
+        self.touched = touched if touched is not None else time.time()
+
+
+class SQLiteStorage(BaseStorage):
+    """Bot bazasidagi fsm_states jadvaliga yoziladigan FSM ombori.
+
+    Issiq kalitlar xotirada (LRU) saqlanadi - har bir update dagi
+    get_state odatda bazaga tushmaydi, bo'sh holatlar ham keshlanadi.
+    set_state/set_data faqat keshni o'zgartiradi, o'zgargan kalitlar har
+    ``flush_interval`` soniyada bitta tranzaksiyada yoziladi. ``ttl`` dan
+    uzoq tegilmagan holatlar eskirgan hisoblanadi va bazadan tozalanadi.
+    Tozalangan holat darhol o'chirilmaydi - bo'sh qator sifatida qoladi.
+    """
+
+    def __init__(self, db, flush_interval=1.0, ttl=7 * 24 * 3600, cache_size=50000):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._evicted = {}
+        self._dirty = set()
+        self._flusher = None
+        self._last_expire = 0.0
+
+    async def _record(self, key: StorageKey) -> _Record:
+        name = storage_key_name(key)
+        now = time.time()
+        record = self._cache.get(name)
+        if record is None:
+            record = self._evicted.get(name)
+            if record is None:
+                row = await self.db.get_fsm_record(name, int(now - self.ttl))
+                # Kutish paytida boshqa handler yozgan bo'lishi mumkin
+                record = self._cache.get(name)
+                if record is None:
+                    data = json.loads(row[1]) if row and row[1] else {}
+                    record = _Record(row[0] if row else None, data, now)
+            self._insert(name, record)
+        elif now - record.touched > self.ttl:
+            record.state, record.data = None, {}
+        self._cache.move_to_end(name)
+        return record
+
+    def _insert(self, name, record):
+        self._evicted.pop(name, None)
+        self._cache[name] = record
+        while len(self._cache) > self.cache_size:
+            old_name, old_record = self._cache.popitem(last=False)
+            if old_name in self._dirty:
+                self._evicted[old_name] = old_record
+
+    def _touch(self, key: StorageKey, record: _Record):
+        record.touched = time.time()
+        self._dirty.add(storage_key_name(key))
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._touch(key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._record(key)
+        record.data = data.copy()
+        self._touch(key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._record(key)
+        return record.data.copy()
+
+    async def flush(self):
+        """O'zgargan kalitlarni bazaga yozish"""
+        if not self._dirty:
+            return 0
+        names, self._dirty = self._dirty, set()
+        evicted, self._evicted = self._evicted, {}
+
+        upserts = []
+        for name in names:
+            record = self._cache.get(name) or evicted.get(name)
+            if record is None:
+                continue
+            if record.state is None and not record.data:
+                # Bo'sh holat ham yoziladi (tombstone) - snapshot eskirganini bilish uchun
+                upserts.append((name, None, None, int(record.touched)))
+                continue
+            try:
+                data = json.dumps(record.data, ensure_ascii=False)
+            except (TypeError, ValueError) as e:
+                print(f"Error encoding FSM data for {name}: {e}")
+                continue
+            upserts.append((name, record.state, data, int(record.touched)))
+
+        if not await self.db.save_fsm_records(upserts):
+            # Keyingi urinishda qayta yoziladi
+            self._dirty |= names
+            for name, record in evicted.items():
+                self._evicted.setdefault(name, record)
+            return 0
+
+        now = time.time()
+        if now - self._last_expire > 600:
+            self._last_expire = now
+            await self.db.delete_expired_fsm_records(int(now - self.ttl))
+        return len(upserts)
+
+    def export(self):
+        """Snapshot uchun: [(kalit, state, data, touched, dirty)]"""
+        items = [(name, record.state, record.data, record.touched, True)
+                 for name, record in self._evicted.items()]
+        items.extend((name, record.state, record.data, record.touched, name in self._dirty)
+                     for name, record in self._cache.items())
+        return items
+
+    def restore(self, items, skip=()):
+        """Snapshot dan keshni tiklash; ``skip`` dagilar bazadan o'qiladi"""
+        cutoff = time.time() - self.ttl
+        restored = 0
+        for name, state, data, touched, dirty in items:
+            if name in skip or touched < cutoff or name in self._cache:
+                continue
+            self._insert(name, _Record(state, data, touched))
+            if dirty:
+                self._dirty.add(name)
+            restored += 1
+        if self._dirty and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        return restored
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing FSM storage: {e}")
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections import deque
+
+from workers import update_chat_id
+
+logger = logging.getLogger(__name__)
+
+
+def chat_key(item):
+    """Update (dict yoki aiogram Update) qaysi chatga tegishli"""
+    if isinstance(item, dict):
+        return update_chat_id(item)
+    try:
+        event = item.event
+    except Exception:
+        return 0
+    chat = getattr(event, 'chat', None) or getattr(getattr(event, 'message', None), 'chat', None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, 'from_user', None) or getattr(event, 'user', None)
+    return user.id if user is not None else 0
+
+
+class Intake:
+    """Kiruvchi update lar navbati va ishchilar to'plami.
+
+    Navbatda ``queue_size`` tadan ko'p update turmaydi - put() joy
+    bo'shaguncha kutadi (polling yoki webhook sekinlashadi). ``workers`` ta
+    ishchi update larni ``handle(item)`` ga uzatadi: bitta chatdagilar kelish
+    tartibida ketma-ket, turli chatlar parallel. Ko'p update yuborgan chat
+    qolganlarni to'sib qo'ymaydi - har update dan keyin navbat oxiriga o'tadi.
+    """
+
+    def __init__(self, handle, workers=64, queue_size=1000):
+        self.handle = handle
+        self.workers = workers
+        self._space = asyncio.Semaphore(queue_size)
+        self._chats = {}               # chat_id -> deque (boshidagisi bajarilmoqda yoki navbatda)
+        self._ready = asyncio.Queue()  # bajarilishini kutayotgan chatlar
+        self._tasks = []
+
+    def __len__(self):
+        return sum(len(pending) for pending in self._chats.values())
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def put(self, item):
+        """Navbatga qo'shish (to'la bo'lsa kutadi)"""
+        await self._space.acquire()
+        chat_id = chat_key(item)
+        pending = self._chats.get(chat_id)
+        if pending is None:
+            self._chats[chat_id] = deque((item,))
+            self._ready.put_nowait(chat_id)
+        else:
+            # Chat bajarilmoqda yoki navbatda - tartib saqlanadi
+            pending.append(item)
+
+    async def _work(self):
+        while True:
+            chat_id = await self._ready.get()
+            pending = self._chats[chat_id]
+            try:
+                await self.handle(pending[0])
+            except Exception as e:
+                logger.error(f"Update handling error: {e}")
+            finally:
+                pending.popleft()
+                self._space.release()
+                if pending:
+                    self._ready.put_nowait(chat_id)
+                else:
+                    del self._chats[chat_id]
+                self._ready.task_done()
+
+    async def poll(self, bot, allowed_updates=None, timeout=30):
+        """Long polling: olingan update lar navbatga, navbat to'la bo'lsa kutiladi"""
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=timeout,
+                                                allowed_updates=allowed_updates)
+            except Exception as e:
+                logger.error(f"Polling error: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                await self.put(update)
+                offset = update.update_id + 1
+
+    async def stop(self):
+        """Navbatdagi update larni bajarib bo'lish va ishchilarni to'xtatish"""
+        if self._tasks:
+            await self._ready.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
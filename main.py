@@ -1,3 +1,5 @@
+# Birinchi import - ishga tushish vaqti shu yerdan hisoblanadi
+from bootstrap import get_database, get_translator, on_stop_signal, StartupTimer
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher, F
@@ -5,21 +7,27 @@ from aiogram.types import Message, CallbackQuery, Update
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 import os
 import sys
 from datetime import datetime
-from googletrans import Translator
-from flask import Flask, request, jsonify, Request  # Request qo'shildi!
 import threading
 
-from database import Database
+from quiz_engine import QuizEngine
+from scheduler import JobScheduler
+from session_store import SessionStore
+from fsm_storage import SQLiteStorage
+from snapshot import WarmState
+from workers import shard_for
+from intake import Intake
+from outbound import OutboundScheduler, send_priority, PRIORITY_BULK
+from animation import Animator, Frame
+from webhook import WebhookServer
 from keyboards import *
-from keep_alive import keep_alive
 
-# Translator
-translator = Translator()
+# googletrans birinchi ishlatilganda import qilinadi (bootstrap.py)
+startup_timer = StartupTimer()
+startup_timer.mark('imports')
 
 # Load environment variables
 load_dotenv()
@@ -43,14 +51,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Ko'p jarayonli rejimda (workers.py) shu jarayon raqami va workerlar soni
+WORKER_INDEX = int(os.getenv('BOT_WORKER_INDEX', '0'))
+WORKER_COUNT = int(os.getenv('BOT_WORKERS', '1'))
+
 # Initialize bot
 bot = Bot(token=BOT_TOKEN)
-storage = MemoryStorage()
+# Barcha yuborish/tahrirlash/o'chirish so'rovlari Telegram limitlari bo'yicha navbatga qo'yiladi
+# (umumiy limit workerlar orasida bo'linadi)
+outbound = OutboundScheduler(
+    global_rate=float(os.getenv('OUTBOUND_GLOBAL_RATE', '30')) / WORKER_COUNT,
+    chat_rate=float(os.getenv('OUTBOUND_CHAT_RATE', '1')),
+    chat_burst=int(os.getenv('OUTBOUND_CHAT_BURST', '3')),
+)
+bot.session.middleware(outbound)
+# Bitta xabarni tahrirlab o'ynaladigan animatsiyalar (kadrlar orasi chat limitidan kam emas)
+animator = Animator(bot, outbound, min_interval=1.0 / float(os.getenv('OUTBOUND_CHAT_RATE', '1')))
+
+# Initialize database (barcha SQL alohida DB oqimida, admin.py bilan umumiy)
+db = get_database()
+quiz = QuizEngine(db.sync)
+# Kechiktirilgan vazifalar (scheduled_jobs jadvalida saqlanadi)
+scheduler = JobScheduler(db, concurrency=int(os.getenv('SCHEDULER_CONCURRENCY', '32')))
+
+# FSM holatlari bazada (qayta ishga tushganda yo'qolmaydi), yozuvlar guruhlab flush qilinadi
+storage = SQLiteStorage(db, flush_interval=float(os.getenv('FSM_FLUSH_INTERVAL', '1.0')))
 dp = Dispatcher(storage=storage)
 
-# Initialize database
-db = Database()
-
 # States
 class RegisterState(StatesGroup):
     waiting_for_name = State()
@@ -86,9 +113,27 @@ REWARD_MESSAGE = """
 🚀 Omad! Ilmingiz ziyoda bo'lsin!
 """    
 
-# Dictionary to store user data
-user_sessions = {}
-salawat_count = {}
+# Foydalanuvchi sessiyalari (LRU/TTL bilan cheklangan, SESSION_PERSIST=1 - bazada saqlanadi)
+sessions = SessionStore(
+    max_size=int(os.getenv('SESSION_MAX', '100000')),
+    ttl=int(os.getenv('SESSION_TTL', str(6 * 3600))),
+    database=db if os.getenv('SESSION_PERSIST', '1') == '1' else None,
+    question_lookup=db.get_pooled_question,
+)
+
+# Handlerdan oldin sessiyani xotiraga olish (bazadan o'qish executor da)
+@dp.update.outer_middleware()
+async def load_session(handler, event, data):
+    user = data.get('event_from_user')
+    if user is not None:
+        await sessions.load(user.id)
+    return await handler(event, data)
+# Qayta ishga tushganda xotira holatini tiklash uchun snapshot
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', 'bot_state.snapshot')
+if WORKER_COUNT > 1:
+    SNAPSHOT_PATH = f"{SNAPSHOT_PATH}.{WORKER_INDEX}"
+warm_state = WarmState(SNAPSHOT_PATH, db, sessions, storage, scheduler)
+startup_timer.mark('init')
 
 # Salovat matnlari
 SALAWAT_TEXT = "🤲 {}-salovat:\nاللَّهُمَّ صَلِّ عَلَى سَيِّدِنَا مُحَمَّدٍ\n\nAllohumma solli 'ala sayyidina Muhammad"
@@ -110,7 +155,7 @@ LANGUAGES = {
 async def admin_users_list(message: Message, state: FSMContext):
     """Barcha foydalanuvchilar ro'yxati"""
     await state.clear()
-    users = db.get_all_users_stats()
+    users = await db.get_all_users_stats()
     
     if not users:
         await message.answer("📭 Hozircha foydalanuvchilar yo'q")
@@ -125,7 +170,7 @@ async def admin_users_list(message: Message, state: FSMContext):
 async def admin_answers_list(message: Message, state: FSMContext):
     """Barcha javoblar ro'yxati"""
     await state.clear()
-    answers = db.get_user_answers(limit=100)
+    answers = await db.get_user_answers(limit=100)
     
     if not answers:
         await message.answer("📭 Hozircha javoblar yo'q")
@@ -162,7 +207,7 @@ async def admin_rewards_menu(message: Message, state: FSMContext):
 async def admin_pending_rewards(message: Message, state: FSMContext):
     """Kutilayotgan mukofotlar"""
     await state.clear()
-    rewards = db.get_pending_rewards()
+    rewards = await db.get_pending_rewards()
     
     if not rewards:
         await message.answer("📭 Hozircha kutilayotgan mukofotlar yo'q")
@@ -179,13 +224,12 @@ async def show_stats(message: Message, state: FSMContext):
     await state.clear()
     
     try:
-        total_users = db.get_total_users()
-        today_users = db.get_today_users()
-        total_questions = db.get_question_count()
-        questions_stats = db.get_questions_stats()
+        total_users = await db.get_total_users()
+        today_users = await db.get_today_users()
+        total_questions = await db.get_question_count()
+        questions_stats = await db.get_questions_stats()
         
-        db.cursor.execute('SELECT COUNT(*) FROM prophets')
-        total_prophets = db.cursor.fetchone()[0]
+        total_prophets = await db.get_prophets_count()
         
         stats_text = (
             f"📊 **BOT STATISTIKASI**\n\n"
@@ -263,18 +307,10 @@ async def admin_user_detail(callback: CallbackQuery):
             return
         
         # Foydalanuvchi ma'lumotlari
-        db.cursor.execute('''
-            SELECT first_name, username, language, registered_at 
-            FROM users WHERE user_id = ?
-        ''', (user_id,))
-        user = db.cursor.fetchone()
+        user = await db.get_user_info(user_id)
         
         # Statistika
-        db.cursor.execute('''
-            SELECT correct_count, wrong_count, total_questions, best_streak
-            FROM user_stats WHERE user_id = ?
-        ''', (user_id,))
-        stats = db.cursor.fetchone()
+        stats = await db.get_user_stats(user_id)
         
         if not user:
             await callback.answer("Foydalanuvchi topilmadi")
@@ -290,14 +326,7 @@ async def admin_user_detail(callback: CallbackQuery):
         reg_date_str = reg_date[:10] if reg_date else "Noma'lum"
         
         # Oxirgi javoblar
-        db.cursor.execute('''
-            SELECT q.question_uz, ua.selected_option, ua.is_correct, ua.answered_at
-            FROM user_answers ua
-            JOIN questions q ON ua.question_id = q.id
-            WHERE ua.user_id = ?
-            ORDER BY ua.answered_at DESC LIMIT 5
-        ''', (user_id,))
-        last_answers = db.cursor.fetchall()
+        last_answers = await db.get_last_answers(user_id, limit=5)
         
         # Matnni qurish
         text_parts = []
@@ -348,7 +377,7 @@ async def admin_user_detail(callback: CallbackQuery):
 async def admin_user_answers(callback: CallbackQuery, user_id: int):
     """Foydalanuvchining barcha javoblarini ko'rsatish (2 parametr)"""
     try:
-        answers = db.get_user_answers(user_id, limit=50)
+        answers = await db.get_user_answers(user_id, limit=50)
         
         if not answers:
             await callback.message.edit_text("📭 Javoblar yo'q")
@@ -391,19 +420,7 @@ async def admin_user_answers(callback: CallbackQuery, user_id: int):
 async def admin_user_rewards(callback: CallbackQuery, user_id: int):
     """Foydalanuvchining mukofotlarini ko'rsatish (2 parametr)"""
     try:
-        # rewards jadvalida qanday ustunlar borligini tekshirish
-        db.cursor.execute("PRAGMA table_info(rewards)")
-        columns = [col[1] for col in db.cursor.fetchall()]
-        print(f"📊 rewards jadvali ustunlari: {columns}")
-        
-        # 'created_at' ustuni yo'q, shuning uchun 'id' yoki boshqa ustunni ishlatamiz
-        query = '''
-            SELECT id, amount, status, paid_at
-            FROM rewards WHERE user_id = ? ORDER BY id DESC
-        '''
-        
-        db.cursor.execute(query, (user_id,))
-        rewards = db.cursor.fetchall()
+        rewards = await db.get_user_rewards(user_id)
         
         if not rewards:
             await callback.message.edit_text("💰 Mukofotlar yo'q")
@@ -439,7 +456,7 @@ async def admin_user_rewards(callback: CallbackQuery, user_id: int):
 @dp.callback_query(F.data == "admin_users_back")
 async def admin_users_back(callback: CallbackQuery):
     """Foydalanuvchilar ro'yxatiga qaytish"""
-    users = db.get_all_users_stats()
+    users = await db.get_all_users_stats()
     await callback.message.edit_text(
         f"👥 **Foydalanuvchilar** ({len(users)} ta)",
         reply_markup=get_users_inline_keyboard(users)
@@ -451,7 +468,7 @@ async def admin_users_back(callback: CallbackQuery):
 async def admin_users_page(callback: CallbackQuery):
     """Foydalanuvchilar ro'yxati sahifalash"""
     page = int(callback.data.split('_')[3])
-    users = db.get_all_users_stats()
+    users = await db.get_all_users_stats()
     await callback.message.edit_reply_markup(
         reply_markup=get_users_inline_keyboard(users, page)
     )
@@ -461,6 +478,17 @@ async def admin_users_page(callback: CallbackQuery):
 def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
 
+async def notify_admins(*texts):
+    """Adminlarga bildirishnoma (past ustuvorlik - foydalanuvchi javoblarini kutdirmaydi)"""
+    async def send(admin_id):
+        try:
+            for text in texts:
+                await bot.send_message(admin_id, text)
+        except Exception as e:
+            print(f"Admin {admin_id} ga xabar yuborilmadi: {e}")
+    with send_priority(PRIORITY_BULK):
+        await asyncio.gather(*(send(admin_id) for admin_id in ADMIN_IDS))
+
 def translate_text_sync(text: str, target_lang: str) -> str:
     """Matnni kerakli tilga tarjima qilish (sinxron)"""
     try:
@@ -483,8 +511,7 @@ def translate_text_sync(text: str, target_lang: str) -> str:
         print(f"🔄 Tarjima: '{text[:30]}...' -> {target_lang} ({dest})")
         
         # Sinxron tarjima
-        translator = Translator()
-        result = translator.translate(text, dest=dest)
+        result = get_translator().translate(text, dest=dest)
         
         if hasattr(result, 'text'):
             translated = result.text
@@ -526,7 +553,7 @@ async def translate_text(text: str, target_lang: str) -> str:
         print(f"🔄 Tarjima qilinmoqda: '{text[:30]}...' ({target_lang})")
         
         # Tarjima qilish
-        result = translator.translate(text, dest=dest)
+        result = get_translator().translate(text, dest=dest)
         
         # Tarjima natijasini olish
         if hasattr(result, 'text'):
@@ -558,30 +585,24 @@ async def command_start_handler(message: Message, state: FSMContext):
         return
     
     # Add user to database
-    is_new = db.add_user(user_id, username, first_name)
+    is_new = await db.add_user(user_id, username, first_name)
     
     # Notify admin about new user
     if is_new:
-        for admin_id in ADMIN_IDS:
-            try:
-                await bot.send_message(
-                    admin_id,
-                    f"🆕 Yangi foydalanuvchi!\n"
-                    f"ID: {user_id}\n"
-                    f"Ism: {first_name}\n"
-                    f"Username: @{username}"
-                )
-            except:
-                pass
+        asyncio.create_task(notify_admins(
+            f"🆕 Yangi foydalanuvchi!\n"
+            f"ID: {user_id}\n"
+            f"Ism: {first_name}\n"
+            f"Username: @{username}"
+        ))
     
     # Foydalanuvchi ma'lumotlarini yaratish
-    if user_id not in user_sessions:
-        user_sessions[user_id] = {'name': '', 'lang': 'UZ'}
+    session = sessions.get_or_create(user_id)
     
     # Agar foydalanuvchi avval ro'yxatdan o'tgan bo'lsa
-    if user_sessions[user_id].get('name'):
-        lang = user_sessions[user_id].get('lang', 'UZ')
-        name = user_sessions[user_id]['name']
+    if session.name:
+        lang = session.lang
+        name = session.name
         
         welcome_text = await translate_text(f"Assalomu Aleykum {name}!\n\nXush kelibsiz!", lang)
         await message.answer(
@@ -590,7 +611,7 @@ async def command_start_handler(message: Message, state: FSMContext):
         )
     else:
         # Yangi foydalanuvchi
-        salawat_count[user_id] = 1
+        session.salawat = 1
         
         welcome_text = (
             "🤲 Assalomu Aleykum!\n\n"
@@ -613,7 +634,8 @@ async def salavat_handler(message: Message, state: FSMContext):
     if is_admin(user_id):
         return
     
-    current_count = salawat_count.get(user_id, 1)
+    session = sessions.get_or_create(user_id)
+    current_count = session.salawat or 1
     
     await message.answer("✅ Qabul bo'lsin!")
     await asyncio.sleep(1)
@@ -621,13 +643,13 @@ async def salavat_handler(message: Message, state: FSMContext):
     next_count = current_count + 1
     
     if next_count <= 10:
-        salawat_count[user_id] = next_count
+        session.salawat = next_count
         await message.answer(
             SALAWAT_TEXTS[next_count - 1],
             reply_markup=get_salawat_keyboard(next_count, 'UZ')
         )
     else:
-        salawat_count[user_id] = 0
+        session.salawat = 0
         await message.answer(
             "✨ Barakalla! 10 ta salovat aytdingiz.\n\n"
             "Endi o'zingizni tanishtirish uchun tilni tanlang:",
@@ -655,21 +677,16 @@ async def handle_language_selection(message: Message, state: FSMContext):
     print(f"🌐 Til tanlandi: {lang} (user_id: {user_id})")
     
     # BAZAGA SAQLASH
-    db.set_user_language(user_id, lang)
+    await db.set_user_language(user_id, lang)
     
     # SESSION NI YANGILASH
-    if user_id not in user_sessions:
-        user_sessions[user_id] = {'name': '', 'lang': lang, 'seen_questions': []}
-    else:
-        user_sessions[user_id]['lang'] = lang
+    sessions.get_or_create(user_id).lang = lang
     
     # Ism bor-yo'qligini tekshirish
-    db.cursor.execute('SELECT first_name FROM users WHERE user_id = ?', (user_id,))
-    result = db.cursor.fetchone()
+    name = await db.get_user_first_name(user_id)
     
-    if result and result[0]:
+    if name:
         # Ism bor - menyuga o'tish
-        name = result[0]
         welcome_text = await translate_text(f"Assalomu Aleykum {name}!\n\nTil muvaffaqiyatli o'zgartirildi.", lang)
         await message.answer(
             welcome_text,
@@ -696,12 +713,10 @@ async def handle_name(message: Message, state: FSMContext):
         await message.answer("Iltimos ismingizni kiriting:")
         return
     
-    if user_id not in user_sessions:
-        user_sessions[user_id] = {}
-    
-    lang = user_sessions[user_id].get('lang', 'UZ')
-    user_sessions[user_id]['name'] = name
-    db.update_user_name(user_id, name)
+    session = sessions.get_or_create(user_id)
+    lang = session.lang
+    session.name = name
+    await db.update_user_name(user_id, name)
     
     await state.clear()
     
@@ -869,7 +884,7 @@ async def confirm_save(callback: CallbackQuery, state: FSMContext):
         print(f"📦 Rus: {question_ru}")
         print(f"📦 Ingliz: {question_en}")
         
-        question_id = db.add_question(question_data)
+        question_id = await db.add_question(question_data)
         
         if question_id:
             await callback.message.edit_text(
@@ -912,14 +927,13 @@ async def cancel_save(callback: CallbackQuery, state: FSMContext):
 
 async def show_stats(message: Message):
     try:
-        total_users = db.get_total_users()
-        today_users = db.get_today_users()
-        total_questions = db.get_question_count()
-        questions_stats = db.get_questions_stats()
-        inactive_count = db.get_inactive_questions_count()
+        total_users = await db.get_total_users()
+        today_users = await db.get_today_users()
+        total_questions = await db.get_question_count()
+        questions_stats = await db.get_questions_stats()
+        inactive_count = await db.get_inactive_questions_count()
         
-        db.cursor.execute('SELECT COUNT(*) FROM prophets')
-        total_prophets = db.cursor.fetchone()[0]
+        total_prophets = await db.get_prophets_count()
         
         stats_text = (
             f"📊 **BOT STATISTIKASI**\n\n"
@@ -1004,7 +1018,7 @@ async def process_prophet_audio(message: Message, state: FSMContext):
         name_en = await translate_text(data['name_uz'], 'EN')
         
         # Database ga saqlash
-        prophet_id = db.add_prophet(data['name_uz'], name_ru, name_ar, name_en, message.audio.file_id)
+        prophet_id = await db.add_prophet(data['name_uz'], name_ru, name_ar, name_en, message.audio.file_id)
         
         success_text = (
             f"✅ Payg'ambar muvaffaqiyatli qo'shildi! (ID: {prophet_id})\n\n"
@@ -1042,7 +1056,7 @@ async def change_lang_handler(message: Message):
     if is_admin(user_id):
         return
     
-    current_lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+    current_lang = sessions.lang(user_id)
     
     prompts = {
         'UZ': "Tilni tanlang:",
@@ -1064,9 +1078,9 @@ async def questions_handler(message: Message):
         return
     
     # Kutish vaqtini tekshirish
-    is_waiting, remaining = db.check_user_wait(user_id)
+    is_waiting, remaining = db.sync.check_user_wait(user_id)
     if is_waiting:
-        lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+        lang = sessions.lang(user_id)
         wait_messages = {
             'UZ': f"⏳ **{remaining} daqiqa kutishingiz kerak!**\n\nSiz noto'g'ri javob berganingiz uchun keyingi savol {remaining} daqiqadan so'ng yuboriladi.\nIltimos, sabr qiling! 🤲",
             'RU': f"⏳ **Нужно подождать {remaining} минут!**\n\nИз-за неверного ответа следующий вопрос будет доступен через {remaining} минут.\nПожалуйста, наберитесь терпения! 🤲",
@@ -1077,17 +1091,14 @@ async def questions_handler(message: Message):
         return
     
     # User sessions ni tekshirish
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    lang = session.lang
     
-    # Foydalanuvchi ko'rmagan va noto'g'ri javob bermagan savollarni olish
-    excluded = db.get_excluded_questions(user_id)
-    
-    # Savol olish
-    question = db.get_random_question_excluding(lang, excluded)
+    # Foydalanuvchi ko'rmagan va noto'g'ri javob bermagan savolni olish
+    question = await db.get_random_unseen_question(user_id, lang)
     
     if not question:
         no_questions = {
@@ -1101,13 +1112,8 @@ async def questions_handler(message: Message):
     
     q_id, q_text, opt1, opt2, opt3, correct = question
     
-    # Joriy savol ma'lumotlarini saqlash
-    user_sessions[user_id]['current_question'] = {
-        'id': q_id,
-        'correct': correct,
-        'correct_text': [opt1, opt2, opt3][correct-1],
-        'options': [opt1, opt2, opt3]
-    }
+    # Joriy savol - faqat id (matn va variantlar hovuzda)
+    session.set_question(q_id)
     
     # Savol prefiksi
     question_prefix = {'UZ': "❓ **Savol**", 'RU': "❓ **Вопрос**", 'AR': "❓ **سؤال**", 'EN': "❓ **Question**"}
@@ -1118,6 +1124,71 @@ async def questions_handler(message: Message):
         reply_markup=get_circle_options_keyboard((opt1, opt2, opt3), q_id, lang)
     )
     
+def celebrate_reward(chat_id: int, lang: str):
+    """20 ta savol yutug'i uchun tabrik animatsiyasi va karta so'rovi (bitta xabar, fonda)"""
+    # Tilga mos matnlar
+    fireworks_text = {
+        'UZ': "🎆 **SALYUTLAR!** 🎆",
+        'RU': "🎆 **ФЕЙЕРВЕРК!** 🎆",
+        'AR': "🎆 **الألعاب النارية!** 🎆",
+        'EN': "🎆 **FIREWORKS!** 🎆"
+    }
+    
+    drum_text = {
+        'UZ': "🥁 **BARABAN SADOLARI** 🥁",
+        'RU': "🥁 **БАРАБАННАЯ ДРОБЬ** 🥁",
+        'AR': "🥁 **قرع الطبول** 🥁",
+        'EN': "🥁 **DRUM ROLL** 🥁"
+    }
+    
+    # 1. SALYUTLAR ANIMATSIYASI (otilib-o'chib turadi)
+    title = fireworks_text.get(lang, fireworks_text['UZ'])
+    fireworks_frames = [
+        "    🎆", "   🎆✨", "  🎆✨🌟", " 🎆✨🌟🎇", "🎆✨🌟🎇⭐",
+        " ✨🌟🎇⭐💫", "  🌟🎇⭐💫", "   🎇⭐💫", "    ⭐💫", "     💫"
+    ]
+    frames = [Frame(title, keyframe=True)]
+    frames += [Frame(f"{title}\n\n`{frame}`", 0.5) for frame in fireworks_frames]
+    
+    # 2. BARABAN ANIMATSIYASI
+    title = drum_text.get(lang, drum_text['UZ'])
+    drum_frames = ["🥁", "🥁🥁", "🥁🥁🥁", "🥁🥁🥁🥁", "🥁🥁🥁🥁🥁"]
+    frames.append(Frame(title, keyframe=True))
+    frames += [Frame(f"{title}\n\n**{frame}**", 0.5) for frame in drum_frames]
+    
+    # 3. SOVG'A QUTISI (asta-sekin paydo bo'ladi)
+    gift_lines = [
+        "╔══════════════════════════════════════╗",
+        "║           🎁 SOVG'A QUTISI 🎁        ║",
+        "╠══════════════════════════════════════╣",
+        "║         🎉 TABRIKLAYMIZ! 🎉          ║",
+        "║    Siz 20 ta savolga to'g'ri         ║",
+        "║    javob berib, 200 000 so'm         ║",
+        "║    mukofotni yutib oldingiz!         ║",
+        "║       💰 **200 000 SO'M** 💰         ║",
+        "╚══════════════════════════════════════╝"
+    ]
+    gift_msg = ""
+    for line in gift_lines:
+        gift_msg += line + "\n"
+        frames.append(Frame(gift_msg, 0.5, keyframe=line == gift_lines[-1]))
+    
+    # 4. KONFETTI (sovg'a qutisi ustida aylanib tushadi)
+    confetti = ["🎊", "🎈", "🎉", "✨", "⭐", "💫"]
+    frames += [Frame(f"{' ' * (i * 2)}{c}\n{gift_msg}", 0.5) for i, c in enumerate(confetti)]
+    
+    # 5. KARTA SO'RASH (sekin paydo bo'ladi, oxirgi kadr xabarda qoladi)
+    card_lines = [
+        "💳",
+        "💳 **Iltimos,**",
+        "💳 **Iltimos, karta raqamingizni**",
+        "💳 **Iltimos, karta raqamingizni kiriting:**",
+        "💳 **Iltimos, karta raqamingizni kiriting:**\nMisol: `8600 1234 5678 9012`"
+    ]
+    frames += [Frame(f"{gift_msg}\n{line}", 0.5, keyframe=line == card_lines[-1]) for line in card_lines]
+    
+    return animator.play(chat_id, frames)
+
 @dp.callback_query(F.data.startswith('circle_answer_'))
 async def handle_circle_answer(callback: CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
@@ -1132,7 +1203,7 @@ async def handle_circle_answer(callback: CallbackQuery, state: FSMContext):
         return
     
     # Kutish vaqtini tekshirish
-    is_waiting, remaining = db.check_user_wait(user_id)
+    is_waiting, remaining = db.sync.check_user_wait(user_id)
     if is_waiting:
         await callback.answer(f"⏳ {remaining} daqiqa kutishingiz kerak", show_alert=True)
         return
@@ -1153,20 +1224,21 @@ async def handle_circle_answer(callback: CallbackQuery, state: FSMContext):
         return
     
     # User sessions ni tekshirish
-    if user_id not in user_sessions:
+    session = sessions.get(user_id)
+    if session is None:
         print(f"🔴 User sessions topilmadi: {user_id}")
         await callback.answer("Sessiya topilmadi! Iltimos, qaytadan boshlang.", show_alert=True)
         return
     
-    if 'current_question' not in user_sessions[user_id]:
+    current_q = await sessions.current_question(session)
+    if current_q is None:
         print(f"🔴 current_question topilmadi: {user_id}")
         await callback.answer("Joriy savol topilmadi!", show_alert=True)
         return
     
-    current_q = user_sessions[user_id]['current_question']
-    correct = current_q.get('correct', 0)
-    options = current_q.get('options', [])
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    correct = current_q[5]
+    options = list(current_q[2:5])
+    lang = session.lang
     
     print(f"🔴 To'g'ri javob: {correct}, Tanlangan: {selected}")
     
@@ -1180,93 +1252,92 @@ async def handle_circle_answer(callback: CallbackQuery, state: FSMContext):
     print(f"🔴 Natija: {result_text}")
     # ===========================================================
     
-    # Javobni bazaga saqlash
-    db.save_answer(user_id, question_id, selected, is_correct)
-    db.update_user_stats(user_id, is_correct)
+    # Tugma "soati" darhol to'xtaydi - qolgan ish handlerdan keyin (answer_followup vazifasi)
+    await callback.answer()
     
-    # 20 ta savol sessiyasini tekshirish
-    active_session = db.get_active_session(user_id)
-    session_id = None
+    # Javob, statistika, sessiya va kutish vaqti - bitta tranzaksiyada
+    result = await db.run(quiz.record_answer, user_id, question_id, selected, is_correct, wait_minutes=15)
+    if result is None:
+        await callback.message.answer("Xatolik yuz berdi!")
+        return
     
-    if active_session:
-        session_id = active_session[0]
+    chat_id = callback.message.chat.id
+    await detach(
+        'answer_followup', f"answer_followup:{chat_id}:{callback.message.message_id}",
+        chat_id=chat_id, message_id=callback.message.message_id, user_id=user_id, lang=lang,
+        question_id=question_id, options=options, selected=selected, correct=correct,
+        is_correct=is_correct, challenge_won=result.challenge_won,
+    )
     
     if is_correct:
-        # ===== TO'G'RI JAVOB =====
         print(f"🔴 TO'G'RI JAVOB!")
-        
-        if not active_session:
-            session_id = db.start_20_questions_session(user_id)
-            if session_id:
-                db.save_question_answer(user_id, session_id, question_id, selected, True)
+        # 20 ta savolga yetdimi?
+        if result.challenge_won:
+            await state.set_state(RewardState.waiting_for_card)
         else:
-            db.save_question_answer(user_id, session_id, question_id, selected, True)
-        
-        # Joriy xabarni yangilash (variantlar bilan)
-        try:
-            await callback.message.edit_text(
-                f"✅ **To'g'ri javob!**\n\n👇 Natijalar:",
-                reply_markup=get_updated_options_keyboard(options, question_id, selected, correct, lang)
-            )
-            print(f"🔴 Xabar muvaffaqiyatli yangilandi")
-        except Exception as e:
-            print(f"🔴 Xabarni yangilashda xatolik: {e}")
-        
-        # KEYINGI SAVOLNI AVTOMATIK YUBORISH (1.5 soniya kutib)
-        await asyncio.sleep(1.5)
-        await send_next_question(callback.message, user_id, lang)
-        
+            # KEYINGI SAVOLNI AVTOMATIK YUBORISH (1.5 soniyadan keyin)
+            await detach('next_question', f"next_question:{user_id}", delay=1.5,
+                         chat_id=chat_id, user_id=user_id, lang=lang)
     else:
-        # ===== NOTO'G'RI JAVOB =====
         print(f"🔴 NOTO'G'RI JAVOB!")
-        
-        if active_session:
-            db.save_question_answer(user_id, session_id, question_id, selected, False)
-            db.complete_session(session_id, user_id, success=False)
-        
-        # Noto'g'ri javob berilgan savolni saqlash (qayta chiqmasligi uchun)
-        db.save_wrong_question(user_id, question_id)
-        
-        # 15 daqiqa kutish vaqti
-        db.set_user_wait(user_id, minutes=15)
-        
-        # Joriy xabarni yangilash (variantlar bilan)
-        try:
-            await callback.message.edit_text(
-                f"❌ **Noto'g'ri javob!**\n\n✅ **To'g'ri javob:** {options[correct-1]}\n\n👇 Natijalar:",
-                reply_markup=get_updated_options_keyboard(options, question_id, selected, correct, lang)
-            )
-            print(f"🔴 Xabar muvaffaqiyatli yangilandi")
-        except Exception as e:
-            print(f"🔴 Xabarni yangilashda xatolik: {e}")
-        
-        # Kutish vaqti xabari
-        wait_msg = {
-            'UZ': "⏳ **15 daqiqa kutishingiz kerak!**\n\nSiz noto'g'ri javob berganingiz uchun keyingi savol 15 daqiqadan so'ng yuboriladi.\nIltimos, sabr qiling! 🤲",
-            'RU': "⏳ **Нужно подождать 15 минут!**\n\nИз-за неверного ответа следующий вопрос будет доступен через 15 минут.\nПожалуйста, наберитесь терпения! 🤲",
-            'AR': "⏳ **عليك الانتظار 15 دقيقة!**\n\nبسبب إجابتك الخاطئة، سيكون السؤال التالي متاحًا بعد 15 دقيقة.\nيرجى التحلي بالصبر! 🤲",
-            'EN': "⏳ **15 minutes wait!**\n\nDue to your wrong answer, the next question will be available in 15 minutes.\nPlease be patient! 🤲"
-        }
-        
-        await callback.message.answer(wait_msg.get(lang, wait_msg['UZ']))
-        
-        # 15 daqiqadan so'ng avtomatik yangi savol yuborish
-        asyncio.create_task(delayed_next_question(callback.message, user_id, lang, 15 * 60))
+        # Kutish tugagach avtomatik yangi savol (takroriy xato eski vazifani almashtiradi)
+        await scheduler.schedule(
+            f"next_question:{user_id}", 'next_question', run_at=result.wait_until,
+            payload={'chat_id': chat_id, 'user_id': user_id, 'lang': lang}
+        )
     
-    await callback.answer()
     print(f"🔴 Handler tugadi")
 
 
-async def send_next_question(message: Message, user_id: int, lang: str):
+async def detach(kind: str, key: str, delay: float = 0, **payload):
+    """Handlerni tez tugatish: qolgan ish scheduler vazifasi sifatida (bazaga yozilmaydi)"""
+    await scheduler.schedule(key, kind, delay=delay, payload=payload, durable=False)
+
+
+async def answer_followup_job(payload: dict):
+    """Javobdan keyingi ish: natijani ko'rsatish, xato bo'lsa kutish xabari, yutuq bo'lsa tabrik"""
+    chat_id = payload['chat_id']
+    lang = payload['lang']
+    options = payload['options']
+    correct = payload['correct']
+    keyboard = get_updated_options_keyboard(options, payload['question_id'], payload['selected'], correct, lang)
+    
+    if payload['is_correct']:
+        text = f"✅ **To'g'ri javob!**\n\n👇 Natijalar:"
+    else:
+        text = f"❌ **Noto'g'ri javob!**\n\n✅ **To'g'ri javob:** {options[correct-1]}\n\n👇 Natijalar:"
+    
+    # Joriy xabarni yangilash (variantlar bilan)
+    try:
+        await bot.edit_message_text(text, chat_id=chat_id, message_id=payload['message_id'], reply_markup=keyboard)
+        print(f"🔴 Xabar muvaffaqiyatli yangilandi")
+    except Exception as e:
+        print(f"🔴 Xabarni yangilashda xatolik: {e}")
+    
+    if payload['is_correct']:
+        if payload['challenge_won']:
+            celebrate_reward(chat_id, lang)
+        return
+    
+    # Kutish vaqti xabari
+    wait_msg = {
+        'UZ': "⏳ **15 daqiqa kutishingiz kerak!**\n\nSiz noto'g'ri javob berganingiz uchun keyingi savol 15 daqiqadan so'ng yuboriladi.\nIltimos, sabr qiling! 🤲",
+        'RU': "⏳ **Нужно подождать 15 минут!**\n\nИз-за неверного ответа следующий вопрос будет доступен через 15 минут.\nПожалуйста, наберитесь терпения! 🤲",
+        'AR': "⏳ **عليك الانتظار 15 دقيقة!**\n\nبسبب إجابتك الخاطئة، سيكون السؤال التالي متاحًا بعد 15 دقيقة.\nيرجى التحلي بالصبر! 🤲",
+        'EN': "⏳ **15 minutes wait!**\n\nDue to your wrong answer, the next question will be available in 15 minutes.\nPlease be patient! 🤲"
+    }
+    await bot.send_message(chat_id, wait_msg.get(lang, wait_msg['UZ']))
+
+
+scheduler.register('answer_followup', answer_followup_job)
+
+
+async def send_next_question(chat_id: int, user_id: int, lang: str):
     """Yangi savol yuborish"""
     print(f"🔵 Yangi savol yuborilmoqda: user={user_id}, lang={lang}")
     
-    # Foydalanuvchi ko'rmagan va noto'g'ri javob bermagan savollarni olish
-    excluded = db.get_excluded_questions(user_id)
-    print(f"🔵 Excluded savollar: {excluded}")
-    
-    # Yangi savol olish
-    new_question = db.get_random_question_excluding(lang, excluded)
+    # Foydalanuvchi ko'rmagan va noto'g'ri javob bermagan savolni olish
+    new_question = await db.get_random_unseen_question(user_id, lang)
     
     if not new_question:
         print(f"🔵 Savollar tugagan!")
@@ -1276,47 +1347,45 @@ async def send_next_question(message: Message, user_id: int, lang: str):
             'AR': "🎉 **تهانينا!**\n\nلقد أكملت جميع الأسئلة!",
             'EN': "🎉 **Congratulations!**\n\nYou have completed all questions!"
         }
-        await message.answer(all_done_messages.get(lang, all_done_messages['UZ']),
-                            reply_markup=get_main_menu_keyboard(lang))
+        await bot.send_message(chat_id, all_done_messages.get(lang, all_done_messages['UZ']),
+                               reply_markup=get_main_menu_keyboard(lang))
         return
     
     q_id, q_text, opt1, opt2, opt3, correct = new_question
     print(f"🔵 Yangi savol ID: {q_id}")
     
-    # Joriy savol ma'lumotlarini saqlash
-    user_sessions[user_id]['current_question'] = {
-        'id': q_id,
-        'correct': correct,
-        'correct_text': [opt1, opt2, opt3][correct-1],
-        'options': [opt1, opt2, opt3]
-    }
+    # Joriy savol - faqat id (matn va variantlar hovuzda)
+    sessions.get_or_create(user_id, lang=lang).set_question(q_id)
     
     # Savol prefiksi
     question_prefix = {'UZ': "❓ **Savol**", 'RU': "❓ **Вопрос**", 'AR': "❓ **سؤال**", 'EN': "❓ **Question**"}
     
-    await message.answer(f"{question_prefix.get(lang, '❓ Savol')}:\n\n{q_text}")
-    await message.answer(
+    await bot.send_message(chat_id, f"{question_prefix.get(lang, '❓ Savol')}:\n\n{q_text}")
+    await bot.send_message(
+        chat_id,
         "👇 Javob variantlari:",
         reply_markup=get_circle_options_keyboard((opt1, opt2, opt3), q_id, lang)
     )
     print(f"🔵 Yangi savol yuborildi")
 
 
-async def delayed_next_question(message: Message, user_id: int, lang: str, delay_seconds: int):
-    """Kutish vaqtidan keyin yangi savol yuborish"""
-    print(f"🟡 {delay_seconds} sekund kutish boshlandi...")
-    await asyncio.sleep(delay_seconds)
-    print(f"🟡 Kutish tugadi, yangi savol tekshirilmoqda...")
+async def next_question_job(payload: dict):
+    """Kutish vaqtidan keyin yangi savol yuborish (scheduler vazifasi)"""
+    user_id = payload['user_id']
+    await sessions.load(user_id)
     
     # Kutish vaqti tugaganligini tekshirish
-    is_waiting, _ = db.check_user_wait(user_id)
+    is_waiting, _ = db.sync.check_user_wait(user_id)
     if not is_waiting:
         print(f"🟡 Yangi savol yuborilmoqda...")
-        await send_next_question(message, user_id, lang)
+        await send_next_question(payload['chat_id'], user_id, payload.get('lang', 'UZ'))
     else:
         print(f"🟡 Hali kutish vaqti tugamagan")
 
 
+scheduler.register('next_question', next_question_job)
+
+
 # Keyingi savol handler
 @dp.callback_query(F.data.startswith('next_question_'))
 async def next_question_handler(callback: CallbackQuery, state: FSMContext):
@@ -1325,15 +1394,16 @@ async def next_question_handler(callback: CallbackQuery, state: FSMContext):
     question_id = int(parts[2])
     
     # User sessions ni tekshirish
-    if user_id not in user_sessions:
+    session = sessions.get(user_id)
+    if session is None:
         await callback.answer("Xatolik yuz berdi!")
         return
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
-    seen_questions = user_sessions[user_id].get('questions_seen', [])
+    lang = session.lang
+    seen_questions = session.seen_ids('questions_seen')
     
     # Yangi savol olish
-    new_question = db.get_random_question_excluding(lang, seen_questions)
+    new_question = await db.get_random_question_excluding(lang, seen_questions)
     
     if not new_question:
         all_done_messages = {
@@ -1353,18 +1423,10 @@ async def next_question_handler(callback: CallbackQuery, state: FSMContext):
     
     # Yangi savolni ko'rilganlar ro'yxatiga qo'shish
     if q_id not in seen_questions:
-        user_sessions[user_id]['questions_seen'].append(q_id)
+        seen_questions.append(q_id)
     
-    # Joriy savol ma'lumotlarini saqlash
-    correct_answer_text = [opt1, opt2, opt3][correct-1]
-    
-    user_sessions[user_id]['current_question'] = {
-        'id': q_id,
-        'correct': correct,
-        'correct_text': correct_answer_text,
-        'options': [opt1, opt2, opt3],
-        'source': 'questions'
-    }
+    # Joriy savol - faqat id
+    session.set_question(q_id, 'questions')
     
     # Savol prefiksi
     question_prefix = {
@@ -1394,9 +1456,9 @@ async def show_questions_stats(message: Message):
         return
     
     # Statistikani olish
-    stats = db.get_questions_detailed_stats()
-    admin_questions = db.get_questions_by_admin(user_id)
-    inactive_count = db.get_inactive_questions_count()
+    stats = await db.get_questions_detailed_stats()
+    admin_questions = await db.get_questions_by_admin(user_id)
+    inactive_count = await db.get_inactive_questions_count()
     
     # Tilni aniqlash (admin uchun)
     lang = 'UZ'  # yoki db dan olish mumkin
@@ -1486,14 +1548,7 @@ async def export_questions(callback: CallbackQuery):
     import io
     from datetime import datetime
     
-    db.cursor.execute('''
-        SELECT id, question_uz, question_ru, question_ar, question_en,
-               correct_option, created_at, is_active
-        FROM questions
-        ORDER BY id DESC
-    ''')
-    
-    questions = db.cursor.fetchall()
+    questions = await db.get_questions_for_export()
     
     # CSV fayl yaratish
     output = io.StringIO()
@@ -1556,10 +1611,12 @@ async def handle_text_answer(message: Message, state: FSMContext):
         return
     
     # Foydalanuvchi sessiyasini tekshirish
-    if user_id not in user_sessions or 'current_question' not in user_sessions[user_id]:
-        lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+    session = sessions.get(user_id)
+    current_q = await sessions.current_question(session)
+    if current_q is None:
+        lang = sessions.lang(user_id)
         if not lang:
-            lang = db.get_user_language(user_id)
+            lang = await db.get_user_language(user_id)
         info_messages = {
             'UZ': "Iltimos, avval '❓ Savollar' tugmasini bosing.",
             'RU': "Пожалуйста, сначала нажмите '❓ Вопросы'.",
@@ -1570,11 +1627,11 @@ async def handle_text_answer(message: Message, state: FSMContext):
         return
     
     # Kutish vaqtini tekshirish
-    is_waiting, remaining = db.check_user_wait(user_id)
+    is_waiting, remaining = db.sync.check_user_wait(user_id)
     if is_waiting:
-        lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+        lang = sessions.lang(user_id)
         if not lang:
-            lang = db.get_user_language(user_id)
+            lang = await db.get_user_language(user_id)
         wait_messages = {
             'UZ': f"⏳ Siz xato javob berganingiz uchun {remaining} daqiqa kutishingiz kerak.",
             'RU': f"⏳ Из-за неверного ответа вам нужно подождать {remaining} минут.",
@@ -1585,21 +1642,21 @@ async def handle_text_answer(message: Message, state: FSMContext):
         return
     
     # Foydalanuvchi tilini olish
-    db_lang = db.get_user_language(user_id)
-    session_lang = user_sessions[user_id].get('lang', 'UZ')
+    db_lang = await db.get_user_language(user_id)
+    session_lang = session.lang
     
     if db_lang != session_lang:
         print(f"🔄 Til yangilandi: session={session_lang} -> baza={db_lang}")
-        user_sessions[user_id]['lang'] = db_lang
+        session.lang = db_lang
         lang = db_lang
     else:
         lang = session_lang
     
     # Joriy savol ma'lumotlarini olish
-    current_q = user_sessions[user_id]['current_question']
-    question_id = current_q['id']
-    correct_text = current_q['correct_text']
-    correct = current_q['correct']
+    question_id = current_q[0]
+    correct = current_q[5]
+    options = list(current_q[2:5])
+    correct_text = options[correct-1]
     
     # Foydalanuvchi javobini tozalash
     user_answer = message.text.lower().strip()
@@ -1633,124 +1690,19 @@ async def handle_text_answer(message: Message, state: FSMContext):
     print(f"   📊 Natija: {is_correct}")
     print(f"   🌐 Til: {lang}")
     
-    # Javobni bazaga saqlash
-    db.save_answer(user_id, question_id, 0, is_correct)
-    db.update_user_stats(user_id, is_correct)
-    
-    # 20 ta savol sessiyasini tekshirish
-    active_session = db.get_active_session(user_id)
-    session_id = None
-    
-    if active_session:
-        session_id = active_session[0]
+    # Javob, statistika, sessiya va kutish vaqti - bitta tranzaksiyada
+    result = await db.run(quiz.record_answer, user_id, question_id, 0, is_correct,
+                          wait_minutes=30, remember_wrong=False)
+    if result is None:
+        await message.answer("Xatolik yuz berdi!")
+        return
     
     if is_correct:
         # ===== TO'G'RI JAVOB =====
-        if not active_session:
-            session_id = db.start_20_questions_session(user_id)
-            if session_id:
-                db.save_question_answer(user_id, session_id, question_id, 0, True)
-                active_session = db.get_active_session(user_id)
-        else:
-            db.save_question_answer(user_id, session_id, question_id, 0, True)
-            active_session = db.get_active_session(user_id)
-        
         # ===== 20 TA SAVOLGA YETDIMI? (ANIMATSIYALI VERSIYA) =====
-        if active_session and active_session[1] >= 20:
-            db.complete_session(session_id, user_id, success=True)
-            reward_id = db.create_reward(user_id, session_id)
-            
-            lang = user_sessions[user_id].get('lang', 'UZ')
-            
-            # Tilga mos matnlar
-            fireworks_text = {
-                'UZ': "🎆 **SALYUTLAR!** 🎆",
-                'RU': "🎆 **ФЕЙЕРВЕРК!** 🎆",
-                'AR': "🎆 **الألعاب النارية!** 🎆",
-                'EN': "🎆 **FIREWORKS!** 🎆"
-            }
-            
-            drum_text = {
-                'UZ': "🥁 **BARABAN SADOLARI** 🥁",
-                'RU': "🥁 **БАРАБАННАЯ ДРОБЬ** 🥁",
-                'AR': "🥁 **قرع الطبول** 🥁",
-                'EN': "🥁 **DRUM ROLL** 🥁"
-            }
-            
-            # 1. SALYUTLAR ANIMATSIYASI (otilib-o'chib turadi)
-            await message.answer(fireworks_text.get(lang, fireworks_text['UZ']))
-            await asyncio.sleep(0.5)
-            
-            # Mushaklar otilishi (30 marta tez-tez)
-            fireworks_frames = [
-                "    🎆", "   🎆✨", "  🎆✨🌟", " 🎆✨🌟🎇", "🎆✨🌟🎇⭐",
-                " ✨🌟🎇⭐💫", "  🌟🎇⭐💫", "   🎇⭐💫", "    ⭐💫", "     💫"
-            ]
-            
-            for i in range(30):
-                frame = fireworks_frames[i % len(fireworks_frames)]
-                msg = await message.answer(f"`{frame}`")
-                await asyncio.sleep(0.1)
-                await msg.delete()
-            
-            # 2. BARABAN ANIMATSIYASI (tez-tez)
-            await message.answer(drum_text.get(lang, drum_text['UZ']))
-            await asyncio.sleep(0.3)
-            
-            drum_frames = ["🥁", "🥁🥁", "🥁🥁🥁", "🥁🥁🥁🥁", "🥁🥁🥁🥁🥁"]
-            for i in range(20):
-                frame = drum_frames[i % len(drum_frames)]
-                msg = await message.answer(f"**{frame}**")
-                await asyncio.sleep(0.1)
-                await msg.delete()
-            
-            # 3. SOVG'A QUTISI (asta-sekin paydo bo'ladi)
-            gift_lines = [
-                "╔══════════════════════════════════════╗",
-                "║           🎁 SOVG'A QUTISI 🎁        ║",
-                "╠══════════════════════════════════════╣",
-                "║         🎉 TABRIKLAYMIZ! 🎉          ║",
-                "║    Siz 20 ta savolga to'g'ri         ║",
-                "║    javob berib, 200 000 so'm         ║",
-                "║    mukofotni yutib oldingiz!         ║",
-                "║       💰 **200 000 SO'M** 💰         ║",
-                "╚══════════════════════════════════════╝"
-            ]
-            
-            gift_msg = ""
-            for line in gift_lines:
-                gift_msg += line + "\n"
-                temp_msg = await message.answer(gift_msg)
-                await asyncio.sleep(0.1)
-                if line != gift_lines[-1]:
-                    await temp_msg.delete()
-            
-            await asyncio.sleep(0.5)
-            
-            # 4. KONFETTI (aylanib tushadi)
-            confetti = ["🎊", "🎈", "🎉", "✨", "⭐", "💫"]
-            for i in range(30):
-                c = confetti[i % len(confetti)]
-                spaces = " " * (i % 10)
-                msg = await message.answer(f"{spaces}{c}")
-                await asyncio.sleep(0.05)
-                await msg.delete()
-            
-            # 5. KARTA SO'RASH (sekin paydo bo'ladi)
-            card_lines = [
-                "💳",
-                "💳 **Iltimos,**",
-                "💳 **Iltimos, karta raqamingizni**",
-                "💳 **Iltimos, karta raqamingizni kiriting:**",
-                "💳 **Iltimos, karta raqamingizni kiriting:**\nMisol: `8600 1234 5678 9012`"
-            ]
-            
-            for line in card_lines:
-                msg = await message.answer(line)
-                await asyncio.sleep(0.2)
-                if line != card_lines[-1]:
-                    await msg.delete()
-            
+        if result.challenge_won:
+            lang = session.lang
+            celebrate_reward(message.chat.id, lang)
             await state.set_state(RewardState.waiting_for_card)
             return
         
@@ -1762,51 +1714,36 @@ async def handle_text_answer(message: Message, state: FSMContext):
             'EN': "✅ Correct answer!"
         }
         
-        progress = f"\n\n📊 20/20: {active_session[1]}/20 to'g'ri" if active_session else ""
+        progress = f"\n\n📊 20/20: {result.correct_count}/20 to'g'ri" if result.session_id else ""
         
         await message.answer(f"{correct_messages.get(lang, correct_messages['UZ'])}{progress}\n\n✨ Tabriklaymiz! ✨")
         await message.answer("🎉 ⭐️ 🌟 ✨ ⭐️ 🌟 🎉")
         
         # Admin ga xabar
-        user_name = user_sessions[user_id].get('name', 'Noma\'lum')
-        for admin_id in ADMIN_IDS:
-            try:
-                await bot.send_message(admin_id, f"📊 **Javob**\n\n👤 {user_name}\n🆔 `{user_id}`\n📝 ✅ To'g'ri\n❓ ID: {question_id}")
-            except:
-                pass
+        user_name = session.name or 'Noma\'lum'
+        asyncio.create_task(notify_admins(
+            f"📊 **Javob**\n\n👤 {user_name}\n🆔 `{user_id}`\n📝 ✅ To'g'ri\n❓ ID: {question_id}"))
         
         # Yangi savol
         await asyncio.sleep(1)
-        source = user_sessions[user_id]['current_question'].get('source', 'questions')
+        source = session.source or 'questions'
         seen_list = 'questions_seen' if source == 'questions' else 'new_questions_seen'
+        seen_questions = session.seen_ids(seen_list)
         
-        if seen_list not in user_sessions[user_id]:
-            user_sessions[user_id][seen_list] = []
-        seen_questions = user_sessions[user_id][seen_list]
-        
-        new_question = db.get_random_question_excluding(lang, seen_questions)
+        new_question = await db.get_random_question_excluding(lang, seen_questions)
         
         if new_question:
             q_id, q_text, opt1, opt2, opt3, correct = new_question
             
             if q_id not in seen_questions:
-                user_sessions[user_id][seen_list].append(q_id)
-            
-            correct_answer_text = [opt1, opt2, opt3][correct-1]
+                seen_questions.append(q_id)
             
-            user_sessions[user_id]['current_question'] = {
-                'id': q_id,
-                'correct': correct,
-                'correct_text': correct_answer_text,
-                'options': [opt1, opt2, opt3],
-                'source': source
-            }
+            session.set_question(q_id, source)
             
-            active_session = db.get_active_session(user_id)
             reward_text = ""
             
-            if active_session:
-                correct_count = active_session[1]
+            if result.session_id:
+                correct_count = result.correct_count
                 remaining = 20 - correct_count
                 reward_text = f"\n\n━━━━━━━━━━━━━━━━━━━━\n🎁 **MUKOFOT DASTURI**\n✅ To'g'ri javoblar: {correct_count}/20\n⏳ Qolgan: {remaining} ta\n💰 Mukofot: 200 000 so'm\n━━━━━━━━━━━━━━━━━━━━\n"
             else:
@@ -1821,13 +1758,7 @@ async def handle_text_answer(message: Message, state: FSMContext):
     
     else:
         # ===== NOTO'G'RI JAVOB =====
-        if active_session:
-            db.save_question_answer(user_id, session_id, question_id, 0, False)
-            db.complete_session(session_id, user_id, success=False)
-        
-        db.set_user_wait(user_id, minutes=30)
-        
-        display_correct = current_q['options'][correct-1]
+        display_correct = options[correct-1]
         display_correct_clean = re.sub(r'^[\d\s.)]+', '', display_correct).strip()
         
         wrong_messages = {
@@ -1848,20 +1779,13 @@ async def handle_text_answer(message: Message, state: FSMContext):
         
         await message.answer(wait_messages.get(lang, wait_messages['UZ']))
         
-        user_name = user_sessions[user_id].get('name', 'Noma\'lum')
-        for admin_id in ADMIN_IDS:
-            try:
-                await bot.send_message(admin_id, f"📊 **Javob**\n\n👤 {user_name}\n🆔 `{user_id}`\n📝 ❌ Noto'g'ri\n❓ ID: {question_id}\n⏳ 30 daqiqa")
-            except:
-                pass
+        user_name = session.name or 'Noma\'lum'
+        asyncio.create_task(notify_admins(
+            f"📊 **Javob**\n\n👤 {user_name}\n🆔 `{user_id}`\n📝 ❌ Noto'g'ri\n❓ ID: {question_id}\n⏳ 30 daqiqa"))
         
-        source = user_sessions[user_id]['current_question'].get('source', 'questions')
-        if source == 'questions':
-            user_sessions[user_id]['questions_seen'] = []
-        else:
-            user_sessions[user_id]['new_questions_seen'] = []
-        
-        user_sessions[user_id].pop('current_question', None)
+        source = session.source or 'questions'
+        session.reset_seen('questions_seen' if source == 'questions' else 'new_questions_seen')
+        session.clear_question()
 
 # Yangi savol
 @dp.callback_query(F.data == "new_question")
@@ -1873,16 +1797,16 @@ async def inline_new_question(callback: CallbackQuery):
         return
     
     # User sessions ni tekshirish
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    lang = session.lang
     
     await callback.message.delete()
     
     # Yangi savol olish
-    question = db.get_random_question(lang)
+    question = await db.get_random_question(lang)
     
     if not question:
         no_questions = {
@@ -1900,10 +1824,7 @@ async def inline_new_question(callback: CallbackQuery):
     
     q_id, q_text, opt1, opt2, opt3, correct = question
     
-    user_sessions[user_id]['current_question'] = {
-        'id': q_id,
-        'correct': correct
-    }
+    session.set_question(q_id)
     
     question_prefix = {
         'UZ': "❓ Savol",
@@ -1933,18 +1854,15 @@ async def new_question_handler(message: Message):
         return
     
     # User sessions ni tekshirish
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang, 'seen_questions': []}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    if 'seen_questions' not in user_sessions[user_id]:
-        user_sessions[user_id]['seen_questions'] = []
-    
-    lang = user_sessions[user_id].get('lang', 'UZ')
-    seen_questions = user_sessions[user_id].get('seen_questions', [])
+    lang = session.lang
+    seen_questions = session.seen_ids('seen_questions')
     
     # Yangi savol olish (ko'rilmagan)
-    question = db.get_random_question_excluding(lang, seen_questions)
+    question = await db.get_random_question_excluding(lang, seen_questions)
     
     if not question:
         # Agar barcha savollar ko'rilgan bo'lsa
@@ -1961,23 +1879,10 @@ async def new_question_handler(message: Message):
     
     # Savolni ko'rilganlar ro'yxatiga qo'shish
     if q_id not in seen_questions:
-        user_sessions[user_id]['seen_questions'].append(q_id)
-    
-    # Joriy savol ma'lumotlarini saqlash
-    correct_answer_text = ""
-    if correct == 1:
-        correct_answer_text = opt1
-    elif correct == 2:
-        correct_answer_text = opt2
-    else:
-        correct_answer_text = opt3
+        seen_questions.append(q_id)
     
-    user_sessions[user_id]['current_question'] = {
-        'id': q_id,
-        'correct': correct,
-        'correct_text': correct_answer_text,
-        'options': [opt1, opt2, opt3]
-    }
+    # Joriy savol - faqat id (matn va variantlar hovuzda)
+    session.set_question(q_id)
     
     question_prefix = {
         'UZ': "❓ Savol",
@@ -1987,7 +1892,7 @@ async def new_question_handler(message: Message):
     }
     
     # Mukofot matni
-    active_session = db.get_active_session(user_id)
+    active_session = db.sync.get_active_session(user_id)
     reward_text = ""
     
     if active_session:
@@ -2022,9 +1927,9 @@ async def prophets_handler(message: Message):
     if is_admin(user_id):
         return
     
-    lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+    lang = sessions.lang(user_id)
     
-    prophets = db.get_prophets(lang)
+    prophets = await db.get_prophets(lang)
     
     if not prophets:
         no_prophets = {
@@ -2061,12 +1966,12 @@ async def send_prophet_audio(callback: CallbackQuery):
         return
     
     prophet_id = int(callback.data.split('_')[1])
-    audio_id = db.get_prophet_audio(prophet_id)
+    audio_id = await db.get_prophet_audio(prophet_id)
     
     if audio_id:
         await callback.message.answer_audio(audio_id)
     else:
-        lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+        lang = sessions.lang(user_id)
         error_messages = {
             'UZ': "Audio topilmadi",
             'RU': "Аудио не найдено",
@@ -2085,7 +1990,7 @@ async def zikr_handler(message: Message):
     if is_admin(user_id):
         return
     
-    lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+    lang = sessions.lang(user_id)
     
     zikr_texts = {
         'UZ': (
@@ -2144,14 +2049,14 @@ async def allah_names_handler(message: Message):
         return
     
     # User sessions ni tekshirish
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    lang = session.lang
     
     # Alloh ismlarini olish
-    names = db.get_allah_names(lang)
+    names = await db.get_allah_names(lang)
     
     if not names:
         no_names_messages = {
@@ -2205,14 +2110,14 @@ async def allah_name_detail(callback: CallbackQuery):
     user_id = callback.from_user.id
     number = int(callback.data.split('_')[2])
     
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    lang = session.lang
     
     # Ism ma'lumotlarini olish
-    name_data = db.get_allah_name_by_number(number, lang)
+    name_data = await db.get_allah_name_by_number(number, lang)
     
     if not name_data:
         await callback.answer("Ma'lumot topilmadi")
@@ -2285,13 +2190,13 @@ async def allah_name_detail(callback: CallbackQuery):
 async def back_to_allah_names(callback: CallbackQuery):
     user_id = callback.from_user.id
     
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    lang = session.lang
     
-    names = db.get_allah_names(lang)
+    names = await db.get_allah_names(lang)
     
     await callback.message.delete()
     await callback.message.answer(
@@ -2306,13 +2211,13 @@ async def allah_names_page(callback: CallbackQuery):
     user_id = callback.from_user.id
     page = int(callback.data.split('_')[2])
     
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    lang = session.lang
     
-    names = db.get_allah_names(lang)
+    names = await db.get_allah_names(lang)
     
     await callback.message.edit_text(
         "👇 Ismlar ro'yxati:",
@@ -2329,18 +2234,18 @@ async def handle_unknown(message: Message, state: FSMContext):
         return
     
     # User sessions ni tekshirish
-    if user_id not in user_sessions:
-        lang = db.get_user_language(user_id)
-        user_sessions[user_id] = {'name': '', 'lang': lang}
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions.create(user_id, lang=await db.get_user_language(user_id))
     
-    if salawat_count.get(user_id, 0) > 0 and salawat_count.get(user_id, 0) <= 10:
+    if 0 < session.salawat <= 10:
         return
     
     current_state = await state.get_state()
     if current_state == RegisterState.waiting_for_name:
         return
     
-    lang = user_sessions[user_id].get('lang', 'UZ')
+    lang = session.lang
     
     unknown_msgs = {
         'UZ': "Iltimos menyudan foydalaning.",
@@ -2361,7 +2266,7 @@ async def handle_unknown(message: Message, state: FSMContext):
 @dp.message(lambda msg: msg.text == "👥 Foydalanuvchilar" and is_admin(msg.from_user.id))
 async def admin_users_list(message: Message):
     """Barcha foydalanuvchilar ro'yxati"""
-    users = db.get_all_users_stats()
+    users = await db.get_all_users_stats()
     
     if not users:
         await message.answer("📭 Hozircha foydalanuvchilar yo'q")
@@ -2379,18 +2284,10 @@ async def admin_user_detail(callback: CallbackQuery):
     user_id = int(callback.data.split('_')[2])
     
     # Foydalanuvchi ma'lumotlari
-    db.cursor.execute('''
-        SELECT first_name, username, language, registered_at 
-        FROM users WHERE user_id = ?
-    ''', (user_id,))
-    user = db.cursor.fetchone()
+    user = await db.get_user_info(user_id)
     
     # Statistika
-    db.cursor.execute('''
-        SELECT correct_count, wrong_count, total_questions, best_streak
-        FROM user_stats WHERE user_id = ?
-    ''', (user_id,))
-    stats = db.cursor.fetchone()
+    stats = await db.get_user_stats(user_id)
     
     if not user:
         await callback.answer("Foydalanuvchi topilmadi")
@@ -2406,14 +2303,7 @@ async def admin_user_detail(callback: CallbackQuery):
     reg_date_str = reg_date[:10] if reg_date else "Noma'lum"
     
     # Oxirgi javoblar
-    db.cursor.execute('''
-        SELECT q.question_uz, ua.selected_option, ua.is_correct, ua.answered_at
-        FROM user_answers ua
-        JOIN questions q ON ua.question_id = q.id
-        WHERE ua.user_id = ?
-        ORDER BY ua.answered_at DESC LIMIT 5
-    ''', (user_id,))
-    last_answers = db.cursor.fetchall()
+    last_answers = await db.get_last_answers(user_id, limit=5)
     
     # Matnni alohida qurish
     text_parts = []
@@ -2455,7 +2345,7 @@ async def admin_user_answers(callback: CallbackQuery):
     """Foydalanuvchining barcha javoblari"""
     user_id = int(callback.data.split('_')[3])
     
-    answers = db.get_user_answers(user_id, limit=50)
+    answers = await db.get_user_answers(user_id, limit=50)
     
     if not answers:
         await callback.message.edit_text("📭 Javoblar yo'q")
@@ -2480,7 +2370,7 @@ async def admin_user_answers(callback: CallbackQuery):
 @dp.callback_query(F.data == "admin_users_back")
 async def admin_users_back(callback: CallbackQuery):
     """Foydalanuvchilar ro'yxatiga qaytish"""
-    users = db.get_all_users_stats()
+    users = await db.get_all_users_stats()
     await callback.message.edit_text(
         f"👥 **Foydalanuvchilar** ({len(users)} ta)",
         reply_markup=get_users_inline_keyboard(users)
@@ -2491,7 +2381,7 @@ async def admin_users_back(callback: CallbackQuery):
 async def admin_users_page(callback: CallbackQuery):
     """Foydalanuvchilar ro'yxati sahifalash"""
     page = int(callback.data.split('_')[3])
-    users = db.get_all_users_stats()
+    users = await db.get_all_users_stats()
     await callback.message.edit_reply_markup(
         reply_markup=get_users_inline_keyboard(users, page)
     )
@@ -2505,7 +2395,7 @@ async def admin_users_page(callback: CallbackQuery):
 @dp.message(lambda msg: msg.text == "📝 Javoblarni ko'rish" and is_admin(msg.from_user.id))
 async def admin_answers_list(message: Message):
     """Barcha javoblar ro'yxati"""
-    answers = db.get_user_answers(limit=100)
+    answers = await db.get_user_answers(limit=100)
     
     if not answers:
         await message.answer("📭 Hozircha javoblar yo'q")
@@ -2521,15 +2411,7 @@ async def admin_answer_detail(callback: CallbackQuery):
     """Javob haqida batafsil"""
     answer_id = int(callback.data.split('_')[2])
     
-    db.cursor.execute('''
-        SELECT ua.*, u.first_name, u.username, u.user_id, q.question_uz, q.correct_option,
-               q.option1_uz, q.option2_uz, q.option3_uz
-        FROM user_answers ua
-        JOIN users u ON ua.user_id = u.user_id
-        JOIN questions q ON ua.question_id = q.id
-        WHERE ua.id = ?
-    ''', (answer_id,))
-    answer = db.cursor.fetchone()
+    answer = await db.get_answer_detail(answer_id)
     
     if not answer:
         await callback.answer("Javob topilmadi")
@@ -2567,7 +2449,7 @@ async def admin_answer_detail(callback: CallbackQuery):
 @dp.callback_query(F.data == "admin_answers_back")
 async def admin_answers_back(callback: CallbackQuery):
     """Javoblar ro'yxatiga qaytish"""
-    answers = db.get_user_answers(limit=100)
+    answers = await db.get_user_answers(limit=100)
     await callback.message.edit_text(
         f"📝 **Oxirgi javoblar** ({len(answers)} ta)",
         reply_markup=get_answers_inline_keyboard(answers)
@@ -2578,7 +2460,7 @@ async def admin_answers_back(callback: CallbackQuery):
 async def admin_answers_page(callback: CallbackQuery):
     """Javoblar ro'yxati sahifalash"""
     page = int(callback.data.split('_')[3])
-    answers = db.get_user_answers(limit=100)
+    answers = await db.get_user_answers(limit=100)
     await callback.message.edit_reply_markup(
         reply_markup=get_answers_inline_keyboard(answers, page)
     )
@@ -2611,7 +2493,7 @@ async def admin_rewards_menu(message: Message):
 @dp.message(lambda msg: msg.text == "⏳ Kutilayotgan mukofotlar" and is_admin(msg.from_user.id))
 async def admin_pending_rewards(message: Message):
     """Kutilayotgan mukofotlar"""
-    rewards = db.get_pending_rewards()
+    rewards = await db.get_pending_rewards()
     
     if not rewards:
         await message.answer("📭 Hozircha kutilayotgan mukofotlar yo'q")
@@ -2627,14 +2509,7 @@ async def admin_reward_detail(callback: CallbackQuery):
     """Mukofot haqida batafsil"""
     reward_id = int(callback.data.split('_')[2])
     
-    db.cursor.execute('''
-        SELECT r.*, u.first_name, u.username, u.user_id, uc.card_number, uc.card_name
-        FROM rewards r
-        JOIN users u ON r.user_id = u.user_id
-        LEFT JOIN user_cards uc ON r.user_id = uc.user_id
-        WHERE r.id = ?
-    ''', (reward_id,))
-    reward = db.cursor.fetchone()
+    reward = await db.get_reward_detail(reward_id)
     
     if not reward:
         await callback.answer("Mukofot topilmadi")
@@ -2663,9 +2538,8 @@ async def admin_reward_detail(callback: CallbackQuery):
         text += f"📝 Karta egasi: {card_name}\n"
     
     if status == 'paid' and paid_by:
-        db.cursor.execute('SELECT first_name FROM users WHERE user_id = ?', (paid_by,))
-        admin_name = db.cursor.fetchone()
-        text += f"\n👨‍💼 To'lagan: {admin_name[0] if admin_name else paid_by}\n"
+        admin_name = await db.get_user_first_name(paid_by)
+        text += f"\n👨‍💼 To'lagan: {admin_name if admin_name else paid_by}\n"
         text += f"📅 To'langan vaqt: {paid_at}\n"
     
     # Inline keyboard
@@ -2732,15 +2606,13 @@ async def process_reward_check(message: Message, state: FSMContext):
     photo_id = message.photo[-1].file_id
     
     # Mukofotni to'langan deb belgilash
-    success = db.mark_reward_paid(reward_id, admin_id, photo_id)
+    success = await db.mark_reward_paid(reward_id, admin_id, photo_id)
     
     if success:
         # Foydalanuvchiga xabar yuborish
-        db.cursor.execute('SELECT user_id FROM rewards WHERE id = ?', (reward_id,))
-        result = db.cursor.fetchone()
+        user_id = await db.get_reward_user_id(reward_id)
         
-        if result:
-            user_id = result[0]
+        if user_id:
             try:
                 await bot.send_photo(
                     user_id,
@@ -2767,10 +2639,7 @@ async def admin_reward_cancel(callback: CallbackQuery):
     """Mukofotni bekor qilish"""
     reward_id = int(callback.data.split('_')[3])
     
-    db.cursor.execute('''
-        UPDATE rewards SET status = 'cancelled' WHERE id = ?
-    ''', (reward_id,))
-    db.conn.commit()
+    await db.cancel_reward(reward_id)
     
     await callback.message.edit_text("❌ Mukofot bekor qilindi")
     await callback.answer()
@@ -2778,7 +2647,7 @@ async def admin_reward_cancel(callback: CallbackQuery):
 @dp.callback_query(F.data == "admin_rewards_pending")
 async def admin_rewards_pending(callback: CallbackQuery):
     """Kutilayotgan mukofotlar"""
-    rewards = db.get_pending_rewards()
+    rewards = await db.get_pending_rewards()
     
     if not rewards:
         await callback.message.edit_text("📭 Kutilayotgan mukofotlar yo'q")
@@ -2794,7 +2663,7 @@ async def admin_rewards_pending(callback: CallbackQuery):
 async def admin_rewards_page(callback: CallbackQuery):
     """Mukofotlar sahifalash"""
     page = int(callback.data.split('_')[3])
-    rewards = db.get_pending_rewards()
+    rewards = await db.get_pending_rewards()
     await callback.message.edit_reply_markup(
         reply_markup=get_pending_rewards_keyboard(rewards, page)
     )
@@ -2809,10 +2678,12 @@ async def admin_rewards_page(callback: CallbackQuery):
 @dp.message(RewardState.waiting_for_card)
 async def process_card_number(message: Message, state: FSMContext):
     user_id = message.from_user.id
+    # Tabrik hali davom etayotgan bo'lsa - darhol karta so'rovi kadriga o'tadi
+    animator.cancel(message.chat.id)
     card_number = message.text.strip()
     
     # Foydalanuvchi tilini olish
-    lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+    lang = sessions.lang(user_id)
     
     # Karta raqamini tekshirish (oddiy validation)
     # Raqamlarni tozalash
@@ -2853,7 +2724,7 @@ async def process_card_name(message: Message, state: FSMContext):
     card_name = message.text.strip().upper()
     
     # Foydalanuvchi tilini olish
-    lang = user_sessions.get(user_id, {}).get('lang', 'UZ')
+    lang = sessions.lang(user_id)
     
     # Ismni tekshirish
     if len(card_name) < 5:
@@ -2972,7 +2843,7 @@ async def process_card_name(message: Message, state: FSMContext):
     await asyncio.sleep(0.5)
     
     # ===== ADMINGA XABAR YUBORISH =====
-    user_info = user_sessions[user_id].get('name', 'Noma\'lum')
+    user_info = sessions.get_or_create(user_id).name or 'Noma\'lum'
     username = message.from_user.username or "Yo'q"
     
     admin_message = (
@@ -2995,15 +2866,8 @@ async def process_card_name(message: Message, state: FSMContext):
         "🔍 **Tekshirish uchun:** /check_rewards"
     )
     
-    # Barcha adminlarga xabar yuborish
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(admin_id, admin_message)
-            # Adminlarga ham konfetti
-            await asyncio.sleep(0.2)
-            await bot.send_message(admin_id, f"**{confetti_line}**")
-        except Exception as e:
-            print(f"Admin {admin_id} ga xabar yuborilmadi: {e}")
+    # Barcha adminlarga xabar yuborish (adminlarga ham konfetti)
+    asyncio.create_task(notify_admins(admin_message, f"**{confetti_line}**"))
     
     # ===== FOYDALANUVCHIGA YAKUNIY XABAR =====
     final_messages = {
@@ -3060,7 +2924,7 @@ async def process_card_name(message: Message, state: FSMContext):
     await state.clear()
     
     # Karta ma'lumotlarini bazaga saqlash (agar kerak bo'lsa)
-    db.save_card_info(user_id, card_number, card_name)
+    await db.save_card_info(user_id, card_number, card_name)
 
 
 # ============================================
@@ -3077,82 +2941,240 @@ async def back_to_admin(callback: CallbackQuery):
     )
     await callback.answer()    
 
-# Shutdown handler
-async def on_shutdown():
-    logger.info("Bot shutting down...")
-    await bot.session.close()
-    db.close()
-# Webhook handler
-async def handle_webhook(request: Request):
-    update = Update.model_validate(await request.json(), context={"bot": bot})
-    await dp.feed_update(bot, update)
-    return {"ok": True}
-# ... (yuqoridagi barcha importlar va kodlar o'zgarishsiz qoladi) ...
-
 # ============================================
-# POLLING UCHUN KOD (WEBHOOK EMAS)
+# ISHGA TUSHIRISH (POLLING YOKI WEBHOOK)
 # ============================================
 
+# Muddati o'tgan kutish vaqtlarini davriy tozalash
+async def cooldown_sweeper(interval=30):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await db.sweep_user_waits()
+        except Exception as e:
+            logger.error(f"Cooldown sweep error: {e}")
+
+# Tashlab ketilgan 20 ta savol sessiyalarini davriy yopish
+async def challenge_sweeper(interval=600):
+    max_age = int(os.getenv('CHALLENGE_MAX_AGE', str(24 * 3600)))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            closed = await db.sweep_stale_challenges(max_age)
+            if closed:
+                logger.info(f"Stale challenges closed: {closed}")
+        except Exception as e:
+            logger.error(f"Challenge sweep error: {e}")
+
+# Boshqa jarayonlar (admin, skriptlar) o'zgartirgan kontent keshlarini yangilash
+async def cache_watcher(interval=1.0):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            changed = await db.poll_cache_changes()
+            if changed:
+                logger.info(f"Content caches refreshed: {', '.join(changed)}")
+        except Exception as e:
+            logger.error(f"Cache watcher error: {e}")
+
+# Sessiyalarni davriy ravishda bazaga yozish va eskilarini tozalash
+async def flush_sessions():
+    sessions.expire()
+    rows = sessions.collect_dirty()
+    if rows:
+        await db.save_bot_sessions(rows)
+    if sessions.database is not None:
+        await db.delete_expired_bot_sessions(int(datetime.now().timestamp()) - sessions.ttl)
+
+async def session_flusher(interval=30):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_sessions()
+        except Exception as e:
+            logger.error(f"Session flush error: {e}")
+
+# Xotiradagi holatni davriy ravishda snapshot ga yozish
+async def snapshot_writer(interval=60):
+    while True:
+        await asyncio.sleep(interval)
+        await warm_state.save()
+
+def owns_job(payload):
+    """Vazifa shu worker chatiga tegishlimi (bitta jarayonda - hammasi)"""
+    return shard_for(payload.get('chat_id', 0), WORKER_COUNT) == WORKER_INDEX
+
 # Startup notification
 async def on_startup():
     logger.info("Bot started successfully!")
     logger.info(f"Admin IDs: {ADMIN_IDS}")
-    
-    try:
-        me = await bot.get_me()
-        logger.info(f"Bot connected: @{me.username}")
-    except Exception as e:
-        logger.error(f"Failed to connect to Telegram: {e}")
-        return
-    
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(
-                admin_id,
-                "✅ Bot ishga tushdi!\n\n"
-                "Bot muvaffaqiyatli ishga tushirildi.\n"
-                "Barcha tillarga avtomatik tarjima tizimi faol."
-            )
-        except:
-            pass
-    
+    # Bir-biriga bog'liq bo'lmagan chaqiruvlar parallel: xotira holati (sessiyalar, FSM,
+    # vazifalar), savollar hovuzi, saqlangan vazifalar, Telegram va statistika
+    with startup_timer.phase('startup'):
+        results = await startup_timer.gather(
+            restore=warm_state.restore(),
+            questions=db.reload_questions(),
+            jobs=scheduler.load(owns=owns_job),
+            get_me=bot.get_me(),
+            total_users=db.get_total_users(),
+        )
+    asyncio.create_task(cooldown_sweeper())
+    asyncio.create_task(session_flusher())
+    asyncio.create_task(challenge_sweeper())
+    asyncio.create_task(cache_watcher(float(os.getenv('CACHE_POLL_INTERVAL', '1.0'))))
+    asyncio.create_task(snapshot_writer(int(os.getenv('SNAPSHOT_INTERVAL', '60'))))
+    # Kechikkan vazifalar darhol bajariladi
+    scheduler.start()
+
+    me = results['get_me']
+    if isinstance(me, Exception):
+        logger.error(f"Failed to connect to Telegram: {me}")
+        startup_timer.report(float(os.getenv('STARTUP_BUDGET', '5')))
+        return
+    logger.info(f"Bot connected: @{me.username}")
+
+    # Xabarlar ishga tushishni kutdirmaydi (ko'p jarayonli rejimda faqat birinchi worker)
+    if WORKER_INDEX == 0:
+        asyncio.create_task(notify_admins(
+            "✅ Bot ishga tushdi!\n\n"
+            "Bot muvaffaqiyatli ishga tushirildi.\n"
+            "Barcha tillarga avtomatik tarjima tizimi faol."
+        ))
+
+    total_users = results['total_users']
     print("\n" + "="*50)
     print("🤖 ISLOMIY SAVOL-JAVOB BOTI")
     print("="*50)
     print("✅ Bot ishga tushdi!")
     print(f"👤 Adminlar: {ADMIN_IDS}")
-    print(f"📊 Jami foydalanuvchilar: {db.get_total_users()}")
+    print(f"📊 Jami foydalanuvchilar: {total_users if not isinstance(total_users, Exception) else 0}")
     print("🌐 Avtomatik tarjima tizimi faol")
     print("="*50 + "\n")
+    # Ishga tushish vaqti bo'yicha hisobot (STARTUP_BUDGET soniyadan oshsa ogohlantirish)
+    startup_timer.report(float(os.getenv('STARTUP_BUDGET', '5')))
 
 # Shutdown handler
 async def on_shutdown():
     logger.info("Bot shutting down...")
+    await scheduler.stop()
+    await animator.close()
+    await flush_sessions()
+    await storage.close()
+    size = await warm_state.save()
+    if size:
+        logger.info(f"State snapshot saved: {size} bytes")
+    # Navbatdagi javoblarni yozib qo'yish
+    flushed = await db.flush_answers()
+    if flushed:
+        logger.info(f"Answer log flushed: {flushed} rows")
+    await outbound.close()
     await bot.session.close()
-    db.close()
+    await db.close()
+
+def allowed_updates():
+    """Faqat handler lari bor update turlari (qolganlarini Telegram yubormaydi)"""
+    return dp.resolve_used_update_types()
+
+def create_intake():
+    """Update lar navbati: bitta chat ketma-ket, turli chatlar parallel"""
+    async def handle(item):
+        # Supervisor va webhook dan dict, polling dan tayyor Update keladi
+        update = item if isinstance(item, Update) else Update.model_validate(item, context={"bot": bot})
+        await dp.feed_update(bot, update)
+    
+    return Intake(handle,
+                  workers=int(os.getenv('WORKER_CONCURRENCY', '64')),
+                  queue_size=int(os.getenv('INTAKE_QUEUE_SIZE', '1000')))
+
+# Ko'p jarayonli rejim: update lar supervisor dan keladi (workers.py)
+async def run_worker(updates, ready=None):
+    await on_startup()
+    if ready is not None:
+        # Supervisor shu turlar bilan polling qiladi
+        ready.put(allowed_updates())
+    loop = asyncio.get_running_loop()
+    intake = create_intake()
+    intake.start()
+    try:
+        while True:
+            data = await loop.run_in_executor(None, updates.get)
+            if data is None:
+                break
+            await intake.put(data)
+    finally:
+        await intake.stop()
+        await on_shutdown()
+
+# Webhook rejimi: Telegram update larni botning o'z HTTP serveriga yuboradi
+async def run_webhook(url: str, port: int):
+    # SIGTERM (docker stop, Render) / SIGINT - ishni tugatib, pastdagi tozalash bajariladi
+    stop = asyncio.Event()
+    on_stop_signal(stop.set)
+    intake = create_intake()
+    secret = os.getenv('WEBHOOK_SECRET') or None
+    # Intake to'la bo'lsa server navbati to'ladi va Telegram 503 oladi
+    server = WebhookServer(intake.put, path=os.getenv('WEBHOOK_PATH', '/webhook'), secret_token=secret)
+    await on_startup()
+    intake.start()
+    try:
+        with startup_timer.phase('http_server'):
+            await server.start(os.getenv('WEBHOOK_HOST', '0.0.0.0'), port)
+        with startup_timer.phase('set_webhook'):
+            await bot.set_webhook(url, secret_token=secret, allowed_updates=allowed_updates())
+        # To'xtatish signali kelguncha ishlaydi
+        await stop.wait()
+        logger.info("Stop signal received, shutting down...")
+    finally:
+        # Qabul qilingan update lar qayta ishlab bo'linadi, webhook o'chirilmaydi
+        await server.stop()
+        await intake.stop()
+        await on_shutdown()
 
-# Main function - POLLING
+# Main function - POLLING (WEBHOOK_URL berilsa - webhook)
 async def main():
-    keep_alive()
+    startup_timer.mark('handlers')
+    port = int(os.getenv('PORT', '10000'))
+    webhook_url = os.getenv('WEBHOOK_URL')
+    if webhook_url:
+        await run_webhook(webhook_url, port)
+        return
     
-    # Webhook ni o'chirish (ishonch hosil qilish uchun)
-    await bot.delete_webhook()
+    # SIGTERM (docker stop, Render) / SIGINT - polling to'xtaydi va pastdagi tozalash bajariladi
+    stop = asyncio.Event()
+    on_stop_signal(stop.set)
+    
+    # /health uchun HTTP server (xuddi shu event loop da)
+    health = WebhookServer()
+    with startup_timer.phase('http_server'):
+        await health.start(port=port)
     
-    dp.startup.register(on_startup)
-    dp.shutdown.register(on_shutdown)
+    # Webhook ni o'chirish (ishonch hosil qilish uchun)
+    with startup_timer.phase('delete_webhook'):
+        await bot.delete_webhook()
     
+    intake = create_intake()
     try:
-        # POLLING ishlatish
-        await dp.start_polling(bot)
+        await on_startup()
+        intake.start()
+        # POLLING ishlatish (faqat kerakli update turlari) - to'xtatish signali kelguncha
+        polling = asyncio.create_task(intake.poll(bot, allowed_updates()))
+        stopping = asyncio.create_task(stop.wait())
+        await asyncio.wait((polling, stopping), return_when=asyncio.FIRST_COMPLETED)
+        for task in (polling, stopping):
+            task.cancel()
+        await asyncio.gather(polling, stopping, return_exceptions=True)
+        logger.info("Stop signal received, shutting down...")
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
     finally:
-        await bot.session.close()
+        await health.stop()
+        await intake.stop()
+        await on_shutdown()
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Bot stopped by user")
\ No newline at end of file
+        logger.info("Bot stopped by user")
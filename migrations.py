@@ -0,0 +1,697 @@
+from datetime import datetime
+
+from schema_codes import (LANGUAGE_CODES, SESSION_STATUS_CODES, REWARD_STATUS_CODES,
+                          SESSION_ACTIVE, REWARD_PENDING, epoch_sql)
+from seen_bitmaps import encode_bitmap
+
+
+# ============================================
+# BAZA SXEMASI MIGRATSIYALARI
+# ============================================
+# Har bir migratsiya bir marta, tartib bilan bajariladi va
+# schema_version jadvaliga yoziladi. Yangi o'zgarish kerak bo'lsa,
+# ro'yxat oxiriga yangi funksiya qo'shiladi - eskilari o'zgartirilmaydi.
+
+
+def _column_names(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _v1_base_tables(cursor):
+    """Boshlang'ich jadvallar"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            language TEXT DEFAULT 'UZ',
+            registered_at TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question_uz TEXT,
+            question_ru TEXT,
+            question_ar TEXT,
+            question_en TEXT,
+            option1_uz TEXT,
+            option1_ru TEXT,
+            option1_ar TEXT,
+            option1_en TEXT,
+            option2_uz TEXT,
+            option2_ru TEXT,
+            option2_ar TEXT,
+            option2_en TEXT,
+            option3_uz TEXT,
+            option3_ru TEXT,
+            option3_ar TEXT,
+            option3_en TEXT,
+            correct_option INTEGER CHECK(correct_option IN (1,2,3)),
+            created_at TIMESTAMP,
+            created_by INTEGER,
+            is_active BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    # Eski bazalarda is_active ustuni bo'lmasligi mumkin (fix_database.py)
+    if 'is_active' not in _column_names(cursor, 'questions'):
+        cursor.execute('ALTER TABLE questions ADD COLUMN is_active INTEGER DEFAULT 1')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS prophets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name_uz TEXT,
+            name_ru TEXT,
+            name_ar TEXT,
+            name_en TEXT,
+            audio_file_id TEXT,
+            created_at TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            question_id INTEGER,
+            selected_option INTEGER,
+            is_correct BOOLEAN,
+            answered_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (question_id) REFERENCES questions(id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS allah_names (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            number INTEGER UNIQUE,
+            name_uz TEXT,
+            name_ru TEXT,
+            name_ar TEXT,
+            name_en TEXT,
+            description_uz TEXT,
+            description_ru TEXT,
+            description_ar TEXT,
+            description_en TEXT,
+            created_at TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            correct_count INTEGER DEFAULT 0,
+            wrong_count INTEGER DEFAULT 0,
+            total_questions INTEGER DEFAULT 0,
+            current_streak INTEGER DEFAULT 0,
+            best_streak INTEGER DEFAULT 0,
+            last_question_date DATE,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_20_questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            start_date TIMESTAMP,
+            end_date TIMESTAMP,
+            correct_count INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'active',
+            reward_paid BOOLEAN DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_question_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            session_id INTEGER,
+            question_id INTEGER,
+            selected_option INTEGER,
+            is_correct BOOLEAN,
+            answered_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (question_id) REFERENCES questions(id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_cards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE,
+            card_number TEXT,
+            card_name TEXT,
+            submitted_at TIMESTAMP,
+            verified BOOLEAN DEFAULT 0,
+            verified_by INTEGER,
+            verified_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rewards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            session_id INTEGER,
+            amount INTEGER DEFAULT 200000,
+            status TEXT DEFAULT 'pending',
+            paid_by INTEGER,
+            paid_at TIMESTAMP,
+            check_photo_id TEXT,
+            created_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_wait_times (
+            user_id INTEGER PRIMARY KEY,
+            wait_until TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_wrong_questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            question_id INTEGER,
+            answered_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (question_id) REFERENCES questions(id)
+        )
+    ''')
+
+
+def _v2_indexes(cursor):
+    """Issiq so'rovlar uchun indekslar"""
+    # get_excluded_questions: faqat indeksdan o'qiladi (covering)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_answers_user_question
+        ON user_answers (user_id, question_id)
+    ''')
+    # get_last_answers / get_user_answers(user_id)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_answers_user_time
+        ON user_answers (user_id, answered_at)
+    ''')
+    # get_user_answers() - admin uchun oxirgi javoblar
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_answers_time
+        ON user_answers (answered_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_wrong_questions_user_question
+        ON user_wrong_questions (user_id, question_id)
+    ''')
+    # Faqat aktiv sessiyalar indekslanadi (partial index)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_20_questions_active
+        ON user_20_questions (user_id, correct_count)
+        WHERE status = 'active'
+    ''')
+    # Kutilayotgan mukofotlar ro'yxati (partial index)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_rewards_pending
+        ON rewards (created_at)
+        WHERE status = 'pending'
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_rewards_user
+        ON rewards (user_id)
+    ''')
+
+
+def _v3_question_bitmaps(cursor):
+    """Foydalanuvchi ko'rgan/noto'g'ri savollar bitmaplari"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_question_bitmaps (
+            user_id INTEGER PRIMARY KEY,
+            seen BLOB,
+            wrong BLOB
+        )
+    ''')
+
+    # Mavjud javoblardan to'ldirish
+    bitmaps = {}
+    cursor.execute('SELECT user_id, question_id FROM user_answers WHERE question_id IS NOT NULL')
+    for user_id, question_id in cursor.fetchall():
+        bitmaps.setdefault(user_id, [0, 0])[0] |= 1 << question_id
+    cursor.execute('SELECT user_id, question_id FROM user_wrong_questions WHERE question_id IS NOT NULL')
+    for user_id, question_id in cursor.fetchall():
+        bitmaps.setdefault(user_id, [0, 0])[1] |= 1 << question_id
+
+    cursor.executemany('''
+        INSERT OR REPLACE INTO user_question_bitmaps (user_id, seen, wrong)
+        VALUES (?, ?, ?)
+    ''', [(user_id, encode_bitmap(seen), encode_bitmap(wrong))
+          for user_id, (seen, wrong) in bitmaps.items()])
+
+
+def _v4_unified_answer_log(cursor):
+    """user_question_sessions va user_wrong_questions -> user_answers (session_id bilan)"""
+    if 'session_id' not in _column_names(cursor, 'user_answers'):
+        cursor.execute('ALTER TABLE user_answers ADD COLUMN session_id INTEGER')
+
+    # Sessiya yozuvlarini mos javobga bog'lash (bir xil savol, 1 daqiqa ichida)
+    cursor.execute('''
+        UPDATE user_answers
+        SET session_id = matched.session_id
+        FROM (
+            SELECT ua.id AS answer_id, s.session_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY ua.id
+                       ORDER BY abs(julianday(s.answered_at) - julianday(ua.answered_at))
+                   ) AS position
+            FROM user_answers ua
+            JOIN user_question_sessions s
+              ON s.user_id = ua.user_id
+             AND s.question_id = ua.question_id
+             AND s.is_correct = ua.is_correct
+            WHERE abs(julianday(s.answered_at) - julianday(ua.answered_at)) < 60.0 / 86400
+        ) AS matched
+        WHERE matched.answer_id = user_answers.id
+          AND matched.position = 1
+          AND user_answers.session_id IS NULL
+    ''')
+
+    # Mos javobi topilmagan sessiya yozuvlari alohida qator bo'ladi
+    cursor.execute('''
+        INSERT INTO user_answers (user_id, question_id, session_id, selected_option, is_correct, answered_at)
+        SELECT s.user_id, s.question_id, s.session_id, s.selected_option, s.is_correct, s.answered_at
+        FROM user_question_sessions s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_answers ua
+            WHERE ua.user_id = s.user_id
+              AND ua.question_id = s.question_id
+              AND ua.session_id = s.session_id
+        )
+    ''')
+
+    # Noto'g'ri javoblar allaqachon user_answers da (is_correct = 0)
+    cursor.execute('''
+        INSERT INTO user_answers (user_id, question_id, selected_option, is_correct, answered_at)
+        SELECT w.user_id, w.question_id, NULL, 0, w.answered_at
+        FROM user_wrong_questions w
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_answers ua
+            WHERE ua.user_id = w.user_id
+              AND ua.question_id = w.question_id
+              AND ua.is_correct = 0
+        )
+    ''')
+
+    cursor.execute('DROP TABLE user_question_sessions')
+    cursor.execute('DROP TABLE user_wrong_questions')
+
+    # Eski skriptlar va hisobotlar uchun moslik ko'rinishlari
+    cursor.execute('''
+        CREATE VIEW user_question_sessions AS
+        SELECT id, user_id, session_id, question_id, selected_option, is_correct, answered_at
+        FROM user_answers
+        WHERE session_id IS NOT NULL
+    ''')
+    cursor.execute('''
+        CREATE VIEW user_wrong_questions AS
+        SELECT id, user_id, question_id, answered_at
+        FROM user_answers
+        WHERE is_correct = 0
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_answers_session
+        ON user_answers (session_id)
+        WHERE session_id IS NOT NULL
+    ''')
+
+
+def _text_to_code_sql(column, codes, default):
+    branches = ' '.join(f"WHEN '{name}' THEN {code}" for name, code in codes.items())
+    return f"CASE {column} {branches} ELSE {default} END"
+
+
+def _rebuild_table(cursor, table, create_sql, columns, select_sql):
+    """Jadvalni yangi sxema bilan qayta qurish (ma'lumotlar ko'chiriladi)"""
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    sequence = cursor.fetchone()
+
+    cursor.execute(create_sql.format(table=f'{table}_new'))
+    cursor.execute(f'INSERT INTO {table}_new ({columns}) SELECT {select_sql} FROM {table}')
+    cursor.execute(f'DROP TABLE {table}')
+    cursor.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+    if sequence:
+        cursor.execute('''
+            UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?
+        ''', (sequence[0], table))
+
+
+def _v5_compact_schema(cursor):
+    """Epoch vaqtlar, butun son kodlar va WITHOUT ROWID jadvallar"""
+    _rebuild_table(cursor, 'users', '''
+        CREATE TABLE {table} (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            language INTEGER DEFAULT 1,
+            registered_at INTEGER,
+            is_active INTEGER DEFAULT 1
+        )
+    ''', 'user_id, username, first_name, language, registered_at, is_active',
+        f"user_id, username, first_name, {_text_to_code_sql('language', LANGUAGE_CODES, 1)}, "
+        f"{epoch_sql('registered_at')}, is_active")
+
+    _rebuild_table(cursor, 'user_stats', '''
+        CREATE TABLE {table} (
+            user_id INTEGER PRIMARY KEY,
+            correct_count INTEGER DEFAULT 0,
+            wrong_count INTEGER DEFAULT 0,
+            total_questions INTEGER DEFAULT 0,
+            current_streak INTEGER DEFAULT 0,
+            best_streak INTEGER DEFAULT 0,
+            last_question_date INTEGER
+        ) WITHOUT ROWID
+    ''', 'user_id, correct_count, wrong_count, total_questions, current_streak, best_streak, last_question_date',
+        f"user_id, correct_count, wrong_count, total_questions, current_streak, best_streak, "
+        f"{epoch_sql('last_question_date')}")
+
+    _rebuild_table(cursor, 'user_wait_times', '''
+        CREATE TABLE {table} (
+            user_id INTEGER PRIMARY KEY,
+            wait_until INTEGER
+        ) WITHOUT ROWID
+    ''', 'user_id, wait_until', f"user_id, {epoch_sql('wait_until')}")
+
+    _rebuild_table(cursor, 'user_20_questions', '''
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            start_date INTEGER,
+            end_date INTEGER,
+            correct_count INTEGER DEFAULT 0,
+            status INTEGER DEFAULT 1,
+            reward_paid INTEGER DEFAULT 0
+        )
+    ''', 'id, user_id, start_date, end_date, correct_count, status, reward_paid',
+        f"id, user_id, {epoch_sql('start_date')}, {epoch_sql('end_date')}, correct_count, "
+        f"{_text_to_code_sql('status', SESSION_STATUS_CODES, SESSION_ACTIVE)}, reward_paid")
+
+    _rebuild_table(cursor, 'rewards', '''
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            session_id INTEGER,
+            amount INTEGER DEFAULT 200000,
+            status INTEGER DEFAULT 1,
+            paid_by INTEGER,
+            paid_at INTEGER,
+            check_photo_id TEXT,
+            created_at INTEGER
+        )
+    ''', 'id, user_id, session_id, amount, status, paid_by, paid_at, check_photo_id, created_at',
+        f"id, user_id, session_id, amount, "
+        f"{_text_to_code_sql('status', REWARD_STATUS_CODES, REWARD_PENDING)}, paid_by, "
+        f"{epoch_sql('paid_at')}, check_photo_id, {epoch_sql('created_at')}")
+
+    # Qayta qurilgan jadvallarning indekslari
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_user_20_questions_active
+        ON user_20_questions (user_id, correct_count)
+        WHERE status = {SESSION_ACTIVE}
+    ''')
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_rewards_pending
+        ON rewards (created_at)
+        WHERE status = {REWARD_PENDING}
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_rewards_user
+        ON rewards (user_id)
+    ''')
+
+    # Qolgan jadvallarda faqat vaqt ustunlari (NUMERIC ustunlar - joyida yangilanadi)
+    for table, columns in [
+        ('questions', ['created_at']),
+        ('prophets', ['created_at']),
+        ('allah_names', ['created_at']),
+        ('user_answers', ['answered_at']),
+        ('user_cards', ['submitted_at', 'verified_at']),
+    ]:
+        assignments = ', '.join(f'{column} = {epoch_sql(column)}' for column in columns)
+        cursor.execute(f'UPDATE {table} SET {assignments}')
+
+
+def _counter_upsert(name_sql, delta_sql):
+    return f'''
+            INSERT INTO stats_counters (name, value) VALUES ({name_sql}, {delta_sql})
+            ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;'''
+
+
+def _question_counter_updates(row, sign):
+    """Bitta savol qatorining hisoblagichlarga hissasi (sign: '+' yoki '-')"""
+    statements = [
+        _counter_upsert("'questions_total'", f"{sign}1"),
+        _counter_upsert("'questions_active'", f"{sign}({row}.is_active = 1)"),
+        _counter_upsert(f"'questions_month:' || COALESCE(strftime('%Y-%m', {row}.created_at, 'unixepoch', 'localtime'), '-')",
+                        f"{sign}1"),
+    ]
+    for lang in ('uz', 'ru', 'ar', 'en'):
+        statements.append(_counter_upsert(
+            f"'questions_active_{lang.upper()}'",
+            f"{sign}({row}.is_active = 1 AND COALESCE({row}.question_{lang}, '') != '')",
+        ))
+    return ''.join(statements)
+
+
+def _v6_stats_counters(cursor):
+    """Admin statistikasi uchun triggerlar bilan yangilanadigan hisoblagichlar"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    # Vaqti yo'q qatorlar '-' kalitiga yoziladi (NULL kalit bo'lishi mumkin emas)
+    user_day = "'users_day:' || COALESCE(strftime('%Y-%m-%d', {row}.registered_at, 'unixepoch', 'localtime'), '-')"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_insert_stats AFTER INSERT ON users
+        BEGIN{_counter_upsert("'users_total'", "1")}{_counter_upsert(user_day.format(row='NEW'), "1")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_delete_stats AFTER DELETE ON users
+        BEGIN{_counter_upsert("'users_total'", "-1")}{_counter_upsert(user_day.format(row='OLD'), "-1")}
+        END
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_questions_insert_stats AFTER INSERT ON questions
+        BEGIN{_question_counter_updates('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_questions_delete_stats AFTER DELETE ON questions
+        BEGIN{_question_counter_updates('OLD', '-')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_questions_update_stats
+        AFTER UPDATE OF is_active, created_at, question_uz, question_ru, question_ar, question_en ON questions
+        BEGIN{_question_counter_updates('OLD', '-')}{_question_counter_updates('NEW', '+')}
+        END
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_prophets_insert_stats AFTER INSERT ON prophets
+        BEGIN{_counter_upsert("'prophets_total'", "1")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_prophets_delete_stats AFTER DELETE ON prophets
+        BEGIN{_counter_upsert("'prophets_total'", "-1")}
+        END
+    ''')
+
+    # Oxirgi savollar ro'yxati uchun
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_questions_created_at ON questions (created_at)
+    ''')
+
+    # Mavjud ma'lumotlardan boshlang'ich qiymatlar
+    cursor.execute('DELETE FROM stats_counters')
+    language_counts = ', '.join(
+        f"('questions_active_{lang.upper()}', "
+        f"(SELECT COUNT(*) FROM questions WHERE is_active = 1 AND COALESCE(question_{lang}, '') != ''))"
+        for lang in ('uz', 'ru', 'ar', 'en')
+    )
+    cursor.execute(f'''
+        INSERT INTO stats_counters (name, value) VALUES
+            ('users_total', (SELECT COUNT(*) FROM users)),
+            ('questions_total', (SELECT COUNT(*) FROM questions)),
+            ('questions_active', (SELECT COUNT(*) FROM questions WHERE is_active = 1)),
+            ('prophets_total', (SELECT COUNT(*) FROM prophets)),
+            {language_counts}
+    ''')
+    cursor.execute('''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'users_day:' || COALESCE(strftime('%Y-%m-%d', registered_at, 'unixepoch', 'localtime'), '-'), COUNT(*)
+        FROM users GROUP BY 1
+    ''')
+    cursor.execute('''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'questions_month:' || COALESCE(strftime('%Y-%m', created_at, 'unixepoch', 'localtime'), '-'), COUNT(*)
+        FROM questions GROUP BY 1
+    ''')
+
+
+def _v7_scheduled_jobs(cursor):
+    """Kechiktirilgan vazifalar (qayta ishga tushganda ham saqlanadi)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            job_key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            run_at INTEGER NOT NULL,
+            payload TEXT
+        ) WITHOUT ROWID
+    ''')
+
+
+def _v8_bot_sessions(cursor):
+    """Foydalanuvchi sessiyalari (qayta ishga tushganda tiklash uchun)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_sessions (
+            user_id INTEGER PRIMARY KEY,
+            name TEXT,
+            language INTEGER,
+            question_id INTEGER,
+            source TEXT,
+            salawat INTEGER DEFAULT 0,
+            updated_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bot_sessions_updated ON bot_sessions(updated_at)')
+
+
+def _v9_fsm_states(cursor):
+    """aiogram FSM holatlari (SQLiteStorage)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            storage_key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT,
+            updated_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states(updated_at)')
+
+
+# Keshlanadigan kontent jadvallari -> cache_generations dagi nom
+CACHED_TABLES = {
+    'questions': 'questions',
+    'allah_names': 'allah_names',
+    'prophets': 'prophets',
+}
+
+
+def _v10_cache_generations(cursor):
+    """Kontent o'zgarganda generatsiyani oshiradigan triggerlar (CacheBus uchun)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_generations (
+            namespace TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for table, namespace in CACHED_TABLES.items():
+        cursor.execute('INSERT OR IGNORE INTO cache_generations (namespace, generation) VALUES (?, 0)',
+                       (namespace,))
+        # Boshqa jarayonlar (admin, fix_*.py skriptlari) yozganda ham ishlaydi
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_generation AFTER {event} ON {table}
+                BEGIN
+                    UPDATE cache_generations SET generation = generation + 1 WHERE namespace = '{namespace}';
+                END
+            ''')
+
+
+def _v11_scheduled_job_tokens(cursor):
+    """Har bir rejalashtirish uchun token - bajarilgan vazifa faqat o'z qatorini o'chiradi"""
+    if 'token' not in _column_names(cursor, 'scheduled_jobs'):
+        cursor.execute('ALTER TABLE scheduled_jobs ADD COLUMN token INTEGER NOT NULL DEFAULT 0')
+
+
+# (versiya, tavsif, funksiya)
+MIGRATIONS = [
+    (1, "base tables", _v1_base_tables),
+    (2, "hot query indexes", _v2_indexes),
+    (3, "user question bitmaps", _v3_question_bitmaps),
+    (4, "unified answer log", _v4_unified_answer_log),
+    (5, "compact schema", _v5_compact_schema),
+    (6, "stats counters", _v6_stats_counters),
+    (7, "scheduled jobs", _v7_scheduled_jobs),
+    (8, "bot sessions", _v8_bot_sessions),
+    (9, "fsm states", _v9_fsm_states),
+    (10, "cache generations", _v10_cache_generations),
+    (11, "scheduled job tokens", _v11_scheduled_job_tokens),
+]
+
+
+def get_schema_version(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('SELECT MAX(version) FROM schema_version')
+    result = cursor.fetchone()
+    return result[0] or 0
+
+
+def migrate(cursor):
+    """Bajarilmagan migratsiyalarni tartib bilan qo'llash.
+
+    Har bir migratsiya alohida tranzaksiyada bajariladi: xatolik bo'lsa,
+    o'sha migratsiya to'liq bekor qilinadi. Bir vaqtda ishga tushgan
+    jarayonlar (BOT_WORKERS) yozish qulfini navbat bilan oladi va versiyani
+    qulf ostida qayta o'qiydi - har bir migratsiya faqat bir marta
+    bajariladi. Joriy versiyani qaytaradi.
+    """
+    conn = cursor.connection
+    version = get_schema_version(cursor)
+    conn.commit()
+
+    for number, description, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT MAX(version) FROM schema_version')
+            version = cursor.fetchone()[0] or 0
+            if number <= version:
+                # Boshqa jarayon qo'llab bo'lgan
+                conn.commit()
+                continue
+            apply(cursor)
+            cursor.execute('''
+                INSERT INTO schema_version (version, description, applied_at)
+                VALUES (?, ?, ?)
+            ''', (number, description, datetime.now()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+        print(f"🔄 Migratsiya {number} bajarildi: {description}")
+
+    return version
@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+# Ustuvorlik sinflari (kichik raqam - oldinroq yuboriladi)
+PRIORITY_INTERACTIVE = 0  # foydalanuvchi/admin amaliga javob
+PRIORITY_ANIMATION = 1    # animatsiya kadrlari
+PRIORITY_BULK = 2         # ommaviy xabarlar, adminlarga bildirishnomalar
+
+_priority = ContextVar('outbound_priority', default=PRIORITY_INTERACTIVE)
+
+# Navbatdan o'tadigan metodlar (xabar yuborish, tahrirlash, o'chirish)
+_LIMITED_PREFIXES = ('send', 'edit', 'delete', 'copy', 'forward', 'stop')
+
+
+@contextmanager
+def send_priority(priority):
+    """Blok ichidagi barcha so'rovlar uchun ustuvorlik"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        # Kamida bitta to'liq token sig'ishi kerak, aks holda hech qachon yuborilmaydi
+        self.capacity = max(1.0, capacity)
+        self.tokens = capacity
+        self.updated = now
+        self.paused_until = 0.0
+
+    def refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_at(self, now):
+        """Keyingi token qachon bo'ladi"""
+        self.refill(now)
+        at = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(at, self.paused_until)
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Chat:
+    __slots__ = ('bucket', 'waiters', 'entry')
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.waiters = []  # heap: (ustuvorlik, tartib, future)
+        self.entry = None  # navbatlardagi amaldagi yozuv (qolganlari eskirgan)
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Telegramga chiquvchi so'rovlar navbati.
+
+    Bot sessiyasiga middleware sifatida ulanadi, shuning uchun
+    ``message.answer``, ``bot.send_message``, ``msg.delete`` va boshqalar
+    o'zgarmasdan shu yerdan o'tadi. Umumiy (~30/s) va har bir chat uchun
+    (shaxsiy ~1/s, guruh ~20/min) token chelaklari bor; navbatdagilar
+    ustuvorlik bo'yicha, bir xil ustuvorlikda kelish tartibida yuboriladi.
+    429 javobidagi ``retry_after`` o'sha chatni to'xtatib turadi va so'rov
+    qayta yuboriladi.
+    """
+
+    def __init__(self, global_rate=30.0, chat_rate=1.0, chat_burst=3,
+                 group_rate=20 / 60, group_burst=3, max_retries=3):
+        for name, value in (('global_rate', global_rate), ('chat_rate', chat_rate),
+                            ('chat_burst', chat_burst), ('group_rate', group_rate),
+                            ('group_burst', group_burst)):
+            if not value > 0:
+                raise ValueError(f"{name} must be positive, got {value!r}")
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self._global = _TokenBucket(global_rate, global_rate, time.monotonic())
+        self._chats = {}
+        self._ready = []    # heap: (ustuvorlik, tartib, chat_id) - tokeni bor chatlar
+        self._delayed = []  # heap: (vaqt, chat_id) - token kutayotgan chatlar
+        self._seq = itertools.count()
+        self._wake = None
+        self._task = None
+        self._last_cleanup = time.monotonic()
+
+    def pending(self):
+        return sum(len(chat.waiters) for chat in self._chats.values())
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None or not method.__api_method__.startswith(_LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(chat_id, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self.pause(chat_id, e.retry_after)
+                # Qayta urinish navbatda oldinda turadi
+                priority = PRIORITY_INTERACTIVE
+
+    def pause(self, chat_id, seconds):
+        """Chatga ``seconds`` davomida yubormaslik (429 retry_after)"""
+        now = time.monotonic()
+        chat = self._chat(chat_id, now)
+        chat.bucket.paused_until = max(chat.bucket.paused_until, now + seconds)
+        chat.bucket.tokens = min(chat.bucket.tokens, 0)
+
+    def _chat(self, chat_id, now):
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            # Manfiy id - guruh yoki kanal
+            group = isinstance(chat_id, str) or chat_id < 0
+            chat = _Chat(_TokenBucket(self.group_rate if group else self.chat_rate,
+                                      self.group_burst if group else self.chat_burst, now))
+            self._chats[chat_id] = chat
+        return chat
+
+    async def acquire(self, chat_id, priority=PRIORITY_INTERACTIVE):
+        """Shu chatga yuborish navbati kelguncha kutish"""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch())
+
+        now = time.monotonic()
+        chat = self._chat(chat_id, now)
+        future = asyncio.get_running_loop().create_future()
+        seq = next(self._seq)
+        heapq.heappush(chat.waiters, (priority, seq, future))
+        self._schedule(chat_id, chat, now)
+        self._wake.set()
+        await future
+
+    def _schedule(self, chat_id, chat, now):
+        """Navbatning boshi bo'yicha chatni tayyor yoki kutayotganlar ro'yxatiga qo'yish"""
+        priority, seq, _ = chat.waiters[0]
+        ready_at = chat.bucket.ready_at(now)
+        if ready_at <= now:
+            entry = ('ready', priority, seq)
+            if chat.entry != entry:
+                chat.entry = entry
+                heapq.heappush(self._ready, (priority, seq, chat_id))
+        elif chat.entry is None or chat.entry[0] != 'delayed':
+            chat.entry = ('delayed', ready_at)
+            heapq.heappush(self._delayed, (ready_at, chat_id))
+
+    def _head(self, chat):
+        """Bekor qilinmagan birinchi kutuvchi"""
+        while chat.waiters and chat.waiters[0][2].done():
+            heapq.heappop(chat.waiters)
+        return chat.waiters[0] if chat.waiters else None
+
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                ready_at, chat_id = heapq.heappop(self._delayed)
+                chat = self._chats.get(chat_id)
+                if chat is None or chat.entry != ('delayed', ready_at):
+                    continue
+                chat.entry = None
+                if self._head(chat) is not None:
+                    self._schedule(chat_id, chat, now)
+
+            self._wake.clear()
+            if not self._ready:
+                if now - self._last_cleanup > 60:
+                    self._cleanup(now)
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            global_at = self._global.ready_at(now)
+            if global_at > now:
+                await asyncio.sleep(global_at - now)
+                continue
+
+            priority, seq, chat_id = heapq.heappop(self._ready)
+            chat = self._chats.get(chat_id)
+            if chat is None or chat.entry != ('ready', priority, seq):
+                # Eskirgan yozuv: yuqoriroq ustuvorlikdagi kutuvchi oldinga o'tgan
+                continue
+            chat.entry = None
+            head = self._head(chat)
+            if head is None:
+                continue
+            if head[1] != seq or chat.bucket.ready_at(now) > now:
+                # Kutuvchi bekor qilingan yoki chat to'xtatilgan (429)
+                self._schedule(chat_id, chat, now)
+                continue
+
+            heapq.heappop(chat.waiters)
+            chat.bucket.take()
+            self._global.take()
+            head[2].set_result(None)
+            if self._head(chat) is not None:
+                self._schedule(chat_id, chat, now)
+
+    def _cleanup(self, now):
+        """To'la chelakli, kutuvchisi yo'q chatlarni unutish"""
+        self._last_cleanup = now
+        idle = [chat_id for chat_id, chat in self._chats.items()
+                if not chat.waiters and chat.entry is None and chat.bucket.ready_at(now) <= now
+                and chat.bucket.tokens >= chat.bucket.capacity]
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,156 @@
+import fcntl
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from seen_bitmaps import bitmap_from_ids
+
+# Fayl tuzilishi: sarlavha + har bir til uchun bo'lim jadvali, keyin bo'limlar.
+# Bo'lim: ids[n] (int64), correct[n] (int64), offsets[4n+1] (int64), mask, utf-8 blob.
+# Fayl faqat shu hostdagi jarayonlar uchun (/dev/shm) - baytlar tartibi mahalliy.
+PACK_MAGIC = b'IQPK'
+PACK_VERSION = 1
+_HEADER = struct.Struct('=4sHHQ')  # magic, versiya, tillar soni, generatsiya
+_SECTION = struct.Struct('=7Q')    # n, ids, correct, offsets, mask, mask_len, blob
+_NONE = b'\xff'                    # None qiymat (UTF-8 da uchramaydi)
+
+
+def _align(buffer):
+    buffer.extend(b'\0' * (-len(buffer) % 8))
+    return len(buffer)
+
+
+def build_pack(generation, by_lang, languages):
+    """by_lang[til] = [(id, savol, v1, v2, v3, to'g'ri), ...] (id bo'yicha tartiblangan)"""
+    buffer = bytearray(_HEADER.size + _SECTION.size * len(languages))
+    _HEADER.pack_into(buffer, 0, PACK_MAGIC, PACK_VERSION, len(languages), generation)
+
+    for position, lang in enumerate(languages):
+        rows = by_lang.get(lang, ())
+        ids = array('q', (row[0] for row in rows))
+        correct = array('q', (row[5] or 0 for row in rows))
+        offsets = array('q', [0])
+        blob = bytearray()
+        for row in rows:
+            for value in row[1:5]:
+                blob += _NONE if value is None else value.encode('utf-8')
+                offsets.append(len(blob))
+        bits = bitmap_from_ids(ids)
+        mask = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+        ids_at = _align(buffer)
+        buffer += ids.tobytes()
+        correct_at = _align(buffer)
+        buffer += correct.tobytes()
+        offsets_at = _align(buffer)
+        buffer += offsets.tobytes()
+        mask_at = _align(buffer)
+        buffer += mask
+        blob_at = _align(buffer)
+        buffer += blob
+        _SECTION.pack_into(buffer, _HEADER.size + position * _SECTION.size,
+                           len(rows), ids_at, correct_at, offsets_at, mask_at, len(mask), blob_at)
+    return bytes(buffer)
+
+
+def publish_pack(path, data):
+    """Atomar almashtirish - ochiq mmap lar eski generatsiyani o'qishda davom etadi"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class _PackRows:
+    """Savol qatorlari - faqat murojaat qilinganda dekodlanadi"""
+
+    __slots__ = ('ids', 'correct', 'offsets', 'blob')
+
+    def __init__(self, ids, correct, offsets, blob):
+        self.ids = ids
+        self.correct = correct
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _text(self, index):
+        value = self.blob[self.offsets[index]:self.offsets[index + 1]]
+        return None if value == _NONE else str(value, 'utf-8')
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.ids)
+        start = index * 4
+        return (self.ids[index], self._text(start), self._text(start + 1),
+                self._text(start + 2), self._text(start + 3), self.correct[index])
+
+
+class _PackPositions:
+    """id -> indeks (ids tartiblangan, binar qidiruv)"""
+
+    __slots__ = ('ids',)
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def get(self, question_id, default=None):
+        index = bisect_left(self.ids, question_id)
+        if index < len(self.ids) and self.ids[index] == question_id:
+            return index
+        return default
+
+
+class QuestionPack:
+    """mmap qilingan savollar to'plami (faqat o'qish, nusxa olinmaydi)"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, count, self.generation = _HEADER.unpack_from(view, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"unsupported question pack: {path}")
+
+        self._sections = []
+        for position in range(count):
+            n, ids_at, correct_at, offsets_at, mask_at, mask_len, blob_at = \
+                _SECTION.unpack_from(view, _HEADER.size + position * _SECTION.size)
+            ids = view[ids_at:ids_at + n * 8].cast('q')
+            correct = view[correct_at:correct_at + n * 8].cast('q')
+            offsets = view[offsets_at:offsets_at + (n * 4 + 1) * 8].cast('q')
+            mask = int.from_bytes(view[mask_at:mask_at + mask_len], 'little')
+            blob = view[blob_at:blob_at + offsets[n * 4]]
+            self._sections.append((_PackRows(ids, correct, offsets, blob), _PackPositions(ids), mask))
+
+    def section(self, position):
+        """(qatorlar, pozitsiyalar, bitmap) - til tartib raqami bo'yicha"""
+        return self._sections[position]
+
+
+def open_pack(path, generation, read_rows, languages):
+    """Shu generatsiyadagi to'plamni ochish; eskirgan bo'lsa bitta jarayon qayta quradi"""
+    try:
+        pack = QuestionPack(path)
+        if pack.generation >= generation:
+            return pack
+    except (OSError, ValueError, struct.error):
+        pass
+
+    with open(f"{path}.lock", 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            # Kutish paytida boshqa jarayon qurib bo'lgan bo'lishi mumkin
+            try:
+                pack = QuestionPack(path)
+                if pack.generation >= generation:
+                    return pack
+            except (OSError, ValueError, struct.error):
+                pass
+            publish_pack(path, build_pack(generation, read_rows(), languages))
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return QuestionPack(path)
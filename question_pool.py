@@ -0,0 +1,208 @@
+import random
+import threading
+from array import array
+
+from seen_bitmaps import bitmap_from_ids, ids_from_bitmap
+from question_pack import open_pack
+
+LANGUAGES = ('UZ', 'RU', 'AR', 'EN')
+
+
+class _LanguageSlice:
+    """Bitta til uchun faol savollar: id massivi va tayyor javob kortejlari"""
+
+    __slots__ = ('ids', 'rows', 'positions', 'mask')
+
+    def __init__(self, rows):
+        self.rows = tuple(rows)
+        self.ids = array('q', (row[0] for row in self.rows))
+        self.positions = {question_id: index for index, question_id in enumerate(self.ids)}
+        # Faol savollar bitmapi: i-bit = id=i savol mavjud
+        self.mask = bitmap_from_ids(self.ids)
+
+    @classmethod
+    def from_pack(cls, rows, positions, mask):
+        """Umumiy xotiradagi to'plam bo'limi ustida (qatorlar nusxalanmaydi)"""
+        language_slice = cls.__new__(cls)
+        language_slice.rows = rows
+        language_slice.ids = rows.ids
+        language_slice.positions = positions
+        language_slice.mask = mask
+        return language_slice
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sample(self, excluded=None):
+        """Tasodifiy savol; excluded dagi id lar tanlanmaydi"""
+        count = len(self.ids)
+        if count == 0:
+            return None
+        if not excluded:
+            return self.rows[random.randrange(count)]
+
+        # Odatda ko'p savollar hali ko'rilmagan - bir necha urinish yetarli
+        for _ in range(8):
+            index = random.randrange(count)
+            if self.ids[index] not in excluded:
+                return self.rows[index]
+
+        remaining = [index for index, question_id in enumerate(self.ids) if question_id not in excluded]
+        if not remaining:
+            return None
+        return self.rows[random.choice(remaining)]
+
+    def remaining(self, excluded_bits=0):
+        """Ko'rilmagan savollar soni"""
+        return (self.mask & ~excluded_bits).bit_count()
+
+    def sample_unseen(self, excluded_bits=0):
+        """Bitmap bo'yicha tasodifiy ko'rilmagan savol"""
+        count = len(self.ids)
+        if count == 0:
+            return None
+
+        for _ in range(8):
+            index = random.randrange(count)
+            if not (excluded_bits >> self.ids[index]) & 1:
+                return self.rows[index]
+
+        available = ids_from_bitmap(self.mask & ~excluded_bits)
+        if not available:
+            return None
+        return self.rows[self.positions[random.choice(available)]]
+
+
+class QuestionPool:
+    """Xotiradagi faol savollar hovuzi (har bir til uchun alohida).
+
+    Har bir qator ``(id, savol, variant1, variant2, variant3, to'g'ri_javob)``
+    ko'rinishida - get_random_question qaytaradigan shakl bilan bir xil.
+    Yangilanishda butun snapshot yangidan quriladi va bitta o'zlashtirish
+    bilan almashtiriladi, o'quvchilar hech qachon yarim holatni ko'rmaydi.
+
+    ``pack_path`` berilsa (masalan /dev/shm dagi fayl), savollar shu hostdagi
+    barcha jarayonlar uchun umumiy mmap to'plamdan o'qiladi.
+    """
+
+    def __init__(self, pack_path=None):
+        self.pack_path = pack_path
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+
+    def load(self, cursor):
+        """Bazadan barcha faol savollarni o'qib, snapshot ni almashtirish"""
+        if self.pack_path:
+            return self._load_pack(cursor)
+        by_lang, count = self._read_rows(cursor)
+        slices = {lang: _LanguageSlice(rows) for lang, rows in by_lang.items()}
+        self._publish(slices)
+        return count
+
+    def _load_pack(self, cursor):
+        # Generatsiya savollardan oldin o'qiladi - aks holda eski qatorlar yangi raqam bilan saqlanishi mumkin
+        cursor.execute("SELECT generation FROM cache_generations WHERE namespace = 'questions'")
+        row = cursor.fetchone()
+        pack = open_pack(self.pack_path, row[0] if row else 0,
+                         lambda: self._read_rows(cursor)[0], LANGUAGES)
+        slices = {lang: _LanguageSlice.from_pack(*pack.section(position))
+                  for position, lang in enumerate(LANGUAGES)}
+        self._publish(slices)
+        return max(len(language_slice) for language_slice in slices.values())
+
+    def _publish(self, slices):
+        # Har bir til uchun zaxira (UZ) oldindan tayyor
+        self._snapshot = {lang: (slices[lang], slices['UZ']) for lang in LANGUAGES}
+
+    @staticmethod
+    def _read_rows(cursor):
+        columns = ', '.join(
+            f'question_{lang}, option1_{lang}, option2_{lang}, option3_{lang}'
+            for lang in LANGUAGES
+        )
+        cursor.execute(f'''
+            SELECT id, correct_option, {columns}
+            FROM questions
+            WHERE is_active = 1
+            ORDER BY id
+        ''')
+        records = cursor.fetchall()
+
+        by_lang = {lang: [] for lang in LANGUAGES}
+        for record in records:
+            question_id, correct = record[0], record[1]
+            for position, lang in enumerate(LANGUAGES):
+                start = 2 + position * 4
+                text, option1, option2, option3 = record[start:start + 4]
+                if text:
+                    by_lang[lang].append((question_id, text, option1, option2, option3, correct))
+        return by_lang, len(records)
+
+    def ensure_loaded(self, cursor_factory):
+        """Birinchi murojaatda snapshot ni yuklash"""
+        if self._snapshot is not None:
+            return
+        with self._load_lock:
+            if self._snapshot is not None:
+                return
+            with cursor_factory() as cursor:
+                self.load(cursor)
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def count(self, lang='UZ'):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return 0
+        primary, _ = snapshot.get(lang, snapshot['UZ'])
+        return len(primary)
+
+    def remaining(self, lang='UZ', excluded_bits=0):
+        """Tanlangan tilda (UZ zaxirasi bilan) qolgan savollar soni"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return 0
+        primary, fallback = snapshot.get(lang, snapshot['UZ'])
+        if primary is fallback:
+            return primary.remaining(excluded_bits)
+        return ((primary.mask | fallback.mask) & ~excluded_bits).bit_count()
+
+    def get(self, question_id, lang='UZ'):
+        """id bo'yicha savol qatori (tanlangan tilda, bo'lmasa UZ dan)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        for language_slice in snapshot.get(lang, snapshot['UZ']):
+            position = language_slice.positions.get(question_id)
+            if position is not None:
+                return language_slice.rows[position]
+        return None
+
+    def random_unseen(self, lang='UZ', excluded_bits=0):
+        """Bitmapdagi savollardan tashqari tasodifiy savol, bo'lmasa UZ dan"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        primary, fallback = snapshot.get(lang, snapshot['UZ'])
+
+        question = primary.sample_unseen(excluded_bits)
+        if question is None and primary is not fallback:
+            question = fallback.sample_unseen(excluded_bits)
+        return question
+
+    def random_question(self, lang='UZ', excluded=None):
+        """Tanlangan tilda tasodifiy savol, bo'lmasa UZ dan"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        primary, fallback = snapshot.get(lang, snapshot['UZ'])
+
+        question = primary.sample(excluded)
+        if question is None and primary is not fallback:
+            question = fallback.sample(excluded)
+        return question
@@ -0,0 +1,170 @@
+from answer_log import ANSWER_INSERT
+from schema_codes import (SESSION_ACTIVE, SESSION_COMPLETED, SESSION_FAILED, REWARD_PENDING,
+                          now_epoch)
+
+# 20 ta savol musobaqasi
+CHALLENGE_TARGET = 20
+REWARD_AMOUNT = 200000
+
+
+class AnswerResult:
+    """record_answer natijasi"""
+
+    __slots__ = ('is_correct', 'session_id', 'correct_count', 'session_completed',
+                 'session_failed', 'challenge_won', 'reward_id', 'wait_until', 'start_date')
+
+    def __init__(self, is_correct, session_id=None, correct_count=0, session_completed=False,
+                 session_failed=False, challenge_won=False, reward_id=None, wait_until=None):
+        self.is_correct = is_correct
+        self.session_id = session_id
+        self.correct_count = correct_count
+        self.session_completed = session_completed
+        self.session_failed = session_failed
+        self.challenge_won = challenge_won
+        self.reward_id = reward_id
+        self.wait_until = wait_until
+        self.start_date = None
+
+    def __repr__(self):
+        return (f"AnswerResult(is_correct={self.is_correct}, session_id={self.session_id}, "
+                f"correct_count={self.correct_count}, challenge_won={self.challenge_won})")
+
+
+class QuizEngine:
+    """Bitta javobning barcha holat o'zgarishlari - bitta tranzaksiyada.
+
+    Javob, statistika, 20 talik sessiya, mukofot, noto'g'ri savol va kutish
+    vaqti bitta commit bilan yoziladi. Sinxron ishlaydi, handlerlar uni
+    ``await db.run(quiz.record_answer, ...)`` orqali DB oqimida chaqiradi.
+    """
+
+    def __init__(self, database):
+        self.db = database
+
+    def record_answer(self, user_id, question_id, selected, is_correct=None,
+                      wait_minutes=15, remember_wrong=True):
+        """Javobni yozish va AnswerResult qaytarish (xatolikda None)"""
+        try:
+            now = now_epoch()
+            with self.db.pool.write() as cursor:
+                if is_correct is None:
+                    cursor.execute('SELECT correct_option FROM questions WHERE id = ?', (question_id,))
+                    row = cursor.fetchone()
+                    is_correct = bool(row) and row[0] == selected
+                is_correct = bool(is_correct)
+
+                # Jurnal yozuvlari (bitmap va javob qatori)
+                log = [self.db.seen.mark(user_id, question_id, self.db.pool.read)]
+                wrong_marked = False
+
+                self._update_stats(cursor, user_id, is_correct)
+
+                # Aktiv sessiya xotiradan (yozuvchi kursori orqali faqat birinchi marta o'qiladi)
+                active = self.db.challenges.get(user_id, self.db.pool.read)
+
+                if is_correct:
+                    result = self._record_correct(cursor, user_id, active, now)
+                else:
+                    result = self._record_wrong(cursor, log, user_id, question_id, active, now,
+                                                wait_minutes, remember_wrong)
+                    wrong_marked = remember_wrong
+
+                # Bitta javob - bitta qator (sessiyada bo'lsa session_id bilan)
+                log.append((ANSWER_INSERT, (user_id, question_id, result.session_id,
+                                            selected, is_correct, now)))
+                if self.db.answer_log is None:
+                    self.db.write_log(log, cursor)
+            # Write-behind navbatiga faqat commitdan keyin - rollback bo'lsa jurnalga hech narsa tushmaydi
+            if self.db.answer_log is not None:
+                self.db.write_log(log)
+            # Bitmap, kutish vaqti va sessiya holati commitdan keyin xotiraga yoziladi
+            self.db.seen.apply(user_id, question_id)
+            if wrong_marked:
+                self.db.seen.apply(user_id, question_id, wrong=True)
+            if result.wait_until:
+                self.db.cooldowns.set_deadline(user_id, result.wait_until)
+            if result.session_completed or result.session_failed:
+                self.db.challenges.close(user_id, result.session_id)
+            elif result.session_id:
+                self.db.challenges.set(user_id, result.session_id, result.correct_count,
+                                       result.start_date)
+            return result
+        except Exception as e:
+            print(f"Error recording answer: {e}")
+            self.db.challenges.forget(user_id)
+            return None
+
+    def _update_stats(self, cursor, user_id, is_correct):
+        correct = 1 if is_correct else 0
+        cursor.execute('''
+            INSERT INTO user_stats (user_id, correct_count, wrong_count, total_questions,
+                                    current_streak, best_streak)
+            VALUES (?, ?, ?, 1, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                correct_count = correct_count + excluded.correct_count,
+                wrong_count = wrong_count + excluded.wrong_count,
+                total_questions = total_questions + 1,
+                best_streak = CASE WHEN excluded.correct_count
+                                   THEN MAX(best_streak, current_streak + 1)
+                                   ELSE best_streak END,
+                current_streak = CASE WHEN excluded.correct_count
+                                      THEN current_streak + 1 ELSE 0 END
+        ''', (user_id, correct, 1 - correct, correct, correct))
+
+    def _record_correct(self, cursor, user_id, active, now):
+        row = None
+        if active:
+            # Sweeper sessiyani yopib qo'ygan bo'lsa - yangisi boshlanadi
+            cursor.execute('''
+                UPDATE user_20_questions
+                SET correct_count = correct_count + 1
+                WHERE id = ? AND status = ?
+                RETURNING id, correct_count, start_date
+            ''', (active[0], SESSION_ACTIVE))
+            row = cursor.fetchone()
+        if row is None:
+            cursor.execute('''
+                INSERT INTO user_20_questions (user_id, start_date, correct_count, status)
+                VALUES (?, ?, 1, ?)
+            ''', (user_id, now, SESSION_ACTIVE))
+            row = (cursor.lastrowid, 1, now)
+        session_id, correct_count, start_date = row
+
+        result = AnswerResult(True, session_id, correct_count)
+        result.start_date = start_date
+        if correct_count >= CHALLENGE_TARGET:
+            cursor.execute('''
+                UPDATE user_20_questions SET status = ?, end_date = ? WHERE id = ?
+            ''', (SESSION_COMPLETED, now, session_id))
+            cursor.execute('''
+                INSERT INTO rewards (user_id, session_id, amount, status, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, session_id, REWARD_AMOUNT, REWARD_PENDING, now))
+            result.session_completed = True
+            result.challenge_won = True
+            result.reward_id = cursor.lastrowid
+        return result
+
+    def _record_wrong(self, cursor, log, user_id, question_id, active, now,
+                      wait_minutes, remember_wrong):
+        result = AnswerResult(False)
+        if active:
+            session_id, correct_count, _ = active
+            cursor.execute('''
+                UPDATE user_20_questions SET status = ?, end_date = ? WHERE id = ?
+            ''', (SESSION_FAILED, now, session_id))
+            result.session_id = session_id
+            result.correct_count = correct_count
+            result.session_failed = True
+
+        if remember_wrong:
+            log.append(self.db.seen.mark(user_id, question_id, self.db.pool.read, wrong=True))
+
+        if wait_minutes:
+            result.wait_until = now + wait_minutes * 60
+            cursor.execute('''
+                INSERT INTO user_wait_times (user_id, wait_until)
+                VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET wait_until = excluded.wait_until
+            ''', (user_id, result.wait_until))
+        return result
@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import secrets
+import time
+
+
+class Job:
+    """Rejalashtirilgan vazifa"""
+
+    __slots__ = ('key', 'kind', 'run_at', 'payload', 'durable', 'seq', 'token')
+
+    def __init__(self, key, kind, run_at, payload, durable, seq, token=0):
+        self.key = key
+        self.kind = kind
+        self.run_at = run_at
+        self.payload = payload
+        self.durable = durable
+        self.seq = seq
+        # Bazadagi qatorni aynan shu rejalashtirish bilan bog'laydi
+        self.token = token
+
+
+class JobScheduler:
+    """Kechiktirilgan vazifalar uchun yagona dispetcher.
+
+    Barcha vazifalar bitta heapda turadi va bitta tsikl ularni vaqti kelganda
+    ishga tushiradi - har bir foydalanuvchi uchun alohida uxlab yotgan task
+    kerak emas. Bir xil kalitli vazifa qayta qo'shilsa, eskisi almashtiriladi.
+    ``durable`` vazifalar scheduled_jobs jadvalida saqlanadi va qayta ishga
+    tushganda yuklanadi; muddati o'tib ketganlari darhol bajariladi.
+    """
+
+    def __init__(self, db, concurrency=32):
+        self.db = db
+        self._handlers = {}
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._running = set()
+        self._task = None
+
+    def register(self, kind, handler):
+        """Vazifa turi uchun handler: async handler(payload)"""
+        self._handlers[kind] = handler
+
+    def pending(self):
+        return len(self._jobs)
+
+    async def schedule(self, key, kind, delay=None, run_at=None, payload=None, durable=True):
+        """Vazifani rejalashtirish (delay soniyada yoki run_at epoch)"""
+        if run_at is None:
+            run_at = time.time() + (delay or 0)
+        if durable:
+            # Bazada butun soniya; vazifa muddatidan oldin bajarilmasligi uchun yuqoriga yaxlitlanadi
+            run_at = math.ceil(run_at)
+        job = Job(key, kind, run_at, payload or {}, durable, next(self._seq),
+                  secrets.randbits(62) + 1 if durable else 0)
+        # Almashtirilayotgan vazifa saqlash kutilayotganda bajarilib ketmasin
+        previous = self._jobs.pop(key, None)
+        if previous is not None and previous.durable and not durable:
+            # Bazadagi eski qator qolsa, qayta ishga tushganda bajarilib ketadi
+            await self.db.delete_scheduled_job(key, previous.token)
+        if durable:
+            # Avval bazaga: darhol bajarilgan vazifaning o'chirishi INSERT dan oldin
+            # tushsa, qator qolib ketib qayta ishga tushganda takror bajariladi
+            await self.db.save_scheduled_job(key, kind, run_at, json.dumps(job.payload), job.token)
+        self._push(job)
+        return job
+
+    async def cancel(self, key):
+        """Vazifani bekor qilish (heapdagi yozuv keyin tashlab yuboriladi)"""
+        job = self._jobs.pop(key, None)
+        if job is not None and job.durable:
+            await self.db.delete_scheduled_job(key, job.token)
+        return job is not None
+
+    async def load(self, owns=None):
+        """Bazadagi vazifalarni yuklash; kechikkanlari birinchi bo'lib bajariladi.
+
+        ``owns(payload)`` berilsa, faqat shu jarayonga tegishli vazifalar olinadi
+        (bir nechta worker jarayoni bir bazani ishlatganda).
+        """
+        rows = await self.db.get_scheduled_jobs()
+        now = time.time()
+        loaded = overdue = 0
+        for key, kind, run_at, payload, token in rows:
+            try:
+                data = json.loads(payload) if payload else {}
+            except ValueError:
+                data = {}
+            if owns is not None and not owns(data):
+                continue
+            self._push(Job(key, kind, run_at, data, True, next(self._seq), token))
+            loaded += 1
+            if run_at <= now:
+                overdue += 1
+        if loaded:
+            print(f"⏰ {loaded} ta vazifa yuklandi ({overdue} tasi kechikkan)")
+        return loaded
+
+    def export(self):
+        """Snapshot uchun bazada saqlanmaydigan vazifalar: [(key, kind, run_at, payload)]"""
+        return [(job.key, job.kind, job.run_at, job.payload)
+                for job in self._jobs.values() if not job.durable]
+
+    def restore(self, items):
+        """Snapshot dagi vazifalarni qaytarish (shu kalitli vazifa bo'lsa tegilmaydi)"""
+        restored = 0
+        for key, kind, run_at, payload in items:
+            if key in self._jobs:
+                continue
+            self._push(Job(key, kind, run_at, payload, False, next(self._seq)))
+            restored += 1
+        return restored
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        """Dispetcherni to'xtatish; bajarilayotgan vazifalar kutiladi"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _push(self, job):
+        self._jobs[job.key] = job
+        heapq.heappush(self._heap, (job.run_at, job.seq, job.key))
+        self._wake.set()
+
+    def _is_stale(self, entry):
+        job = self._jobs.get(entry[2])
+        return job is None or job.seq != entry[1]
+
+    async def _dispatch(self):
+        while True:
+            while self._heap and self._is_stale(self._heap[0]):
+                heapq.heappop(self._heap)
+
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            job = self._jobs.pop(key)
+            # Bir vaqtda bajariladigan vazifalar soni cheklangan
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._run(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, job):
+        try:
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                print(f"Error running job {job.key}: unknown kind {job.kind}")
+            else:
+                await handler(job.payload)
+        except Exception as e:
+            print(f"Error running job {job.key}: {e}")
+        finally:
+            self._semaphore.release()
+            if job.durable:
+                # Shu orada qayta rejalashtirilgan vazifa (boshqa token) o'chirilmaydi
+                await self.db.delete_scheduled_job(job.key, job.token)
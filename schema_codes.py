@@ -0,0 +1,58 @@
+import time
+
+# ============================================
+# IXCHAM SXEMA UCHUN KODLAR
+# ============================================
+# Bazada til va holatlar kichik butun sonlar, vaqt esa epoch soniyalar
+# sifatida saqlanadi. Database metodlari tashqariga avvalgidek matn
+# qaytaradi ('UZ', 'active', '2024-01-31 12:00:00').
+
+LANGUAGE_CODES = {'UZ': 1, 'RU': 2, 'AR': 3, 'EN': 4}
+LANGUAGE_NAMES = {code: name for name, code in LANGUAGE_CODES.items()}
+
+SESSION_ACTIVE = 1
+SESSION_COMPLETED = 2
+SESSION_FAILED = 3
+SESSION_STATUS_CODES = {'active': SESSION_ACTIVE, 'completed': SESSION_COMPLETED, 'failed': SESSION_FAILED}
+
+REWARD_PENDING = 1
+REWARD_PAID = 2
+REWARD_CANCELLED = 3
+REWARD_STATUS_CODES = {'pending': REWARD_PENDING, 'paid': REWARD_PAID, 'cancelled': REWARD_CANCELLED}
+
+
+def now_epoch():
+    return int(time.time())
+
+
+def to_epoch(value):
+    """datetime yoki son -> epoch soniya (None - hozirgi vaqt)"""
+    if value is None:
+        return now_epoch()
+    if hasattr(value, 'timestamp'):
+        return int(value.timestamp())
+    return int(value)
+
+
+def language_code(lang):
+    return LANGUAGE_CODES.get(lang, LANGUAGE_CODES['UZ'])
+
+
+def language_name(code):
+    return LANGUAGE_NAMES.get(code, 'UZ')
+
+
+def case_sql(column, codes):
+    """Kodni SQL ichida matnga aylantirish: CASE col WHEN 1 THEN 'UZ' ... END"""
+    branches = ' '.join(f"WHEN {code} THEN '{name}'" for name, code in codes.items())
+    return f"CASE {column} {branches} END"
+
+
+def time_sql(column):
+    """Epoch ustunni mahalliy vaqt matniga aylantirish"""
+    return f"datetime({column}, 'unixepoch', 'localtime')"
+
+
+def epoch_sql(column):
+    """Eski ISO matn (mahalliy vaqt) -> epoch soniya"""
+    return f"CAST(strftime('%s', {column}, 'utc') AS INTEGER)"
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+
+# Faqat yangi bit yuboriladi va mavjudiga OR qilinadi - yozuvlar tartibi ahamiyatsiz
+BITMAP_UPSERT = '''
+    INSERT INTO user_question_bitmaps (user_id, seen, wrong)
+    VALUES (?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        seen = bitmap_or(seen, excluded.seen), wrong = bitmap_or(wrong, excluded.wrong)
+'''
+
+
+def encode_bitmap(bits):
+    """Python int -> BLOB (little-endian)"""
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def decode_bitmap(blob):
+    """BLOB -> Python int"""
+    return int.from_bytes(blob, 'little') if blob else 0
+
+
+def _bitmap_or(left, right):
+    return encode_bitmap(decode_bitmap(left) | decode_bitmap(right))
+
+
+def register_bitmap_functions(conn):
+    """BITMAP_UPSERT uchun bitmap_or() SQL funksiyasi (BLOB lar uzunligi cheklanmagan)"""
+    conn.create_function('bitmap_or', 2, _bitmap_or, deterministic=True)
+
+
+def bitmap_from_ids(ids):
+    bits = 0
+    for question_id in ids:
+        bits |= 1 << question_id
+    return bits
+
+
+def ids_from_bitmap(bits):
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
+
+
+class SeenBitmaps:
+    """Foydalanuvchi ko'rgan va noto'g'ri javob bergan savollar bitmaplari.
+
+    Har bir foydalanuvchi uchun ikkita int: ``seen`` va ``wrong``. i-bit
+    yoqilgan bo'lsa, id=i savol o'sha to'plamda. Xotirada keshlanadi (LRU,
+    ``max_size`` ta foydalanuvchi) va user_question_bitmaps jadvaliga yozib
+    boriladi. Write-behind navbatidagi (hali yozilmagan) bitlar alohida
+    saqlanadi va keshdan chiqarilgan foydalanuvchi qayta o'qilganda bazadagi
+    qiymatga qo'shiladi.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._queued = {}  # user_id -> [seen, wrong, navbatdagi yozuvlar soni]
+        self._lock = threading.Lock()
+
+    def get(self, user_id, cursor_factory):
+        """(seen, wrong) juftligi; keshda bo'lmasa bazadan o'qiladi"""
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None:
+                self._cache.move_to_end(user_id)
+                return cached
+
+        with cursor_factory() as cursor:
+            cursor.execute('''
+                SELECT seen, wrong FROM user_question_bitmaps WHERE user_id = ?
+            ''', (user_id,))
+            row = cursor.fetchone()
+        loaded = (decode_bitmap(row[0]), decode_bitmap(row[1])) if row else (0, 0)
+
+        with self._lock:
+            queued = self._queued.get(user_id)
+            if queued is not None:
+                loaded = (loaded[0] | queued[0], loaded[1] | queued[1])
+            cached = self._cache.setdefault(user_id, loaded)
+            self._evict()
+            return cached
+
+    def _evict(self):
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def excluded(self, user_id, cursor_factory):
+        seen, wrong = self.get(user_id, cursor_factory)
+        return seen | wrong
+
+    def mark(self, user_id, question_id, cursor_factory, wrong=False):
+        """Bazaga yoziladigan (sql, params) juftligi; kesh commitdan keyin apply() da o'zgaradi"""
+        self.get(user_id, cursor_factory)
+        delta = encode_bitmap(1 << question_id)
+        return BITMAP_UPSERT, (user_id, b'', delta) if wrong else (user_id, delta, b'')
+
+    def apply(self, user_id, question_id, wrong=False):
+        """Yozilgan bitni keshga qo'shish.
+
+        Keshda bo'lmasa hech narsa qilinmaydi - keyingi get() bazadan va
+        navbatdagi bitlardan (queued()) o'qiydi.
+        """
+        bit = 1 << question_id
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is None:
+                return
+            seen_bits, wrong_bits = cached
+            if wrong:
+                wrong_bits |= bit
+            else:
+                seen_bits |= bit
+            self._cache[user_id] = (seen_bits, wrong_bits)
+
+    def forget(self, user_id=None):
+        """Keshdan o'chirish (None - hammasi)"""
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def queued(self, operations):
+        """Write-behind navbatiga qo'shilgan bitmap yozuvlari (qo'shishdan oldin chaqiriladi)"""
+        with self._lock:
+            for sql, params in operations:
+                if sql is not BITMAP_UPSERT:
+                    continue
+                user_id, seen, wrong = params
+                entry = self._queued.setdefault(user_id, [0, 0, 0])
+                entry[0] |= decode_bitmap(seen)
+                entry[1] |= decode_bitmap(wrong)
+                entry[2] += 1
+
+    def flushed(self, operations):
+        """Navbatdan chiqqan (yozilgan yoki tashlangan) yozuvlar"""
+        with self._lock:
+            for sql, params in operations:
+                if sql is not BITMAP_UPSERT:
+                    continue
+                entry = self._queued.get(params[0])
+                if entry is not None:
+                    entry[2] -= 1
+                    if entry[2] <= 0:
+                        del self._queued[params[0]]
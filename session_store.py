@@ -0,0 +1,208 @@
+import time
+from collections import OrderedDict
+
+
+class UserSession:
+    """Bitta foydalanuvchi sessiyasi.
+
+    Joriy savol matni saqlanmaydi - faqat id si, matn va variantlar kerak
+    bo'lganda savollar hovuzidan olinadi.
+    """
+
+    __slots__ = ('user_id', 'name', 'lang', 'question_id', 'source', 'salawat', 'seen', 'touched',
+                 'saved')
+
+    def __init__(self, user_id, name='', lang='UZ', question_id=None, source=None,
+                 salawat=0, touched=None):
+        self.user_id = user_id
+        self.name = name or ''
+        self.lang = lang or 'UZ'
+        self.question_id = question_id
+        self.source = source
+        self.salawat = salawat or 0
+        self.seen = None
+        self.touched = touched if touched is not None else time.time()
+        # Bazadagi nusxa: (maydonlar, updated_at); None - hali yozilmagan
+        self.saved = None
+
+    def set_question(self, question_id, source=None):
+        self.question_id = question_id
+        self.source = source
+
+    def clear_question(self):
+        self.question_id = None
+        self.source = None
+
+    def seen_ids(self, key='questions_seen'):
+        """Sessiya davomida ko'rilgan savollar ro'yxati (kerak bo'lganda yaratiladi)"""
+        if self.seen is None:
+            self.seen = {}
+        return self.seen.setdefault(key, [])
+
+    def reset_seen(self, key='questions_seen'):
+        if self.seen is not None:
+            self.seen.pop(key, None)
+
+    def fields(self):
+        return (self.name, self.lang, self.question_id, self.source, self.salawat)
+
+    def row(self):
+        return (self.user_id,) + self.fields() + (int(self.touched),)
+
+    def changed(self, refresh):
+        """Bazadagidan farq qiladimi (yoki u yerdagi updated_at ``refresh`` soniyadan eski)"""
+        if self.saved is None:
+            return True
+        fields, touched = self.saved
+        return fields != self.fields() or self.touched - touched >= refresh
+
+    def mark_saved(self):
+        self.saved = (self.fields(), self.touched)
+
+
+class SessionStore:
+    """LRU + TTL bilan cheklangan sessiyalar ombori.
+
+    ``max_size`` dan oshsa eng uzoq ishlatilmagan sessiya chiqariladi,
+    ``ttl`` soniya ishlatilmaganlari expire() da tozalanadi. ``database``
+    (AsyncDatabase) berilsa, sessiyalar bot_sessions jadvaliga guruhlab
+    yoziladi va xotirada bo'lmasa load() o'sha yerdan tiklaydi. Faqat
+    o'zgargan sessiyalar yoziladi; o'zgarmaganining updated_at i ``ttl/2``
+    da bir yangilanadi (bazada muddati o'tib o'chirilmasligi uchun). get() faqat
+    xotiradan o'qiydi - bazaga murojaat event loop ni to'xtatmaydi. Faqat
+    event loop oqimidan ishlatiladi.
+    """
+
+    def __init__(self, max_size=100000, ttl=6 * 3600, database=None, question_lookup=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.database = database
+        self.question_lookup = question_lookup
+        self.refresh = ttl / 2
+        self._sessions = OrderedDict()
+        self._dirty = set()
+        self._evicted = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def get(self, user_id):
+        """Xotiradagi sessiya yoki None (ishlatilgan deb belgilanadi)"""
+        now = time.time()
+        session = self._sessions.get(user_id)
+        if session is not None:
+            if now - session.touched > self.ttl:
+                del self._sessions[user_id]
+                session = None
+            else:
+                self._sessions.move_to_end(user_id)
+        elif user_id in self._evicted and now - self._evicted[user_id][-1] <= self.ttl:
+            # Chiqarilgan, lekin hali bazaga yozilmagan sessiya
+            session = self._insert(UserSession(*self._evicted.pop(user_id)))
+        if session is None:
+            return None
+
+        session.touched = now
+        self._dirty.add(user_id)
+        return session
+
+    async def load(self, user_id):
+        """Sessiyani xotiraga olish (kerak bo'lsa bazadan) - handlerdan oldin chaqiriladi"""
+        session = self.get(user_id)
+        if session is not None or self.database is None:
+            return session
+        # Kalit bo'yicha bitta qator - WITHOUT ROWID jadvaldan (executor da)
+        row = await self.database.load_bot_session(user_id, int(time.time() - self.ttl))
+        # Kutish paytida sessiya yaratilgan bo'lsa, u ustun
+        if row is not None and user_id not in self._sessions and user_id not in self._evicted:
+            self._insert(UserSession(user_id, *row)).mark_saved()
+        return self.get(user_id)
+
+    def create(self, user_id, name='', lang='UZ'):
+        """Yangi sessiya (mavjudi almashtiriladi)"""
+        session = self._insert(UserSession(user_id, name, lang))
+        self._dirty.add(user_id)
+        return session
+
+    def get_or_create(self, user_id, lang='UZ'):
+        return self.get(user_id) or self.create(user_id, lang=lang)
+
+    def lang(self, user_id, default='UZ'):
+        session = self.get(user_id)
+        return session.lang if session is not None else default
+
+    async def current_question(self, session):
+        """Joriy savol qatori (id, savol, v1, v2, v3, to'g'ri) yoki None"""
+        if session is None or session.question_id is None or self.question_lookup is None:
+            return None
+        return await self.question_lookup(session.question_id, session.lang)
+
+    def _insert(self, session):
+        self._sessions[session.user_id] = session
+        self._sessions.move_to_end(session.user_id)
+        while len(self._sessions) > self.max_size:
+            user_id, evicted = self._sessions.popitem(last=False)
+            if self._needs_write(user_id, evicted):
+                self._evicted[user_id] = evicted.row()
+            self._dirty.discard(user_id)
+        return session
+
+    def _needs_write(self, user_id, session):
+        return (self.database is not None and user_id in self._dirty
+                and session.changed(self.refresh))
+
+    def expire(self, now=None):
+        """TTL dan o'tgan sessiyalarni chiqarish (eng eskisidan boshlab)"""
+        cutoff = (now if now is not None else time.time()) - self.ttl
+        expired = 0
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if session.touched >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            if self._needs_write(user_id, session):
+                self._evicted[user_id] = session.row()
+            self._dirty.discard(user_id)
+            expired += 1
+        return expired
+
+    def export(self):
+        """Snapshot uchun: [(row, seen, dirty)] - LRU tartibida"""
+        items = [(row, None, True) for row in self._evicted.values()]
+        items.extend((session.row(), session.seen,
+                      user_id in self._dirty and session.changed(self.refresh))
+                     for user_id, session in self._sessions.items())
+        return items
+
+    def restore(self, items, skip=()):
+        """Snapshot dan tiklash; ``skip`` dagilar bazadan o'qiladi"""
+        cutoff = time.time() - self.ttl
+        restored = 0
+        for row, seen, dirty in items:
+            user_id = row[0]
+            if user_id in skip or row[-1] < cutoff or user_id in self._sessions:
+                continue
+            session = self._insert(UserSession(*row))
+            session.seen = seen
+            if dirty:
+                self._dirty.add(user_id)
+            else:
+                session.mark_saved()
+            restored += 1
+        return restored
+
+    def collect_dirty(self):
+        """Bazaga yozilishi kerak bo'lgan qatorlar (ro'yxat tozalanadi)"""
+        rows = list(self._evicted.values())
+        for user_id in self._dirty:
+            session = self._sessions.get(user_id)
+            # Faqat o'qilgan (o'zgarmagan) sessiyalar yozilmaydi
+            if session is not None and session.changed(self.refresh):
+                rows.append(session.row())
+                session.mark_saved()
+        self._evicted = {}
+        self._dirty = set()
+        return rows
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import pickle
+import struct
+import time
+import zlib
+
+# Fayl tuzilishi: sarlavha + zlib(pickle(holat))
+SNAPSHOT_MAGIC = b'IQBS'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('>4sHdII')  # magic, versiya, yaratilgan vaqt, crc32, uzunlik
+
+
+def write_snapshot(path, state):
+    """Holatni atomar yozish (vaqtinchalik fayl + os.replace); hajmni qaytaradi"""
+    return write_snapshot_bytes(path, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def write_snapshot_bytes(path, raw, created_at=None):
+    """created_at - holat yig'ilgan vaqt (tiklashda bazadagi yangiroq yozuvlar bilan solishtiriladi)"""
+    payload = zlib.compress(raw, 6)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                          created_at if created_at is not None else time.time(),
+                          zlib.crc32(payload), len(payload))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return _HEADER.size + len(payload)
+
+
+def read_snapshot(path):
+    """(yaratilgan_vaqt, holat) yoki None - fayl yo'q, boshqa versiya yoki buzilgan"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, created_at, crc, length = _HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                print(f"⚠️ Snapshot versiyasi mos emas: {path}")
+                return None
+            payload = f.read(length)
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            print(f"⚠️ Snapshot buzilgan: {path}")
+            return None
+        return created_at, pickle.loads(zlib.decompress(payload))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading snapshot: {e}")
+        return None
+
+
+class WarmState:
+    """Xotiradagi holatni qayta ishga tushishda tiklash.
+
+    Sessiyalar (joriy savol, salovat, ko'rilgan ro'yxatlar), FSM keshi va
+    bazada saqlanmaydigan kechiktirilgan vazifalar bitta faylga yoziladi.
+    Baza asosiy manba bo'lib qoladi: snapshot dan keyin bazada yangilangan
+    kalitlar tiklanmaydi, ular odatdagidek bazadan o'qiladi.
+    """
+
+    def __init__(self, path, db, sessions, storage, scheduler):
+        self.path = path
+        self.db = db
+        self.sessions = sessions
+        self.storage = storage
+        self.scheduler = scheduler
+
+    def collect(self):
+        return {
+            'sessions': self.sessions.export(),
+            'fsm': self.storage.export(),
+            'jobs': self.scheduler.export(),
+        }
+
+    async def save(self):
+        """Holatni faylga yozish.
+
+        Serializatsiya event loop da (obyektlar shu yerda o'zgaradi), siqish
+        va disk I/O alohida oqimda.
+        """
+        try:
+            created_at = time.time()
+            raw = pickle.dumps(self.collect(), protocol=pickle.HIGHEST_PROTOCOL)
+            return await asyncio.to_thread(write_snapshot_bytes, self.path, raw, created_at)
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+            return 0
+
+    async def restore(self):
+        """Snapshot ni yuklash; tiklangan yozuvlar soni"""
+        started = time.perf_counter()
+        loaded = await asyncio.to_thread(read_snapshot, self.path)
+        if loaded is None:
+            return 0
+        created_at, state = loaded
+
+        # Snapshot dan keyin bazaga yozilganlar eskirgan - ular tiklanmaydi
+        since = int(created_at)
+        newer_sessions = await self.db.get_bot_sessions_updated_since(since)
+        newer_fsm = await self.db.get_fsm_keys_updated_since(since)
+        if newer_sessions is None or newer_fsm is None:
+            return 0
+
+        restored = self.sessions.restore(state.get('sessions', ()), newer_sessions)
+        restored += self.storage.restore(state.get('fsm', ()), newer_fsm)
+        restored += self.scheduler.restore(state.get('jobs', ()))
+        print(f"♻️ Snapshot tiklandi: {restored} ta yozuv "
+              f"({time.perf_counter() - started:.2f} s, {time.time() - created_at:.0f} s oldingi)")
+        return restored
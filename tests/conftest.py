@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modullar repo ildizida joylashgan
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,29 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import ROOT
+from migrations import MIGRATIONS
+
+SCRIPT = '''
+import sys
+from database import Database
+Database(sys.argv[1], readers=1).close()
+'''
+
+
+def test_concurrent_processes_migrate_once(tmp_path):
+    path = str(tmp_path / 'bot.db')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    processes = [subprocess.Popen([sys.executable, '-c', SCRIPT, path], env=env,
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                 for _ in range(6)]
+    for process in processes:
+        _, err = process.communicate(timeout=120)
+        assert process.returncode == 0, err.decode()
+
+    conn = sqlite3.connect(path)
+    versions = [row[0] for row in conn.execute('SELECT version FROM schema_version ORDER BY version')]
+    conn.close()
+    assert versions == [number for number, _, _ in MIGRATIONS]
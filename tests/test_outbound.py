@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiogram')
+
+from outbound import OutboundScheduler  # noqa: E402
+
+
+@pytest.mark.parametrize('option', ['global_rate', 'chat_rate', 'chat_burst', 'group_rate', 'group_burst'])
+def test_non_positive_limits_are_rejected(option):
+    with pytest.raises(ValueError):
+        OutboundScheduler(**{option: 0})
+
+
+def test_fractional_global_rate_still_sends():
+    # BOT_WORKERS > 30: har bir workerga 1 token/s dan kam
+    async def scenario():
+        outbound = OutboundScheduler(global_rate=30 / 40, chat_rate=100, chat_burst=1)
+        try:
+            await asyncio.wait_for(outbound.acquire(1), 1)
+        finally:
+            await outbound.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,19 @@
+import pytest
+
+from check_query_plans import check_plans
+
+
+@pytest.fixture(scope='module')
+def results(tmp_path_factory):
+    return check_plans(str(tmp_path_factory.mktemp('plans') / 'plans.db'))
+
+
+def test_hot_paths_are_checked(results):
+    names = {name for name, _, _ in results}
+    assert {"record_answer (to'g'ri)", 'record_answer (xato)',
+            'record_answer (sessiyada)', 'get_random_unseen_question (sovuq)'} <= names
+
+
+def test_no_full_scans_on_hot_tables(results):
+    scans = [(name, problems) for name, problems, _ in results if problems]
+    assert scans == []
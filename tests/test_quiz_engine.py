@@ -0,0 +1,46 @@
+from database import Database
+from quiz_engine import QuizEngine
+
+
+class FailingCommit:
+    """Yozuvchi ulanish - commit xatolik beradi"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        raise RuntimeError('commit failed')
+
+
+def test_failed_answer_leaves_nothing_in_log(tmp_path):
+    db = Database(str(tmp_path / 'bot.db'), readers=1, write_behind=True, flush_ms=60000)
+    writer = db.pool.writer
+    try:
+        db.pool.writer = FailingCommit(writer)
+        assert QuizEngine(db).record_answer(1, 5, 1, is_correct=False) is None
+        db.pool.writer = writer
+
+        assert db.answer_log.pending() == 0
+        assert db.seen.get(1, db.pool.read) == (0, 0)
+        with db.pool.read() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM user_stats')
+            assert cursor.fetchone()[0] == 0
+    finally:
+        db.pool.writer = writer
+        db.close()
+
+
+def test_committed_answer_is_queued(tmp_path):
+    db = Database(str(tmp_path / 'bot.db'), readers=1, write_behind=True, flush_ms=60000)
+    try:
+        assert QuizEngine(db).record_answer(1, 5, 1, is_correct=True) is not None
+        assert db.answer_log.pending() == 2
+        db.flush_answers()
+        with db.pool.read() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM user_answers WHERE user_id = 1')
+            assert cursor.fetchone()[0] == 1
+    finally:
+        db.close()
@@ -0,0 +1,35 @@
+import asyncio
+
+from async_database import AsyncDatabase
+from database import Database
+from scheduler import JobScheduler
+
+
+def test_rescheduled_job_keeps_its_row(tmp_path):
+    async def scenario():
+        db = AsyncDatabase(Database(str(tmp_path / 'bot.db'), readers=1))
+        scheduler = JobScheduler(db)
+        rows_seen = []
+
+        async def handler(payload):
+            if payload['n'] == 1:
+                # Qayta urinish - xuddi shu soniyadagi run_at bilan
+                await scheduler.schedule('job', 'kind', run_at=payload['run_at'], payload={'n': 2})
+            else:
+                # Birinchi vazifaning o'chirishi tugashini kutib, o'z qatorini tekshirish
+                await asyncio.sleep(0.2)
+                rows_seen.extend(await db.get_scheduled_jobs())
+
+        scheduler.register('kind', handler)
+        first = await scheduler.schedule('job', 'kind', delay=0, payload={'n': 1})
+        first.payload['run_at'] = first.run_at
+        scheduler.start()
+        await asyncio.sleep(2)
+        await scheduler.stop()
+        remaining = await db.get_scheduled_jobs()
+        await db.close()
+        return rows_seen, remaining
+
+    rows_seen, remaining = asyncio.run(scenario())
+    assert [(key, payload) for key, _, _, payload, _ in rows_seen] == [('job', '{"n": 2}')]
+    assert remaining == []
@@ -0,0 +1,24 @@
+from database import Database
+from seen_bitmaps import ids_from_bitmap
+
+
+def test_evicted_user_keeps_queued_bits(tmp_path):
+    db = Database(str(tmp_path / 'bot.db'), readers=1, write_behind=True, flush_ms=60000)
+    try:
+        db.seen.max_size = 1
+        db.save_answer(1, 5, 1, True)
+        db.save_wrong_question(1, 7)
+        # Boshqa foydalanuvchi 1 ni keshdan chiqaradi, navbat hali yozilmagan
+        db.seen.get(2, db.pool.read)
+        assert db.answer_log.pending() > 0
+
+        seen, wrong = db.seen.get(1, db.pool.read)
+        assert ids_from_bitmap(seen) == [5]
+        assert ids_from_bitmap(wrong) == [7]
+
+        db.flush_answers()
+        assert db.seen._queued == {}
+        db.seen.forget()
+        assert [ids_from_bitmap(bits) for bits in db.seen.get(1, db.pool.read)] == [[5], [7]]
+    finally:
+        db.close()
@@ -0,0 +1,34 @@
+from session_store import SessionStore
+
+
+def test_only_changed_sessions_are_written():
+    store = SessionStore(ttl=3600, database=object())
+    store.create(1, 'Ali')
+    assert [row[0] for row in store.collect_dirty()] == [1]
+
+    # Faqat o'qish - yozilmaydi
+    store.get(1)
+    assert store.lang(1) == 'UZ'
+    assert store.collect_dirty() == []
+
+    store.get(1).salawat += 1
+    assert [row[5] for row in store.collect_dirty()] == [1]
+
+
+def test_unchanged_session_refreshes_updated_at():
+    store = SessionStore(ttl=3600, database=object())
+    session = store.create(1, 'Ali')
+    store.collect_dirty()
+
+    session.touched += store.refresh
+    store.get(1).touched = session.touched
+    assert [row[0] for row in store.collect_dirty()] == [1]
+
+
+def test_evicted_unchanged_session_is_not_written():
+    store = SessionStore(max_size=1, ttl=3600, database=object())
+    store.create(1, 'Ali')
+    store.collect_dirty()
+    store.get(1)
+    store.create(2, 'Vali')
+    assert [row[0] for row in store.collect_dirty()] == [2]
@@ -0,0 +1,65 @@
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# main.py dagi tartib: signal -> stop, keyin finally da intake va baza yopiladi
+SCRIPT = '''
+import asyncio
+import sys
+
+from bootstrap import on_stop_signal
+from database import Database
+from intake import Intake
+
+
+async def main(path):
+    stop = asyncio.Event()
+    on_stop_signal(stop.set)
+    db = Database(path, readers=1, write_behind=True, flush_ms=600000)
+
+    async def handle(item):
+        db.save_answer(item['message']['chat']['id'], item['update_id'], 1, True)
+
+    intake = Intake(handle, workers=4)
+    intake.start()
+    try:
+        for update_id in range(1, 21):
+            await intake.put({'update_id': update_id, 'message': {'chat': {'id': update_id % 3 + 1}}})
+        while len(intake):
+            await asyncio.sleep(0.01)
+        print('ready', db.answer_log.pending(), flush=True)
+        await stop.wait()
+    finally:
+        await intake.stop()
+        db.close()
+
+
+asyncio.run(main(sys.argv[1]))
+'''
+
+
+def test_sigterm_flushes_queued_answers(tmp_path):
+    path = str(tmp_path / 'bot.db')
+    process = subprocess.Popen([sys.executable, '-c', SCRIPT, path],
+                               env=dict(os.environ, PYTHONPATH=ROOT),
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            if line.startswith('ready'):
+                assert int(line.split()[1]) > 0
+                break
+        process.send_signal(signal.SIGTERM)
+        _, err = process.communicate(timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    assert process.returncode == 0, err
+
+    conn = sqlite3.connect(path)
+    count = conn.execute('SELECT COUNT(*) FROM user_answers').fetchone()[0]
+    conn.close()
+    assert count == 20
@@ -0,0 +1,101 @@
+import asyncio
+import hmac
+import logging
+from collections import deque
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookServer:
+    """Botning o'z event loop idagi HTTP server (aiohttp).
+
+    ``/`` va ``/health`` - holatni tekshirish uchun. ``on_update`` berilsa,
+    ``path`` ga kelgan update lar darhol 200 bilan javob olib, ichki navbatga
+    qo'yiladi va alohida task lar ularni ``on_update(data)`` ga uzatadi.
+    Telegram qayta yuborgan (bir xil update_id) update lar tashlab yuboriladi.
+    Navbat to'la bo'lsa 503 qaytadi - Telegram keyinroq qayta yuboradi.
+    """
+
+    def __init__(self, on_update=None, path='/webhook', secret_token=None,
+                 queue_size=10000, dedupe_size=10000, consumers=1):
+        self.on_update = on_update
+        self.path = path
+        self.secret_token = secret_token
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.consumers = consumers
+        self._seen = set()
+        self._seen_order = deque()
+        self._dedupe_size = dedupe_size
+        self._tasks = []
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/', self._home)
+        self.app.router.add_get('/health', self._health)
+        if on_update is not None:
+            self.app.router.add_post(path, self._receive)
+
+    async def _home(self, request):
+        return web.Response(text="Bot ishlamoqda! 🤖")
+
+    async def _health(self, request):
+        return web.Response(text="OK")
+
+    def _remember(self, update_id):
+        self._seen.add(update_id)
+        self._seen_order.append(update_id)
+        if len(self._seen_order) > self._dedupe_size:
+            self._seen.discard(self._seen_order.popleft())
+
+    async def _receive(self, request):
+        if self.secret_token and not hmac.compare_digest(
+                request.headers.get(SECRET_HEADER, ''), self.secret_token):
+            return web.Response(status=401)
+        try:
+            data = await request.json()
+            update_id = data['update_id']
+        except (ValueError, KeyError, TypeError):
+            return web.Response(status=400)
+
+        if update_id in self._seen:
+            return web.Response()
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            return web.Response(status=503)
+        self._remember(update_id)
+        return web.Response()
+
+    async def _consume(self):
+        while True:
+            data = await self.queue.get()
+            try:
+                await self.on_update(data)
+            except Exception as e:
+                logger.error(f"Webhook update error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self, host='0.0.0.0', port=10000):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        if self.on_update is not None:
+            self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.consumers)]
+        logger.info(f"HTTP server started on {host}:{port}")
+
+    async def stop(self):
+        """Yangi so'rovlarni to'xtatish va navbatdagilarni qayta ishlab bo'lish"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._tasks:
+            await self.queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
@@ -0,0 +1,168 @@
+"""Ko'p jarayonli rejim: supervisor + BOT_WORKERS ta worker.
+
+Supervisor Telegramdan update larni oladi (long polling) va har birini
+chat_id bo'yicha bitta workerga yuboradi. Bitta chat doim bitta workerga
+tushadi - foydalanuvchi holati (sessiya, FSM, kutish vaqti) jarayonlar
+orasida bo'linmaydi va update lar tartibi saqlanadi.
+
+Ishga tushirish: BOT_WORKERS=4 python workers.py
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from queue import Empty, Full
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(chat_id, workers):
+    """chat_id qaysi workerga tegishli"""
+    return int(chat_id or 0) % workers
+
+
+def update_chat_id(data):
+    """Update (dict) dagi chat id si, bo'lmasa foydalanuvchi id si"""
+    for key, event in data.items():
+        if key == 'update_id' or not isinstance(event, dict):
+            continue
+        chat = event.get('chat') or (event.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        user = event.get('from') or event.get('user')
+        if user:
+            return user['id']
+    return 0
+
+
+def _worker_process(index, count, updates, ready):
+    # main.py import paytida shu qiymatlarni o'qiydi
+    os.environ['BOT_WORKER_INDEX'] = str(index)
+    os.environ['BOT_WORKERS'] = str(count)
+    import main
+    try:
+        asyncio.run(main.run_worker(updates, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+class Supervisor:
+    """Worker jarayonlarini boshqarish va update larni taqsimlash"""
+
+    def __init__(self, bot, count, queue_size=1000):
+        self.bot = bot
+        self.count = count
+        # fork emas: SQLite ulanishlari va oqimlar bola jarayonga o'tmasligi kerak
+        self._context = multiprocessing.get_context('spawn')
+        self.queues = [self._context.Queue(maxsize=queue_size) for _ in range(count)]
+        self.processes = [None] * count
+        # Workerlar ishga tushgach kerakli update turlarini yuboradi
+        self.ready = self._context.Queue()
+
+    def _start(self, index):
+        process = self._context.Process(
+            target=_worker_process, args=(index, self.count, self.queues[index], self.ready),
+            name=f'bot-worker-{index}', daemon=False,
+        )
+        process.start()
+        self.processes[index] = process
+        logger.info(f"Worker {index} started (pid {process.pid})")
+
+    def start(self):
+        for index in range(self.count):
+            self._start(index)
+
+    def check(self):
+        """To'xtab qolgan workerni qayta ishga tushirish (navbati saqlanadi)"""
+        for index, process in enumerate(self.processes):
+            if process is not None and not process.is_alive():
+                logger.error(f"Worker {index} exited with code {process.exitcode}, restarting")
+                self._start(index)
+
+    async def dispatch(self, data):
+        # Navbat to'la bo'lsa kutadi - polling sekinlashadi (backpressure).
+        # Kutish executor da: event loop (/health) to'xtamaydi, o'lgan worker
+        # esa kutish paytida qayta ishga tushiriladi
+        queue = self.queues[shard_for(update_chat_id(data), self.count)]
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, queue.put, data, True, 5)
+                return
+            except Full:
+                self.check()
+
+    async def poll(self, timeout=30):
+        # Handlerlar workerlarda ro'yxatdan o'tadi - update turlarini ulardan olamiz
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                allowed_updates = await loop.run_in_executor(None, self.ready.get, True, 5)
+                break
+            except Empty:
+                self.check()
+        offset = None
+        while True:
+            try:
+                updates = await self.bot.get_updates(offset=offset, timeout=timeout,
+                                                     allowed_updates=allowed_updates)
+            except Exception as e:
+                logger.error(f"Polling error: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                await self.dispatch(update.model_dump(mode='json', exclude_none=True))
+                offset = update.update_id + 1
+            self.check()
+
+    def stop(self, timeout=30):
+        for queue in self.queues:
+            try:
+                queue.put(None, timeout=5)
+            except Exception:
+                pass
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+
+
+async def supervise(count):
+    from aiogram import Bot
+    from webhook import WebhookServer
+    from bootstrap import on_stop_signal
+
+    bot = Bot(token=os.getenv('BOT_TOKEN'))
+    supervisor = Supervisor(bot, count, int(os.getenv('WORKER_QUEUE_SIZE', '1000')))
+    supervisor.start()
+    # /health uchun HTTP server
+    health = WebhookServer()
+    await health.start(port=int(os.getenv('PORT', '10000')))
+    try:
+        await bot.delete_webhook()
+        # SIGTERM/SIGINT - polling to'xtaydi, workerlarga to'xtash belgisi yuboriladi
+        polling = asyncio.create_task(supervisor.poll())
+        on_stop_signal(polling.cancel)
+        try:
+            await polling
+        except asyncio.CancelledError:
+            logger.info("Stop signal received, stopping workers...")
+    finally:
+        await health.stop()
+        await bot.session.close()
+        supervisor.stop()
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(supervise(max(1, int(os.getenv('BOT_WORKERS', str(os.cpu_count() or 1))))))
+    except KeyboardInterrupt:
+        logger.info("Supervisor stopped by user")